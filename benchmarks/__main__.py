@@ -0,0 +1,86 @@
+"""Microbenchmarks of the per-message hot paths.
+
+Run every benchmark, or the ones matching ``-k``, save the results as a baseline and compare
+later runs against it::
+
+    $ python -m benchmarks --save
+    $ python -m benchmarks --compare
+    $ python -m benchmarks -k spyfall.database --games 10000
+"""
+
+import argparse
+import fnmatch
+import logging
+import sys
+import tempfile
+
+from pathlib import Path
+
+from benchmarks import bench_spyfall, bench_wordweaver, bench_words_game  # noqa: F401
+from benchmarks.fixtures import Fixtures
+from benchmarks.harness import (
+    REGISTRY,
+    REGRESSION_THRESHOLD,
+    ROUNDS,
+    Change,
+    format_time,
+    load,
+    measure,
+    save,
+)
+
+
+DEFAULT_BASELINE = Path(".benchmarks") / "baseline.json"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="pattern", default="*", help="glob of benchmark names")
+    parser.add_argument("--games", type=int, default=100_000, help="games in the histories")
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, type=Path)
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, type=Path)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=REGRESSION_THRESHOLD,
+        help="relative slowdown reported as a regression",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    pattern = args.pattern if any(c in args.pattern for c in "*?[") else f"*{args.pattern}*"
+    selected = [bench for bench in REGISTRY if fnmatch.fnmatch(bench.name, pattern)]
+    baseline = load(args.compare) if args.compare else {}
+
+    results = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as directory:
+        fixtures = Fixtures(Path(directory), games=args.games)
+        width = max((len(bench.name) for bench in selected), default=0)
+
+        for bench in selected:
+            result = results[bench.name] = measure(bench.factory(fixtures), rounds=args.rounds)
+            line = f"{bench.name:<{width}}  {format_time(result.median):>10}  "
+            line += f"min {format_time(result.min):>10}"
+
+            if (previous := baseline.get(bench.name)) is not None:
+                change = Change(bench.name, previous.median, result.median)
+                line += f"  was {format_time(change.baseline):>10} {change.ratio - 1:+7.1%}"
+                if change.regressed(args.threshold):
+                    regressions.append(change)
+                    line += "  REGRESSION"
+            print(line, flush=True)
+
+    if args.save:
+        save(results, args.save)
+        print(f"Saved baseline to {args.save}")
+
+    if regressions:
+        print(f"{len(regressions)} benchmarks regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
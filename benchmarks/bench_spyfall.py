@@ -0,0 +1,53 @@
+import functools
+import itertools
+import random
+
+from collections.abc import Callable
+from typing import Any
+
+import config
+
+from benchmarks.fixtures import SPYFALL_DATABASE_CALLS, Arguments, Fixtures
+from benchmarks.harness import benchmark
+from spyfall.handlers.messages import uses_word
+
+
+SAMPLE_SIZE = 1000
+MESSAGE = (
+    "I think the place is pretty crowded, people come here to relax after work and "
+    "nobody is in a hurry, so my answer is that it is quite comfortable"
+)
+
+
+def _database_call(method: str, arguments: Arguments, fixtures: Fixtures) -> Callable[[], Any]:
+    database = fixtures.spyfall_database
+    rng = random.Random(0)
+    calls = itertools.cycle([arguments(fixtures, rng) for _ in range(SAMPLE_SIZE)])
+    bound = getattr(database, method)
+
+    async def call() -> Any:
+        return await bound(*next(calls))
+
+    return call
+
+
+for _method, _arguments in SPYFALL_DATABASE_CALLS.items():
+    benchmark(f"spyfall.database.{_method}")(functools.partial(_database_call, _method, _arguments))
+
+
+@benchmark("spyfall.dictionary.get_random_words")
+def dictionary_get_random_words(fixtures: Fixtures) -> Callable[[], Any]:
+    dictionary = fixtures.spyfall_dictionary
+
+    async def call() -> Any:
+        return await dictionary.get_random_words(config.SPYFALL_WORDS_PER_PLAYER)
+
+    return call
+
+
+@benchmark("spyfall.track_word_usage.regex")
+def track_word_usage_regex(fixtures: Fixtures) -> Callable[[], Any]:
+    # A message checked against the five words of its author, one of them used
+    words = ["answer", "kettle", "umbrella", "harbour", "scissors"]
+    text = MESSAGE.lower()
+    return lambda: [word for word in words if uses_word(text, word)]
@@ -0,0 +1,52 @@
+import itertools
+import random
+import sqlite3
+
+from collections.abc import Callable
+from typing import Any
+
+from benchmarks.fixtures import Fixtures
+from benchmarks.harness import benchmark
+from words_game.work_with_dp import (
+    get_active_session,
+    get_next_player,
+    get_session_status,
+)
+
+
+SAMPLE_SIZE = 1000
+
+
+@benchmark("words_game.translate")
+def words_translate(fixtures: Fixtures) -> Callable[[], Any]:
+    lexicon = fixtures.lexicon
+    with sqlite3.connect(fixtures.words_game_database) as connection:
+        known = [en for (en,) in connection.execute("SELECT en FROM words LIMIT ?", (SAMPLE_SIZE,))]
+    words = itertools.cycle(known + [word + "qx" for word in known])
+    return lambda: lexicon.translate(next(words))
+
+
+@benchmark("words_game.get_next_player")
+def words_get_next_player(fixtures: Fixtures) -> Callable[[], Any]:
+    path = fixtures.words_game_database
+    rng = random.Random(0)
+    sessions = [rng.randint(1, fixtures.games) for _ in range(SAMPLE_SIZE)]
+    turns = itertools.cycle(
+        (session_id, rng.choice(fixtures.players(session_id))) for session_id in sessions
+    )
+    return lambda: get_next_player(path, *next(turns))
+
+
+@benchmark("words_game.get_session_status")
+def words_get_session_status(fixtures: Fixtures) -> Callable[[], Any]:
+    path = fixtures.words_game_database
+    rng = random.Random(0)
+    sessions = itertools.cycle([rng.randint(1, fixtures.games) for _ in range(SAMPLE_SIZE)])
+    return lambda: get_session_status(path, next(sessions))
+
+
+@benchmark("words_game.get_active_session")
+def words_get_active_session(fixtures: Fixtures) -> Callable[[], Any]:
+    path = fixtures.words_game_database
+    chats = itertools.cycle([fixtures.chat_id(index) for index in range(SAMPLE_SIZE)])
+    return lambda: get_active_session(path, next(chats))
@@ -0,0 +1,57 @@
+import itertools
+import random
+
+from collections.abc import Callable
+from typing import Any
+
+from benchmarks.fixtures import Fixtures
+from benchmarks.harness import benchmark
+from wordweaver.entities.player import PlayerEntity
+from wordweaver.executors.session import SessionExecutor
+
+
+SAMPLE_SIZE = 1000
+
+
+@benchmark("wordweaver.english.contains")
+def english_contains(fixtures: Fixtures) -> Callable[[], Any]:
+    english = fixtures.english
+    rng = random.Random(0)
+    known = rng.sample(fixtures.english_words, SAMPLE_SIZE // 2)
+    unknown = [word + "qx" for word in rng.sample(fixtures.english_words, SAMPLE_SIZE // 2)]
+    words = itertools.cycle(known + unknown)
+    return lambda: next(words) in english
+
+
+@benchmark("wordweaver.english.random_word")
+def english_random_word(fixtures: Fixtures) -> Callable[[], Any]:
+    return fixtures.english.random_word
+
+
+@benchmark("wordweaver.english.random_letters")
+def english_random_letters(fixtures: Fixtures) -> Callable[[], Any]:
+    return fixtures.english.random_letters
+
+
+def _executor(fixtures: Fixtures, players: int) -> SessionExecutor:
+    random.seed(0)
+    executor = SessionExecutor(_english=fixtures.english)
+    for index in range(players):
+        executor.join(PlayerEntity(id=index, username=f"player{index}"))
+    executor.start()
+    return executor
+
+
+@benchmark("wordweaver.session.guess")
+def session_guess(fixtures: Fixtures) -> Callable[[], Any]:
+    # Known words missing a letter keep the letters, so every call takes the same path
+    executor = _executor(fixtures, 4)
+    letters = set(executor.what())
+    misses = [word for word in fixtures.english_words[:50_000] if not letters <= set(word)]
+    words = itertools.cycle(misses[:SAMPLE_SIZE])
+    return lambda: executor.guess(next(words))
+
+
+@benchmark("wordweaver.session.who")
+def session_who(fixtures: Fixtures) -> Callable[[], Any]:
+    return _executor(fixtures, 8).who
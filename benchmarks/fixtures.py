@@ -0,0 +1,271 @@
+import asyncio
+import random
+import sqlite3
+
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from functools import cached_property
+from pathlib import Path
+from typing import Final
+
+import config
+
+from spyfall.database import Database
+from spyfall.dictionary import Dictionary
+from utils.basedir import BASEDIR
+from utils.lexicon import Lexicon, read_pairs
+from wordweaver.adapters.english import EnglishAdapter
+from words_game.work_with_dp import create_tables, get_all_words
+
+
+PLAYERS_PER_GAME: Final[int] = 4
+GAMES_PER_CHAT: Final[int] = 10
+GAMES_PER_USER: Final[int] = 10
+
+
+class Fixtures:
+    """Data shared by the benchmarks, built on first use in ``directory``.
+
+    Databases hold a history of ``games`` finished games spread over chats with
+    ``GAMES_PER_CHAT`` games each, and the last game of every other chat still running.
+    """
+
+    def __init__(self, directory: Path, *, games: int, seed: int = 0) -> None:
+        self.directory = directory
+        self.games = games
+        self.rng = random.Random(seed)
+
+    @property
+    def chats(self) -> int:
+        """Number of chats in the game histories."""
+        return max(1, self.games // GAMES_PER_CHAT)
+
+    @property
+    def users(self) -> int:
+        """Number of users in the game histories."""
+        return max(PLAYERS_PER_GAME, self.games * PLAYERS_PER_GAME // GAMES_PER_USER)
+
+    def chat_id(self, index: int) -> int:
+        """Id of a chat of the histories."""
+        return -1_000_000_000 - index % self.chats
+
+    def user_id(self, index: int) -> int:
+        """Id of a user of the histories."""
+        return 1_000_000 + index % self.users
+
+    def players(self, game_id: int) -> list[int]:
+        """Users who played the game."""
+        first = (game_id - 1) * PLAYERS_PER_GAME
+        return [self.user_id(first + offset) for offset in range(PLAYERS_PER_GAME)]
+
+    def random_game(self, rng: random.Random) -> int:
+        """Id of a random game of the histories."""
+        return rng.randint(1, self.games)
+
+    def random_chat(self, rng: random.Random) -> int:
+        """Id of a random chat of the histories."""
+        return self.chat_id(rng.randrange(self.chats))
+
+    def random_user(self, rng: random.Random) -> int:
+        """Id of a random user of the histories."""
+        return self.user_id(rng.randrange(self.users))
+
+    def random_player(self, rng: random.Random) -> tuple[int, int]:
+        """Random game and one of its players."""
+        game_id = self.random_game(rng)
+        return game_id, rng.choice(self.players(game_id))
+
+    @cached_property
+    def lexicon(self) -> Lexicon:
+        """Lexicon with the dictionaries of every game."""
+        lexicon = Lexicon()
+        lexicon.register("spy", lambda: read_pairs(config.SPYFALL_DICTIONARY_PATH))
+        lexicon.register("speedy_poll", lambda: read_pairs(config.SPEEDY_TRANSLATE_DICTIONARY_PATH))
+        lexicon.register("words", lambda: get_all_words(config.WORDS_GAME_DATABASE_PATH))
+        lexicon.load()
+        return lexicon
+
+    @cached_property
+    def english(self) -> EnglishAdapter:
+        """Full wordweaver lexicon."""
+        return EnglishAdapter(self.lexicon)
+
+    @cached_property
+    def english_words(self) -> list[str]:
+        """Words of the wordweaver lexicon in file order."""
+        path = BASEDIR / "data" / "english.txt"
+        return [word.lower() for word in path.read_text().split()]
+
+    @cached_property
+    def spyfall_database(self) -> Database:
+        """Spyfall database with the game history."""
+        database = Database(str(self.directory / "spy_game.db"))
+        asyncio.run(self._populate_spyfall(database))
+        return database
+
+    @cached_property
+    def spyfall_dictionary(self) -> Dictionary:
+        """Spyfall dictionary of the lexicon."""
+        return Dictionary(self.lexicon)
+
+    @cached_property
+    def words_game_database(self) -> str:
+        """Path of a words_game database with the game history and the dictionary."""
+        path = str(self.directory / "words_game.db")
+        create_tables(path)
+        self._populate_words_game(path)
+        return path
+
+    async def _populate_spyfall(self, database: Database) -> None:
+        await database.init_db()
+        words = list(read_pairs(config.SPYFALL_DICTIONARY_PATH))
+
+        with sqlite3.connect(database.db_path) as connection:
+            started = datetime.now() - timedelta(days=365)
+
+            games, players, votes, player_words = [], [], [], []
+            for game_id in range(1, self.games + 1):
+                chat_id = self.chat_id(game_id - 1)
+                running = game_id > self.games - self.chats and chat_id % 2 == 0
+                start = started + timedelta(minutes=game_id)
+                games.append(
+                    (
+                        game_id,
+                        chat_id,
+                        self.rng.choice(config.SPYFALL_LOCATIONS),
+                        "playing" if running else "finished",
+                        f"poll-{game_id}",
+                        start.strftime("%Y-%m-%d %H:%M:%S"),
+                        start.strftime("%Y-%m-%d %H:%M:%S"),
+                    )
+                )
+
+                members = self.players(game_id)
+                spy = self.rng.choice(members)
+                for user_id in members:
+                    players.append((game_id, user_id, f"user{user_id}", int(user_id == spy)))
+                    votes.append((game_id, user_id, self.rng.choice(members)))
+                    for word, translation in self.rng.sample(words, config.SPYFALL_WORDS_PER_PLAYER):
+                        player_words.append((game_id, user_id, word, translation))
+
+            connection.executemany(
+                """INSERT INTO games (game_id, chat_id, location, status, poll_id,
+                   game_start_time, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                games,
+            )
+            connection.executemany(
+                "INSERT INTO players (game_id, user_id, username, is_spy) VALUES (?, ?, ?, ?)",
+                players,
+            )
+            connection.executemany(
+                "INSERT INTO votes (game_id, voter_id, suspect_id) VALUES (?, ?, ?)", votes
+            )
+            connection.executemany(
+                """INSERT INTO player_words (game_id, user_id, word, translation, used)
+                   VALUES (?, ?, ?, ?, 0)""",
+                player_words,
+            )
+            connection.executemany(
+                """INSERT INTO player_stats (user_id, username, games_played, games_won, rating)
+                   VALUES (?, ?, ?, ?, ?)""",
+                [
+                    (
+                        self.user_id(index),
+                        f"user{self.user_id(index)}",
+                        GAMES_PER_USER,
+                        self.rng.randint(0, GAMES_PER_USER),
+                        self.rng.randint(800, 1200),
+                    )
+                    for index in range(self.users)
+                ],
+            )
+
+    def _populate_words_game(self, path: str) -> None:
+        with sqlite3.connect(path) as connection:
+            connection.execute("ATTACH DATABASE ? AS source", (config.WORDS_GAME_DATABASE_PATH,))
+            connection.execute("INSERT OR IGNORE INTO words SELECT en, ru FROM source.words")
+            connection.commit()
+            connection.execute("DETACH DATABASE source")
+
+            connection.executemany(
+                "INSERT INTO users (tg_id, username) VALUES (?, ?)",
+                [
+                    (self.user_id(index), f"user{self.user_id(index)}")
+                    for index in range(self.users)
+                ],
+            )
+
+            started = datetime.now() - timedelta(days=365)
+            sessions, players = [], []
+            for session_id in range(1, self.games + 1):
+                chat_id = self.chat_id(session_id - 1)
+                running = session_id > self.games - self.chats and chat_id % 2 == 0
+                start = (started + timedelta(minutes=session_id)).strftime("%Y-%m-%d %H:%M:%S")
+                members = self.players(session_id)
+                sessions.append(
+                    (
+                        session_id,
+                        chat_id,
+                        members[0],
+                        "started" if running else "finished",
+                        start,
+                        start,
+                        None if running else start,
+                        self.rng.choice(members),
+                    )
+                )
+                for order, user_id in enumerate(members, start=1):
+                    players.append((session_id, user_id, order, 1))
+
+            connection.executemany(
+                """INSERT INTO game_session (id, chat_id, created_by, session_status, created_at,
+                   started_at, finished_at, last_word_user_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                sessions,
+            )
+            connection.executemany(
+                """INSERT INTO game_players (session_id, user_id, order_join, is_active)
+                   VALUES (?, ?, ?, ?)""",
+                players,
+            )
+
+
+Arguments = Callable[[Fixtures, random.Random], tuple]
+
+# Arguments of every spyfall Database method, drawn from the populated history
+SPYFALL_DATABASE_CALLS: Final[dict[str, Arguments]] = {
+    "create_game": lambda f, rng: (f.random_chat(rng),),
+    "get_game": lambda f, rng: (f.random_game(rng),),
+    "get_active_game": lambda f, rng: (f.random_chat(rng),),
+    "count_active_games": lambda f, rng: (),
+    "start_game": lambda f, rng: (f.random_game(rng), rng.choice(config.SPYFALL_LOCATIONS)),
+    "set_current_player": lambda f, rng: f.random_player(rng),
+    "get_current_player": lambda f, rng: (f.random_game(rng),),
+    "set_target_player": lambda f, rng: f.random_player(rng),
+    "get_target_player": lambda f, rng: (f.random_game(rng),),
+    "clear_target_player": lambda f, rng: (f.random_game(rng),),
+    "set_poll_id": lambda f, rng: (f.random_game(rng), f"poll-{rng.random()}"),
+    "get_game_by_poll_id": lambda f, rng: (f"poll-{f.random_game(rng)}",),
+    "finish_game": lambda f, rng: (f.random_game(rng),),
+    "expire_stale_games": lambda f, rng: (
+        config.SPYFALL_WAITING_TTL,
+        config.SPYFALL_PLAYING_TTL,
+    ),
+    "add_player": lambda f, rng: (*f.random_player(rng), "player"),
+    "set_spy": lambda f, rng: f.random_player(rng),
+    "get_players": lambda f, rng: (f.random_game(rng),),
+    "get_spy": lambda f, rng: (f.random_game(rng),),
+    "is_player_in_game": lambda f, rng: f.random_player(rng),
+    "add_vote": lambda f, rng: (*f.random_player(rng), f.random_user(rng)),
+    "get_votes": lambda f, rng: (f.random_game(rng),),
+    "get_all_voters": lambda f, rng: (f.random_game(rng),),
+    "clear_votes": lambda f, rng: (f.random_game(rng),),
+    "get_player_stats": lambda f, rng: (f.random_user(rng),),
+    "init_player_stats": lambda f, rng: (f.random_user(rng), "player"),
+    "update_player_stats": lambda f, rng: (f.random_user(rng), "player", True, False, 10),
+    "get_leaderboard": lambda f, rng: (10,),
+    "add_player_words": lambda f, rng: (*f.random_player(rng), [("word", "слово")] * 5),
+    "get_player_words": lambda f, rng: f.random_player(rng),
+    "mark_word_used": lambda f, rng: (*f.random_player(rng), "word"),
+    "get_used_words_count": lambda f, rng: f.random_player(rng),
+    "update_bonus_points": lambda f, rng: (f.random_user(rng), config.SPYFALL_WORD_BONUS_POINTS),
+}
@@ -0,0 +1,301 @@
+"""Startup time and memory footprint of the bot, checked against budgets.
+
+Every probe runs in a fresh interpreter with its own databases and a fake Bot API. The startup
+probe times ``python -m master_bot`` up to the point where it would start polling, broken down
+by imported package and by startup hook, then until every mode is warm, and reports the RSS of
+the warm process. The session probes open lobbies in a thousand chats of one mode and report
+how much the RSS grew::
+
+    $ python -m benchmarks.footprint
+    $ python -m benchmarks.footprint --sessions 5000 --modes wordweaver
+    $ python -m benchmarks.footprint --budgets my_budgets.json --json footprint.json
+
+Exits with status 1 when a number goes over its budget in ``benchmarks/footprint_budgets.json``.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import re
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+
+STARTED = time.perf_counter()
+
+BASEDIR = Path(__file__).resolve().parent.parent
+DEFAULT_BUDGETS = Path(__file__).resolve().parent / "footprint_budgets.json"
+SESSION_MODES = ("spy", "words", "wordweaver")
+# Commands that leave a chat of the mode with an open lobby of two players
+LOBBY_COMMANDS = {
+    "spy": ("/newgame", "/join"),
+    "words": ("/newgame", "/join"),
+    "wordweaver": ("/start", "/join"),
+}
+WARMUP_SESSIONS = 100
+IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def rss() -> int:
+    """Resident set size of the process in bytes."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak rather than current RSS, in kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def _boot() -> tuple[Any, Any, Any, dict[str, Any]]:
+    """Import and start the bot like ``master_bot.main`` does, with a fake Bot API."""
+    timings: dict[str, Any] = {"interpreter": time.perf_counter() - STARTED}
+
+    started = time.perf_counter()
+    import master_bot
+
+    timings["import"] = time.perf_counter() - started
+
+    from aiogram import Bot
+
+    from tools.fake_bot_api import FakeBotAPI, FakeSession
+    from utils.dbtrace import DBTRACE
+    from wordweaver.container import CONTAINER
+    from wordweaver.adapters.user import UserAdapter
+    from dependency_injector.providers import Singleton
+
+    CONTAINER.user_adapter.override(
+        Singleton(UserAdapter, path=Path(os.environ["FOOTPRINT_DIRECTORY"]) / "wordweaver.db")
+    )
+
+    started = time.perf_counter()
+    DBTRACE.install()
+    api = FakeBotAPI(history=1)
+    bot = Bot(token="123456:footprint", session=FakeSession(api))
+    dp = master_bot.build_dispatcher(bot)
+    timings["build_dispatcher"] = time.perf_counter() - started
+
+    hooks = {}
+    for router in dp.chain_tail:
+        for handler in router.startup.handlers:
+            name = handler.callback.__qualname__
+            if router is not dp:
+                name = f"{router.name}:{name}"
+            started = time.perf_counter()
+            await handler.call(bot=bot, dispatcher=dp, bots=[bot])
+            hooks[name] = time.perf_counter() - started
+    timings["startup_hooks"] = hooks
+    timings["ready"] = time.perf_counter() - STARTED
+
+    return api, bot, dp, timings
+
+
+async def _shutdown(bot: Any, dp: Any) -> None:
+    await dp.emit_shutdown(bot=bot, dispatcher=dp, bots=[bot])
+    await bot.session.close()
+
+
+async def probe_startup() -> dict[str, Any]:
+    """Timings of a cold start and the RSS of the warm bot."""
+    from utils.warmup import WARMUP
+
+    api, bot, dp, timings = await _boot()
+    await WARMUP.wait_all()
+    timings["warm"] = time.perf_counter() - STARTED
+    timings["warmup"] = dict(WARMUP.durations)
+
+    gc.collect()
+    timings["rss"] = rss()
+    await _shutdown(bot, dp)
+    return timings
+
+
+async def probe_sessions(mode: str, count: int) -> dict[str, Any]:
+    """RSS growth of the warm bot while it opens lobbies in ``count`` chats of the mode."""
+    from chat_modes import CHAT_MODES
+    from utils.warmup import WARMUP
+
+    api, bot, dp, _ = await _boot()
+    await WARMUP.wait_all()
+    host, guest = api.add_user(1, "Host", "host"), api.add_user(2, "Guest", "guest")
+    first, second = LOBBY_COMMANDS[mode]
+
+    async def open_lobbies(chat_ids: range) -> None:
+        for chat_id in chat_ids:
+            api.add_chat(chat_id)
+            CHAT_MODES.set(chat_id, mode)
+            await dp.feed_raw_update(bot, api.text_update(chat_id, host["id"], first))
+            await dp.feed_raw_update(bot, api.text_update(chat_id, guest["id"], second))
+        api.calls.clear()
+        gc.collect()
+
+    # The first lobbies also grow the allocator pools and caches, so they are left out
+    await open_lobbies(range(-1, -1 - WARMUP_SESSIONS, -1))
+    before = rss()
+    await open_lobbies(range(-1 - WARMUP_SESSIONS, -1 - WARMUP_SESSIONS - count, -1))
+    after = rss()
+
+    await _shutdown(bot, dp)
+    return {"mode": mode, "sessions": count, "rss_growth": after - before}
+
+
+def imports_by_package(stderr: str, count: int = 10) -> dict[str, float]:
+    """Self import time in seconds per top-level package from ``-X importtime`` output."""
+    packages: dict[str, float] = defaultdict(float)
+    for line in stderr.splitlines():
+        if match := IMPORT_TIME.match(line):
+            packages[match.group(4).split(".")[0]] += int(match.group(1)) / 1e6
+    return dict(sorted(packages.items(), key=lambda item: -item[1])[:count])
+
+
+def run_probe(directory: Path, *arguments: str) -> tuple[dict[str, Any], str, float]:
+    """Run a probe in a fresh interpreter, return its report, import log and wall time."""
+    env = {
+        **os.environ,
+        "FOOTPRINT_DIRECTORY": str(directory),
+        "SPYFALL_DATABASE_PATH": str(directory / "spy_game.db"),
+        "WORDS_GAME_DATABASE_PATH": str(directory / "words_game.db"),
+        "CHAT_MODES_DATABASE_PATH": str(directory / "chat_modes.db"),
+        "SNAPSHOT_PATH": "",
+        "METRICS_PORT": "0",
+        "TRACE_PATH": "",
+    }
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "benchmarks.footprint", "--probe", *arguments],
+        cwd=BASEDIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    wall = time.perf_counter() - started
+    if process.returncode != 0:
+        raise RuntimeError(f"Probe {' '.join(arguments)} failed:\n{process.stderr[-3000:]}")
+    return json.loads(process.stdout.splitlines()[-1]), process.stderr, wall
+
+
+def measure(*, repeat: int, sessions: int, modes: list[str]) -> dict[str, Any]:
+    """Run the probes in a scratch directory with a copy of the words_game dictionary."""
+    with tempfile.TemporaryDirectory() as name:
+        directory = Path(name)
+        shutil.copyfile(BASEDIR / "words_game" / "words_game.db", directory / "words_game.db")
+
+        # The first start creates the schemas and loads the dictionaries, later ones find them
+        first, _, first_wall = run_probe(directory, "startup")
+        runs = [run_probe(directory, "startup") for _ in range(repeat)]
+        reports = [report for report, _, _ in runs]
+        # The import breakdown is taken from the run with the median wall time
+        report, stderr, wall = sorted(runs, key=lambda run: run[2])[(len(runs) - 1) // 2]
+
+        results: dict[str, Any] = {
+            "first_start": {"wall": first_wall, "warm": first["warm"]},
+            "startup": {
+                "wall": wall,
+                "ready": statistics.median(run["ready"] for run in reports),
+                "warm": statistics.median(run["warm"] for run in reports),
+                "interpreter": report["interpreter"],
+                "import": report["import"],
+                "build_dispatcher": report["build_dispatcher"],
+                "imports_by_package": imports_by_package(stderr),
+                "startup_hooks": report["startup_hooks"],
+                "warmup": report["warmup"],
+            },
+            "rss": statistics.median(run["rss"] for run in reports),
+            "sessions": {},
+        }
+
+        for mode in modes:
+            report, _, _ = run_probe(directory, "sessions", mode, str(sessions))
+            results["sessions"][mode] = report["rss_growth"] * 1000 / sessions
+
+    return results
+
+
+def check(results: dict[str, Any], budgets: dict[str, Any]) -> list[str]:
+    """Numbers over their budgets, described."""
+    startup, failures = results["startup"], []
+    for key in ("ready", "warm"):
+        if (budget := budgets.get(f"{key}_seconds")) is not None and startup[key] > budget:
+            failures.append(f"{key} took {startup[key]:.2f} s, the budget is {budget} s")
+
+    if (budget := budgets.get("rss_mb")) is not None and results["rss"] / 2**20 > budget:
+        failures.append(f"RSS is {results['rss'] / 2**20:.1f} MB, the budget is {budget} MB")
+
+    for mode, growth in results["sessions"].items():
+        budget = budgets.get("mb_per_1000_sessions", {}).get(mode)
+        if budget is not None and growth / 2**20 > budget:
+            failures.append(
+                f"1000 {mode} sessions take {growth / 2**20:.1f} MB, the budget is {budget} MB"
+            )
+    return failures
+
+
+def format_report(results: dict[str, Any]) -> str:
+    """Human readable report."""
+    startup = results["startup"]
+    lines = [
+        f"ready to poll   {startup['ready']:7.2f} s  (process wall {startup['wall']:.2f} s)",
+        f"  interpreter   {startup['interpreter']:7.2f} s",
+        f"  import        {startup['import']:7.2f} s",
+    ]
+    lines += [
+        f"    {package:<16}{seconds:7.2f} s"
+        for package, seconds in startup["imports_by_package"].items()
+    ]
+    lines.append(f"  dispatcher    {startup['build_dispatcher']:7.2f} s")
+    lines += [
+        f"    {hook:<32}{seconds:7.3f} s" for hook, seconds in startup["startup_hooks"].items()
+    ]
+    lines.append(f"all modes warm  {startup['warm']:7.2f} s")
+    lines += [f"    {mode:<16}{seconds:7.2f} s" for mode, seconds in startup["warmup"].items()]
+    lines.append(f"first start     {results['first_start']['warm']:7.2f} s  (creates the schemas)")
+    lines.append(f"warm RSS        {results['rss'] / 2**20:7.1f} MB")
+    for mode, growth in results["sessions"].items():
+        lines.append(f"1000 sessions   {growth / 2**20:7.2f} MB  {mode}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--probe", nargs="+", help=argparse.SUPPRESS)
+    parser.add_argument("--repeat", type=int, default=3, help="startups to take the median of")
+    parser.add_argument("--sessions", type=int, default=1000, help="sessions opened per mode")
+    parser.add_argument("--modes", nargs="+", choices=SESSION_MODES, default=list(SESSION_MODES))
+    parser.add_argument("--budgets", type=Path, default=DEFAULT_BUDGETS)
+    parser.add_argument("--json", type=Path, help="also write the results to a file")
+    args = parser.parse_args()
+
+    if args.probe:
+        kind, *rest = args.probe
+        if kind == "startup":
+            report = asyncio.run(probe_startup())
+        else:
+            report = asyncio.run(probe_sessions(rest[0], int(rest[1])))
+        print(json.dumps(report))
+        return 0
+
+    results = measure(repeat=args.repeat, sessions=args.sessions, modes=args.modes)
+    print(format_report(results))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+    failures = check(results, json.loads(args.budgets.read_text()))
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
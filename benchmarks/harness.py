@@ -0,0 +1,132 @@
+import asyncio
+import inspect
+import json
+import statistics
+import time
+
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Final
+
+
+MIN_ROUND_TIME: Final[float] = 0.1
+ROUNDS: Final[int] = 5
+REGRESSION_THRESHOLD: Final[float] = 0.1
+
+
+@dataclass
+class Benchmark:
+    """Registered benchmark.
+
+    ``factory`` receives the shared fixtures and returns the operation to time, a plain or an
+    async callable without arguments.
+    """
+
+    name: str
+    factory: Callable[[Any], Callable[[], Any]]
+
+
+@dataclass
+class Result:
+    """Timing of a benchmark, per operation in seconds."""
+
+    median: float
+    min: float
+    number: int
+    rounds: int
+
+
+@dataclass
+class Change:
+    """Benchmark result compared to the baseline."""
+
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        """Current time relative to the baseline."""
+        return self.current / self.baseline
+
+    def regressed(self, threshold: float) -> bool:
+        """Check that the benchmark got slower by more than the threshold."""
+        return self.ratio > 1 + threshold
+
+
+REGISTRY: Final[list[Benchmark]] = []
+
+
+def benchmark(name: str) -> Callable:
+    """Register a benchmark factory under the name."""
+
+    def register(factory: Callable[[Any], Callable[[], Any]]) -> Callable:
+        REGISTRY.append(Benchmark(name, factory))
+        return factory
+
+    return register
+
+
+def measure(operation: Callable[[], Any], *, rounds: int = ROUNDS) -> Result:
+    """Time the operation, calibrating the number of calls so a round takes long enough."""
+    if inspect.iscoroutinefunction(operation):
+        return asyncio.run(_measure_async(operation, rounds))
+
+    def run(number: int) -> float:
+        started = time.perf_counter()
+        for _ in range(number):
+            operation()
+        return time.perf_counter() - started
+
+    return _measure(run, rounds)
+
+
+async def _measure_async(operation: Callable[[], Any], rounds: int) -> Result:
+    async def run(number: int) -> float:
+        started = time.perf_counter()
+        for _ in range(number):
+            await operation()
+        return time.perf_counter() - started
+
+    number = 1
+    while (elapsed := await run(number)) < MIN_ROUND_TIME:
+        number = _grow(number, elapsed)
+
+    times = [await run(number) / number for _ in range(rounds)]
+    return Result(statistics.median(times), min(times), number, rounds)
+
+
+def _measure(run: Callable[[int], float], rounds: int) -> Result:
+    number = 1
+    while (elapsed := run(number)) < MIN_ROUND_TIME:
+        number = _grow(number, elapsed)
+
+    times = [run(number) / number for _ in range(rounds)]
+    return Result(statistics.median(times), min(times), number, rounds)
+
+
+def _grow(number: int, elapsed: float) -> int:
+    if elapsed <= 0:
+        return number * 10
+    return max(number * 2, int(number * MIN_ROUND_TIME / elapsed * 1.2))
+
+
+def save(results: dict[str, Result], path: Path) -> None:
+    """Write results as a baseline."""
+    payload = {name: asdict(result) for name, result in sorted(results.items())}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2) + "\n")
+
+
+def load(path: Path) -> dict[str, Result]:
+    """Read a saved baseline."""
+    return {name: Result(**result) for name, result in json.loads(path.read_text()).items()}
+
+
+def format_time(seconds: float) -> str:
+    """Time with a readable unit."""
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
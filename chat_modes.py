@@ -1,13 +1,104 @@
-from typing import Dict
+import asyncio
+import contextlib
+import logging
+
+from typing import Dict, Final, Optional
+
+import aiosqlite
+
+import config
+
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_MODE = "standard"
 
-chat_modes: Dict[int, str] = {}
 
+class ChatModeStore:
+    """Chat modes served from memory and persisted to SQLite write-behind"""
+
+    def __init__(
+        self,
+        db_path: str = config.CHAT_MODES_DATABASE_PATH,
+        flush_interval: float = config.CHAT_MODES_FLUSH_INTERVAL,
+    ):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self._modes: Dict[int, str] = {}
+        self._dirty: Dict[int, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, chat_id: int) -> str:
+        """Get chat mode"""
+        return self._modes.get(chat_id, DEFAULT_MODE)
+
+    def set(self, chat_id: int, mode: str):
+        """Set chat mode, it is persisted on the next flush"""
+        self._modes[chat_id] = mode
+        self._dirty[chat_id] = mode
+
+    async def load(self):
+        """Load all chat modes into memory"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chat_modes (
+                    chat_id INTEGER PRIMARY KEY,
+                    mode TEXT NOT NULL
+                )
+            """
+            )
+            await db.commit()
+
+            async with db.execute("SELECT chat_id, mode FROM chat_modes") as cursor:
+                rows = await cursor.fetchall()
+
+        # Modes set before the load finished are newer than the stored ones
+        self._modes = {**dict(rows), **self._modes}
+        logger.info("Loaded %d chat modes", len(rows))
+
+    async def flush(self):
+        """Persist modes changed since the last flush"""
+        if not self._dirty:
+            return
+
+        dirty, self._dirty = self._dirty, {}
+        flushed = False
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.executemany(
+                    """INSERT INTO chat_modes (chat_id, mode) VALUES (?, ?)
+                       ON CONFLICT(chat_id) DO UPDATE SET mode = excluded.mode""",
+                    dirty.items(),
+                )
+                await db.commit()
+            flushed = True
+        except Exception as e:
+            logger.error(f"Error flushing chat modes: {e}")
+        finally:
+            if not flushed:
+                # Keep the changes for the next flush unless they were overwritten meanwhile
+                self._dirty = {**dirty, **self._dirty}
+
+    async def start(self):
+        """Preload modes and start flushing them in the background"""
+        await self.load()
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the background flush and persist what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
 
-def set_chat_mode(chat_id: int, mode: str):
-    chat_modes[chat_id] = mode
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
 
 
-def get_chat_mode(chat_id: int) -> str:
-    return chat_modes.get(chat_id, DEFAULT_MODE)
+CHAT_MODES: Final[ChatModeStore] = ChatModeStore()
@@ -5,7 +5,7 @@ load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 
-SPYFALL_DATABASE_PATH = "spyfall/spy_game.db"
+SPYFALL_DATABASE_PATH = os.getenv("SPYFALL_DATABASE_PATH", "spyfall/spy_game.db")
 SPYFALL_GAME_DURATION = 300
 SPYFALL_DICTIONARY_PATH = "spyfall/slovarik.txt"
 SPYFALL_WORDS_PER_PLAYER = 5
@@ -33,3 +33,117 @@ SPYFALL_LOCATIONS = [
     "Zoo (Зоопарк)",
     "Police Station (Полицейский участок)",
 ]
+
+SPYFALL_WAITING_TTL = 30 * 60
+SPYFALL_PLAYING_TTL = 60 * 60
+
+WORDS_GAME_DATABASE_PATH = os.getenv("WORDS_GAME_DATABASE_PATH", "words_game/words_game.db")
+WORDS_GAME_WAITING_TTL = 30 * 60
+WORDS_GAME_STARTED_TTL = 10 * 60
+# Word lists imported into an empty words table on startup, CSV with a header or "en ru" lines
+WORDS_GAME_DICTIONARY_PATHS = [
+    path.strip()
+    for path in os.getenv("WORDS_GAME_DICTIONARY_PATHS", SPYFALL_DICTIONARY_PATH).split(",")
+    if path.strip()
+]
+WORDS_GAME_IMPORT_BATCH = 10000
+
+JANITOR_INTERVAL = 60
+JANITOR_NOTIFY_CHATS = True
+
+CHAT_EXECUTOR_IDLE_TIMEOUT = 60
+# Polls whose chat is remembered, so that answers to them are queued with the chat
+CHAT_EXECUTOR_POLL_CACHE = 10000
+
+CHAT_MODES_DATABASE_PATH = os.getenv("CHAT_MODES_DATABASE_PATH", "chat_modes.db")
+CHAT_MODES_FLUSH_INTERVAL = 5
+
+SPEEDY_TRANSLATE_DICTIONARY_PATH = "speedy_translate/dictionary.csv"
+# Direction of new chats: "en" asks English words, "ru" Russian ones, "mixed" either
+SPEEDY_TRANSLATE_DIRECTION = os.getenv("SPEEDY_TRANSLATE_DIRECTION", "en")
+# Answers this many edits away from a translation get partial credit, 0 turns it off
+SPEEDY_TRANSLATE_FUZZY_DISTANCE = int(os.getenv("SPEEDY_TRANSLATE_FUZZY_DISTANCE", "1"))
+SPEEDY_TRANSLATE_FUZZY_MIN_LENGTH = 4
+SPEEDY_TRANSLATE_FUZZY_CREDIT = float(os.getenv("SPEEDY_TRANSLATE_FUZZY_CREDIT", "0.5"))
+# Quiz rounds are polls with the translation and this many wrong options
+SPEEDY_QUIZ_DISTRACTORS = 3
+SPEEDY_QUIZ_OPEN_PERIOD = int(os.getenv("SPEEDY_QUIZ_OPEN_PERIOD", "20"))
+# The quiz stops after this many rounds in a row that nobody answered
+SPEEDY_QUIZ_IDLE_ROUNDS = 3
+
+LEXICON_ENGLISH_PATH = "data/english.txt"
+
+BOT_DELIVERY = os.getenv("BOT_DELIVERY", "polling")
+
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_QUEUE_SIZE = 1000
+# Updates handled at once, including those waiting in the chat executor behind others of their chat
+WEBHOOK_CONCURRENCY = 1000
+
+OUTBOX_RATE = 30
+OUTBOX_BURST = 30
+OUTBOX_CHAT_RATE = 1
+OUTBOX_CHAT_BURST = 3
+OUTBOX_DRAIN_TIMEOUT = 5
+
+BOT_API_SERVER = os.getenv("BOT_API_SERVER", "")
+BOT_API_POOL_LIMIT = 100
+BOT_API_TIMEOUT = 60
+BOT_API_METHOD_TIMEOUTS = {
+    "sendMessage": 10,
+    "editMessageText": 10,
+    "deleteMessage": 10,
+    "sendPoll": 10,
+    "getChatMember": 5,
+    "answerCallbackQuery": 5,
+}
+BOT_API_SINGLEFLIGHT_METHODS = ("getChatMember", "getChat", "getMe")
+
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_LAG_INTERVAL = 0.5
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+DB_SLOW_QUERY_THRESHOLD = 0.05
+DB_QUERY_BUDGET = 20
+DB_REPEAT_LIMIT = 5
+DB_QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+TRACE_PATH = os.getenv("TRACE_PATH", "")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_SLOW_THRESHOLD = float(os.getenv("TRACE_SLOW_THRESHOLD", "1.0"))
+TRACE_LINGER = 30
+
+ADMIN_IDS = {int(user_id) for user_id in os.getenv("ADMIN_IDS", "").split(",") if user_id.strip()}
+
+PROFILER_INTERVAL = 0.005
+PROFILER_DEFAULT_SECONDS = 10
+PROFILER_MAX_SECONDS = 60
+PROFILER_TOP = 15
+
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "0"))
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", "-1"))
+SHARD_FD = int(os.getenv("SHARD_FD", "-1"))
+SHARD_POLL_CACHE = 10000
+SHARD_READY_TIMEOUT = 60
+SHARD_STOP_TIMEOUT = 30
+
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "snapshot.json")
+SNAPSHOT_INTERVAL = 10
+SNAPSHOT_MAX_AGE = 10 * 60
+
+WARMUP_PREWARM = os.getenv("WARMUP_PREWARM", "1") != "0"
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+# Share of debug and info records kept per logger, like "spyfall.handlers=0.1,words_game=0.5"
+LOG_SAMPLING = {
+    name.strip(): float(rate)
+    for name, _, rate in (rule.partition("=") for rule in os.getenv("LOG_SAMPLING", "").split(","))
+    if name.strip()
+}
+LOG_QUEUE_SIZE = 10000
@@ -1,12 +1,15 @@
 from aiogram.filters import BaseFilter
 from aiogram.types import Message
 
-from chat_modes import get_chat_mode
+from chat_modes import CHAT_MODES
 
 
 class ModeFilter(BaseFilter):
     def __init__(self, mode_name: str) -> None:
         self.mode_name = mode_name
 
-    async def __call__(self, message: Message) -> bool:
-        return get_chat_mode(message.chat.id) == self.mode_name
+    async def __call__(self, message: Message, chat_mode: str | None = None) -> bool:
+        # Routers dispatched by ModeRouter already know the chat mode
+        if chat_mode is None:
+            chat_mode = CHAT_MODES.get(message.chat.id)
+        return chat_mode == self.mode_name
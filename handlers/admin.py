@@ -0,0 +1,58 @@
+import asyncio
+import logging
+import time
+
+from aiogram import F, Router, html, types
+from aiogram.filters import Command, CommandObject
+from aiogram.types import BufferedInputFile
+
+import config
+from utils.profiler import PROFILER
+
+
+logger = logging.getLogger(__name__)
+
+router = Router(name="admin")
+router.message.filter(F.from_user.id.in_(config.ADMIN_IDS))
+background_tasks = set()
+
+
+async def send_profile(message: types.Message, seconds: float):
+    try:
+        profile = await PROFILER.profile(seconds)
+    except RuntimeError as e:
+        await message.answer(str(e))
+        return
+
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    await message.answer_document(
+        BufferedInputFile(profile.collapsed().encode(), filename=f"profile-{stamp}.folded"),
+        caption="Collapsed stacks for flamegraph.pl or speedscope",
+    )
+    await message.answer(f"<pre>{html.quote(profile.summary())}</pre>", parse_mode="HTML")
+
+
+def _log_failure(task: asyncio.Task):
+    background_tasks.discard(task)
+    if not task.cancelled() and (exception := task.exception()):
+        logger.error(f"Failed to send the profile: {exception}")
+
+
+@router.message(Command("profile"))
+async def cmd_profile(message: types.Message, command: CommandObject):
+    try:
+        seconds = float(command.args) if command.args else config.PROFILER_DEFAULT_SECONDS
+    except ValueError:
+        await message.answer("Usage: /profile [seconds]")
+        return
+    seconds = min(max(seconds, 1), config.PROFILER_MAX_SECONDS)
+
+    if PROFILER.running:
+        await message.answer("A profile is already being taken, try again later.")
+        return
+
+    await message.answer(f"Profiling for {seconds:g} s...")
+    # Profiling in the background keeps the chat queue free for the other updates of the chat
+    task = asyncio.create_task(send_profile(message, seconds))
+    background_tasks.add(task)
+    task.add_done_callback(_log_failure)
@@ -0,0 +1,59 @@
+import functools
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import TelegramObject
+
+from chat_modes import CHAT_MODES
+from utils.logs import LOG_CONTEXT
+from utils.warmup import WARMUP
+
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+class ModeRouter(Router):
+    """Router that hands every update straight to the router of the chat mode.
+
+    The chat mode is looked up once per update and passed down as ``chat_mode``, so the cost of
+    routing doesn't grow with the number of game modes. Updates without a chat (poll answers)
+    are offered to every mode router in registration order. An update waits until its mode has
+    warmed up, so updates that come early are delayed rather than lost.
+
+    Routing is an outer middleware of the router's own observers that propagates the update to
+    the mode router, so it relies on public aiogram API only.
+    """
+
+    def __init__(self, *, name: str | None = None) -> None:
+        super().__init__(name=name)
+        self._routers: dict[str, Router] = {}
+        for update_type, observer in self.observers.items():
+            observer.outer_middleware(functools.partial(self._route, update_type))
+
+    def register(self, mode: str, router: Router) -> Router:
+        """Attach the router that handles chats in the given mode."""
+        self._routers[mode] = router
+        return self.include_router(router)
+
+    async def _route(
+        self, update_type: str, handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:
+        chat = data.get("event_chat")
+        if chat is None:
+            await WARMUP.wait_all()
+            return await handler(event, data)
+
+        mode = CHAT_MODES.get(chat.id)
+        router = self._routers.get(mode)
+        if router is None:
+            return UNHANDLED
+
+        if context := LOG_CONTEXT.get():
+            context.mode = mode
+        await WARMUP.wait(mode)
+        return await router.propagate_event(
+            update_type=update_type, event=event, **{**data, "chat_mode": mode}
+        )
@@ -2,10 +2,10 @@ from aiogram import F, Router, types
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 
-from chat_modes import DEFAULT_MODE, get_chat_mode, set_chat_mode
+from chat_modes import CHAT_MODES, DEFAULT_MODE
 
 
-router = Router()
+router = Router(name="mode_switch")
 
 
 def _get_mode_keyboard(current_mode: str) -> InlineKeyboardMarkup:
@@ -45,7 +45,7 @@ def _get_mode_keyboard(current_mode: str) -> InlineKeyboardMarkup:
 
 @router.message(Command("mode"))
 async def choose_mode(message: types.Message):
-    current_mode = get_chat_mode(message.chat.id)
+    current_mode = CHAT_MODES.get(message.chat.id)
     await message.answer(
         "Choose a mode:",
         reply_markup=_get_mode_keyboard(current_mode),
@@ -55,7 +55,7 @@ async def choose_mode(message: types.Message):
 @router.callback_query(F.data.startswith("mode_"))
 async def set_mode(callback: CallbackQuery):
     mode = callback.data.replace("mode_", "")
-    set_chat_mode(callback.message.chat.id, mode)
+    CHAT_MODES.set(callback.message.chat.id, mode)
 
     await callback.message.edit_text(
         "✅ Chat mode updated!",
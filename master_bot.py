@@ -1,32 +1,120 @@
 import asyncio
-import logging
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
 import config
-from handlers import mode_switch
+from chat_modes import CHAT_MODES, DEFAULT_MODE
+from handlers import admin, mode_switch
+from handlers.mode_dispatch import ModeRouter
 import spyfall
 import speedy_translate
 import words_game
 import standard_mode
 import wordweaver
+from middlewares.chat_executor import ChatExecutorMiddleware, PollTracker
+from middlewares.logs import LogContextMiddleware
+from middlewares.metrics import MetricsMiddleware
+from middlewares.tracing import TracingMiddleware
+from utils.bot_session import TunedSession
+from utils.dbtrace import DBTRACE
+from utils.janitor import JANITOR
+from utils.logs import LOGS
+from utils.metrics import METRICS
+from utils.outbox import OUTBOX
+from utils.sharding import ShardFront, run_worker
+from utils.snapshot import SNAPSHOT
+from utils.tracing import TRACER
+from utils.warmup import WARMUP
+from utils.webhook import run_webhook
 
 
-async def main():
-    logging.basicConfig(level=logging.INFO)
-
-    bot = Bot(token=config.BOT_TOKEN)
+def build_dispatcher(bot: Bot) -> Dispatcher:
     dp = Dispatcher(storage=MemoryStorage())
+    LogContextMiddleware().setup(dp)
+    TracingMiddleware().setup(dp)
+    executor = ChatExecutorMiddleware()
+    dp.update.outer_middleware(executor)
+    bot.session.middleware(PollTracker(executor))
+    # Registered after the executor, so latency covers handling and not the wait in the chat queue
+    MetricsMiddleware().setup(dp)
+    METRICS.gauge("bot_active_chats", "Chats with a live update worker.").track(
+        function=lambda: executor.active_chats
+    )
+    METRICS.gauge("bot_outbox_pending", "Messages waiting in the outbox.").track(
+        function=lambda: OUTBOX.pending
+    )
 
+    modes = ModeRouter(name="modes")
+    modes.register(DEFAULT_MODE, standard_mode.get_router())
+    modes.register("speedy_poll", speedy_translate.get_router())
+    modes.register("words", words_game.get_router(bot))
+    modes.register("spy", spyfall.get_router(bot))
+    modes.register("wordweaver", wordweaver.router)
+
+    dp.include_router(admin.router)
     dp.include_router(mode_switch.router)
-    dp.include_router(standard_mode.get_router())
-    dp.include_router(speedy_translate.get_router())
-    dp.include_router(words_game.get_router(bot))
-    dp.include_router(spyfall.get_router(bot))
-    dp.include_router(wordweaver.router)
+    dp.include_router(modes)
+
+    dp.startup.register(CHAT_MODES.start)
+    dp.startup.register(OUTBOX.start)
+    dp.startup.register(JANITOR.start)
+    dp.startup.register(METRICS.start)
+    dp.startup.register(SNAPSHOT.start)
+    # Modes warm up in the background, so polling starts without waiting for them
+    dp.startup.register(WARMUP.start)
+    dp.shutdown.register(WARMUP.stop)
+    dp.shutdown.register(METRICS.stop)
+    dp.shutdown.register(JANITOR.stop)
+    dp.shutdown.register(OUTBOX.stop)
+    dp.shutdown.register(CHAT_MODES.stop)
+    # Taken last, so that timers which fired while the outbox drained are not replayed
+    dp.shutdown.register(SNAPSHOT.stop)
+
+    return dp
+
+
+async def run_front(bot: Bot) -> None:
+    """Receive updates and spread them over the shard worker processes."""
+    dp = Dispatcher()
+    front = ShardFront()
+    front.setup(dp)
+    dp.startup.register(METRICS.start)
+    dp.shutdown.register(METRICS.stop)
+    await front.start()
+    try:
+        if config.BOT_DELIVERY == "webhook":
+            await run_webhook(dp, bot, allowed_updates=front.update_types)
+        else:
+            await dp.start_polling(bot, allowed_updates=front.update_types)
+    finally:
+        await front.stop()
+
+
+async def main():
+    DBTRACE.install()
+
+    session = TunedSession()
+    session.stats.export(METRICS)
+    bot = Bot(token=config.BOT_TOKEN, session=session)
+
+    if config.SHARD_WORKERS and config.SHARD_INDEX < 0:
+        await run_front(bot)
+        return
+
+    dp = build_dispatcher(bot)
 
-    await dp.start_polling(bot)
+    if config.SHARD_INDEX >= 0:
+        await run_worker(dp, bot)
+    elif config.BOT_DELIVERY == "webhook":
+        await run_webhook(dp, bot)
+    else:
+        await dp.start_polling(bot)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    LOGS.install()
+    try:
+        asyncio.run(main())
+    finally:
+        TRACER.flush()
+        LOGS.close()
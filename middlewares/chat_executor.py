@@ -0,0 +1,134 @@
+import asyncio
+import contextvars
+
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import SendPoll, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import Message, TelegramObject
+
+import config
+
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+class ChatExecutorMiddleware(BaseMiddleware):
+    """Serializes updates per chat.
+
+    Every chat gets its own queue and worker task, so updates of one chat are handled strictly in
+    arrival order while different chats are handled concurrently. A worker that has been idle for
+    ``idle_timeout`` seconds is reaped and recreated on the next update of its chat.
+
+    Poll answers carry no chat, so the chats of the polls the bot sends are remembered through
+    :class:`PollTracker` and answers to them are queued with the other updates of that chat.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = config.CHAT_EXECUTOR_IDLE_TIMEOUT,
+        poll_cache: int = config.CHAT_EXECUTOR_POLL_CACHE,
+    ) -> None:
+        self.idle_timeout = idle_timeout
+        self.poll_cache = poll_cache
+        self._queues: dict[Hashable, asyncio.Queue] = {}
+        self._workers: set[asyncio.Task] = set()
+        self._polls: OrderedDict[str, int] = OrderedDict()
+
+    async def __call__(
+        self,
+        handler: Handler,
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        key = self.resolve_key(event, data)
+        if key is None:
+            return await handler(event, data)
+
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = asyncio.Queue()
+            worker = asyncio.create_task(self._work(key, queue))
+            self._workers.add(worker)
+            worker.add_done_callback(self._workers.discard)
+
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((handler, event, data, contextvars.copy_context(), future))
+        return await future
+
+    def resolve_key(self, event: TelegramObject, data: dict[str, Any]) -> Hashable | None:
+        """Chat the update belongs to, the chat of the poll for poll answers, or the sender."""
+        if chat := data.get("event_chat"):
+            return chat.id
+        poll_answer = getattr(event, "poll_answer", None)
+        if poll_answer is not None and poll_answer.poll_id in self._polls:
+            return self._polls[poll_answer.poll_id]
+        if user := data.get("event_from_user"):
+            return ("user", user.id)
+        return None
+
+    def remember_poll(self, poll_id: str, chat_id: int) -> None:
+        """Queue answers to the poll with the updates of the chat it was sent to."""
+        self._polls[poll_id] = chat_id
+        while len(self._polls) > self.poll_cache:
+            self._polls.popitem(last=False)
+
+    @property
+    def active_chats(self) -> int:
+        """Number of chats with a live worker."""
+        return len(self._queues)
+
+    async def _work(self, key: Hashable, queue: asyncio.Queue) -> None:
+        while True:
+            try:
+                async with asyncio.timeout(self.idle_timeout):
+                    handler, event, data, context, future = await queue.get()
+            except TimeoutError:
+                # Nothing is awaited between this check and the removal, so no update can sneak
+                # into a queue that is about to be dropped
+                if queue.empty():
+                    del self._queues[key]
+                    return
+                continue
+
+            if future.cancelled():
+                continue
+
+            # The handler runs in the context of the update that produced it, so context
+            # variables set by outer middlewares stay visible inside the handler
+            task = asyncio.create_task(handler(event, data), context=context)
+            await asyncio.wait((task,))
+
+            if future.cancelled():
+                continue
+            if task.cancelled():
+                future.cancel()
+            elif exception := task.exception():
+                future.set_exception(exception)
+            else:
+                future.set_result(task.result())
+
+
+class PollTracker(BaseRequestMiddleware):
+    """Tells the chat executor which chat a poll was sent to."""
+
+    def __init__(self, executor: ChatExecutorMiddleware) -> None:
+        self.executor = executor
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Any:
+        result = await make_request(bot, method)
+        if isinstance(method, SendPoll) and isinstance(result, Message) and result.poll:
+            self.executor.remember_poll(result.poll.id, result.chat.id)
+        return result
@@ -0,0 +1,38 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject, Update
+
+from utils.logs import LOG_CONTEXT, LogContext
+
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """Attaches the update id and chat to the records logged while an update is handled.
+
+    It has to run before the chat executor, which hands the context over to the chat worker.
+    The mode is filled in by the mode router once it is known.
+    """
+
+    def setup(self, dp: Dispatcher) -> None:
+        """Register the middleware on the dispatcher."""
+        dp.update.outer_middleware(self)
+
+    async def __call__(
+        self,
+        handler: Handler,
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        chat = data.get("event_chat")
+        token = LOG_CONTEXT.set(LogContext(event.update_id, chat.id if chat else None))
+        try:
+            return await handler(event, data)
+        finally:
+            LOG_CONTEXT.reset(token)
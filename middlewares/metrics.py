@@ -0,0 +1,99 @@
+import time
+
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Final
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject
+
+import config
+
+from utils.dbtrace import DBTRACE
+from utils.metrics import METRICS
+
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+UNHANDLED: Final[str] = "unhandled"
+
+UPDATES = METRICS.counter(
+    "bot_updates", "Updates handled per router and handler.", ("router", "handler")
+)
+ERRORS = METRICS.counter(
+    "bot_update_errors",
+    "Updates whose handler raised, per router and handler.",
+    ("router", "handler"),
+)
+LATENCY = METRICS.histogram(
+    "bot_update_duration_seconds",
+    "Time spent handling an update per router and handler.",
+    ("router", "handler"),
+)
+QUERIES = METRICS.histogram(
+    "bot_update_db_queries",
+    "SQL statements executed while handling an update per router and handler.",
+    ("router", "handler"),
+    buckets=config.DB_QUERY_BUCKETS,
+)
+
+
+def handler_route(data: dict[str, Any]) -> tuple[str, str]:
+    """Router and handler names of the handler about to take the event."""
+    router = data.get("event_router")
+    callback = data["handler"].callback
+    return (
+        router.name if router else UNHANDLED,
+        getattr(callback, "__name__", type(callback).__name__),
+    )
+
+
+@dataclass
+class Route:
+    """Router and handler that took the update, filled in on the way down."""
+
+    router: str = UNHANDLED
+    handler: str = UNHANDLED
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Records the count, errors, latency and SQL statements of updates per router and handler.
+
+    It wraps updates as an outer middleware, and a companion inner middleware on every event
+    observer names the router and handler the update reached. Inner middlewares of the dispatcher
+    apply to the handlers of all nested routers, so one registration covers every mode.
+    """
+
+    def setup(self, dp: Dispatcher) -> None:
+        """Register the middleware on the dispatcher."""
+        dp.update.outer_middleware(self)
+        for name, observer in dp.observers.items():
+            if name != "update":
+                observer.middleware(self.resolve)
+
+    async def __call__(
+        self,
+        handler: Handler,
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        route = data["metrics_route"] = Route()
+        started = time.perf_counter()
+        with DBTRACE.track(getattr(event, "update_id", None)) as queries:
+            try:
+                return await handler(event, data)
+            except Exception:
+                ERRORS.inc(route.router, route.handler)
+                raise
+            finally:
+                UPDATES.inc(route.router, route.handler)
+                LATENCY.observe(time.perf_counter() - started, route.router, route.handler)
+                QUERIES.observe(queries.count, route.router, route.handler)
+                DBTRACE.check(queries, f"{route.router}.{route.handler}")
+
+    @staticmethod
+    async def resolve(handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        """Name the router and handler of the update."""
+        if route := data.get("metrics_route"):
+            route.router, route.handler = handler_route(data)
+        return await handler(event, data)
@@ -0,0 +1,54 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject, Update
+
+from middlewares.metrics import handler_route
+from utils.tracing import TRACER
+
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+class TracingMiddleware(BaseMiddleware):
+    """Opens a trace for every update and a span for the handler that takes it.
+
+    It has to be the first outer middleware of updates, so the root span starts when the update
+    is received and covers the wait in the chat queue as well.
+    """
+
+    def setup(self, dp: Dispatcher) -> None:
+        """Register the middleware on the dispatcher."""
+        dp.update.outer_middleware(self)
+        for name, observer in dp.observers.items():
+            if name != "update":
+                observer.middleware(self.handler_span)
+
+    async def __call__(
+        self,
+        handler: Handler,
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if not TRACER.enabled or not isinstance(event, Update):
+            return await handler(event, data)
+
+        attributes = {"update_id": event.update_id}
+        if chat := data.get("event_chat"):
+            attributes["chat_id"] = chat.id
+        if user := data.get("event_from_user"):
+            attributes["user_id"] = user.id
+
+        with TRACER.trace(f"update {event.event_type}", **attributes):
+            return await handler(event, data)
+
+    @staticmethod
+    async def handler_span(handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        """Time the handler of the event."""
+        if not TRACER.recording:
+            return await handler(event, data)
+
+        router, name = handler_route(data)
+        with TRACER.span(f"handler {router}.{name}", chat_mode=data.get("chat_mode")):
+            return await handler(event, data)
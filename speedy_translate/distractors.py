@@ -0,0 +1,128 @@
+import itertools
+import random
+
+from collections.abc import Collection, Iterable, Iterator
+
+from utils.lexicon import Pair, normalize, variants
+
+
+# Russian endings of verbs and adjectives, English words get the part of speech of their translation
+ENDINGS = {
+    "verb": ("ться", "ть", "ти", "чь"),
+    "adjective": ("ый", "ий", "ой", "ая", "яя", "ое", "ее"),
+}
+
+
+def part_of_speech(russian: str) -> str | None:
+    """Part of speech guessed from the ending of a Russian word, None when it isn't known."""
+    word = normalize(russian).split(" ", 1)[0]
+    for part, endings in ENDINGS.items():
+        if word.endswith(endings):
+            return part
+    return None
+
+
+class DistractorIndex:
+    """Wrong options of a quiz, precomputed for every word of a dictionary.
+
+    Words are bucketed by part of speech, length band and their first or last two letters. Every
+    word keeps up to ``size`` other words, those sharing a prefix or a suffix first, then those of
+    the same part of speech and length, then of a similar length. Picking the options of a round
+    only samples from the word's candidates, topped up with random words when too few of them are
+    left.
+    """
+
+    def __init__(self, pairs: Iterable[Pair], *, russian: bool, size: int = 12) -> None:
+        self.size = size
+        entries: dict[str, str | None] = {}
+        seen: set[str] = set()
+        for english, translation in pairs:
+            word = translation if russian else english
+            if normalize(word) not in seen:
+                seen.add(normalize(word))
+                entries[word] = part_of_speech(translation)
+
+        words = list(entries)
+        self._words = tuple(words)
+        # Buckets are filled in random order, so words of big buckets don't all get the same few
+        random.shuffle(words)
+        buckets: dict[tuple, list[str]] = {}
+        for word in words:
+            for key in self._keys(word, entries[word]):
+                buckets.setdefault(key, []).append(word)
+
+        self._candidates: dict[str, tuple[str, ...]] = {}
+        for word in words:
+            band = self._band(word)
+            part = entries[word]
+            tiers = (
+                buckets.get((part, band, "prefix", word[:2]), ()),
+                buckets.get((part, band, "suffix", word[-2:]), ()),
+                buckets.get((part, band), ()),
+                buckets.get((band,), ()),
+                buckets.get((band - 1,), ()),
+                buckets.get((band + 1,), ()),
+            )
+            candidates: dict[str, None] = {}
+            for other in itertools.chain(*tiers):
+                if len(candidates) == size:
+                    break
+                if other != word:
+                    candidates[other] = None
+            self._candidates[word] = tuple(candidates)
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    def candidates(self, word: str) -> tuple[str, ...]:
+        """Precomputed wrong options of the word, most similar first."""
+        return self._candidates.get(word, ())
+
+    def pick(self, word: str, count: int, exclude: Collection[str] = ()) -> list[str]:
+        """Random wrong options of the word, skipping those with a variant in ``exclude``.
+
+        Options sharing a variant with the word are skipped too, so ``оставить, покинуть`` is
+        never offered against ``покинуть``. Fewer options only come back when the dictionary runs
+        out of words.
+        """
+        taken = {*exclude, *self._forms(word)}
+        options = [
+            candidate
+            for candidate in self.candidates(word)
+            if taken.isdisjoint(self._forms(candidate))
+        ]
+        picked = random.sample(options, min(count, len(options)))
+        taken.update(form for option in picked for form in self._forms(option))
+        for other in self._fillers(count - len(picked)):
+            if len(picked) == count:
+                break
+            if taken.isdisjoint(forms := self._forms(other)):
+                picked.append(other)
+                taken.update(forms)
+        return picked
+
+    def _fillers(self, missing: int) -> Iterator[str]:
+        # A few random tries are enough for a real dictionary, a tiny one is scanned in the end
+        if missing <= 0 or not self._words:
+            return
+        for _ in range(missing * 10):
+            yield random.choice(self._words)
+        yield from random.sample(self._words, len(self._words))
+
+    @staticmethod
+    def _forms(word: str) -> set[str]:
+        return {normalize(word), *variants(word)}
+
+    @staticmethod
+    def _band(word: str) -> int:
+        return len(word) // 3
+
+    @classmethod
+    def _keys(cls, word: str, part: str | None) -> list[tuple]:
+        band = cls._band(word)
+        return [
+            (part, band, "prefix", word[:2]),
+            (part, band, "suffix", word[-2:]),
+            (part, band),
+            (band,),
+        ]
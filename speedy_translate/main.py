@@ -1,82 +1,328 @@
-import csv
+import asyncio
+import functools
 import random
+import time
 
 from collections import defaultdict
 
-from aiogram import F, Router
-from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram import Bot, F, Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message, PollAnswer
+
+import config
 
 from filter import ModeFilter
+from utils.lexicon import LEXICON, normalize, read_pairs, variants
+from utils.metrics import ACTIVE_SESSIONS, SCHEDULED_TIMERS
+from utils.outbox import OUTBOX, Priority
+from utils.snapshot import SNAPSHOT, remaining
+from utils.warmup import WARMUP
+
+from .distractors import DistractorIndex
 
 
-dictionary = []
 current_word = None
-current_answers = []
+current_answers = set()
 game_active = False
 scores = defaultdict(int)
 chat_id = None
+directions = {}
+quiz = False
+current_poll = None
+idle_rounds = 0
+distractors = {}
+timers = set()
+# First names of the players, taken from their updates so that standings need no API calls
+names = {}
 
 MODE_NAME = "speedy_poll"
+DIRECTIONS = {"en": "English → Russian", "ru": "Russian → English", "mixed": "mixed"}
+
 
+def answers_for(word):
+    # Translations from the other games' dictionaries are accepted as well
+    if word.get("direction") == "ru":
+        english = {word["eng"]}
+        for variant in variants(word["rus"]):
+            english.update(LEXICON.english_for(variant))
+        return {normalize(answer) for answer in english}
+    return {variant for russian in LEXICON.translate(word["eng"]) for variant in variants(russian)}
 
-def load_dictionary():
-    global dictionary
-    with open("speedy_translate/dictionary.csv", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        next(reader)
-        dictionary = [{"eng": row[0].strip(), "rus": row[1].strip()} for row in reader]
+
+def question(word):
+    return word["rus"] if word.get("direction") == "ru" else word["eng"]
 
 
 def new_round():
     global current_word, current_answers
-    current_word = random.choice(dictionary)
-    current_answers = [d["rus"] for d in dictionary if d["eng"] == current_word["eng"]]
+    [(eng, rus)] = LEXICON.sample(1, MODE_NAME)
+    direction = directions.get(chat_id, config.SPEEDY_TRANSLATE_DIRECTION)
+    if direction == "mixed":
+        direction = random.choice(("en", "ru"))
+    current_word = {"eng": eng, "rus": rus, "direction": direction}
+    current_answers = answers_for(current_word)
+
+
+def build_distractors():
+    pairs = LEXICON.pairs(MODE_NAME)
+    distractors["en"] = DistractorIndex(pairs, russian=True)
+    distractors["ru"] = DistractorIndex(pairs, russian=False)
+
+
+def quiz_options():
+    # The options answer the question, so English words are answered with Russian ones
+    direction = current_word["direction"]
+    correct = current_word["eng"] if direction == "ru" else current_word["rus"]
+    options = distractors[direction].pick(
+        correct, config.SPEEDY_QUIZ_DISTRACTORS, exclude=current_answers
+    )
+    correct_option_id = random.randint(0, len(options))
+    options.insert(correct_option_id, correct)
+    return options, correct_option_id
+
+
+async def send_quiz_round(bot):
+    global current_poll
+    new_round()
+    word = current_word
+    options, correct_option_id = quiz_options()
+    message = await bot.send_poll(
+        chat_id,
+        f"Translate: {question(current_word)}",
+        options,
+        type="quiz",
+        is_anonymous=False,
+        correct_option_id=correct_option_id,
+        open_period=config.SPEEDY_QUIZ_OPEN_PERIOD,
+    )
+    # The quiz may have been stopped or restarted while the poll was on its way
+    if not game_active or current_word is not word:
+        return
+    current_poll = {
+        "id": message.poll.id,
+        "correct_option_id": correct_option_id,
+        "deadline": time.time() + config.SPEEDY_QUIZ_OPEN_PERIOD,
+    }
+    schedule_timeout(bot, message.poll.id, config.SPEEDY_QUIZ_OPEN_PERIOD)
+
+
+def schedule_timeout(bot, poll_id, delay):
+    task = asyncio.create_task(quiz_timeout(bot, poll_id, delay))
+    timers.add(task)
+    task.add_done_callback(timers.discard)
+
+
+def cancel_timers():
+    for task in list(timers):
+        task.cancel()
+
+
+async def quiz_timeout(bot, poll_id, delay):
+    global game_active, current_poll, idle_rounds
+    await asyncio.sleep(delay)
+    # The poll has been answered, or the game stopped, in the meantime
+    if not game_active or current_poll is None or current_poll["id"] != poll_id:
+        return
+
+    # The state changes before anything is awaited, so votes and /stop see the round as over
+    current_poll = None
+    idle_rounds += 1
+    word = current_word
+    if idle_rounds >= config.SPEEDY_QUIZ_IDLE_ROUNDS:
+        game_active = False
+        await OUTBOX.send(
+            bot,
+            chat_id,
+            "Nobody has answered for a while, the quiz is over.\n\n"
+            f"<b>Leaderboard:</b>\n{standings() or 'Nobody earned any points.'}",
+            priority=Priority.HIGH,
+            parse_mode="HTML",
+        )
+        return
+
+    await OUTBOX.send(
+        bot,
+        chat_id,
+        f"⌛ Time is up! <b>{word['eng']}</b> — <b>{word['rus']}</b>",
+        priority=Priority.HIGH,
+        parse_mode="HTML",
+    )
+    await next_quiz_round(bot, word)
+
+
+async def next_quiz_round(bot, word):
+    # A /stop, a restart or another round may have come in while the result was sent
+    if game_active and quiz and current_poll is None and current_word is word:
+        await send_quiz_round(bot)
+
+
+def standings():
+    return "\n".join(
+        f"{names.get(uid, f'Player {uid}')}: {score:g}"
+        for uid, score in sorted(scores.items(), key=lambda x: -x[1])
+    )
+
+
+async def is_current_poll(poll_answer):
+    return current_poll is not None and poll_answer.poll_id == current_poll["id"]
+
+
+def answer_credit(text):
+    answer = normalize(text)
+    if answer in current_answers:
+        return 1
+    distance = config.SPEEDY_TRANSLATE_FUZZY_DISTANCE
+    if not distance or len(answer) < config.SPEEDY_TRANSLATE_FUZZY_MIN_LENGTH:
+        return 0
+    # A real word that is not the answer is wrong rather than a typo of it
+    if LEXICON.is_answer(answer):
+        return 0
+    if any(word in current_answers for word in LEXICON.near(answer, distance)):
+        return config.SPEEDY_TRANSLATE_FUZZY_CREDIT
+    return 0
+
+
+def dump_game():
+    if not game_active:
+        return None
+    return {
+        "chat_id": chat_id,
+        "current_word": current_word,
+        "current_answers": sorted(current_answers),
+        "scores": list(scores.items()),
+        "quiz": quiz,
+        "current_poll": current_poll,
+        "idle_rounds": idle_rounds,
+        "names": [[uid, names[uid]] for uid in scores if uid in names],
+    }
+
+
+async def restore_game(game, bot):
+    global game_active, scores, chat_id, current_word, current_answers
+    global quiz, current_poll, idle_rounds
+    if game is None or game_active:
+        return 0
+
+    game_active = True
+    chat_id = game["chat_id"]
+    current_word = game["current_word"]
+    current_answers = {normalize(answer) for answer in game["current_answers"]}
+    scores = defaultdict(int, game["scores"])
+    names.update(game.get("names", ()))
+    quiz = game.get("quiz", False)
+    current_poll = game.get("current_poll")
+    idle_rounds = game.get("idle_rounds", 0)
+    if quiz and current_poll is not None:
+        schedule_timeout(bot, current_poll["id"], remaining(current_poll["deadline"]))
+    elif quiz:
+        await send_quiz_round(bot)
+    return 1
 
 
 def get_router() -> Router:
-    router = Router()
+    router = Router(name=MODE_NAME)
     router.message.filter(ModeFilter("speedy_poll"))
+    ACTIVE_SESSIONS.track(MODE_NAME, function=lambda: int(game_active))
+    SCHEDULED_TIMERS.track(MODE_NAME, function=lambda: len(timers))
+    SNAPSHOT.register(MODE_NAME, dump_game, restore_game)
+    LEXICON.register(
+        MODE_NAME, functools.partial(read_pairs, config.SPEEDY_TRANSLATE_DICTIONARY_PATH)
+    )
+    WARMUP.register(MODE_NAME, LEXICON.load)
+    WARMUP.register(MODE_NAME, build_distractors)
 
     @router.message(Command("start"))
     async def start_game(message: Message):
-        global game_active, scores, chat_id
+        global game_active, scores, chat_id, quiz
         if game_active:
             await message.reply("The game is already running!")
             return
 
-        load_dictionary()
         game_active = True
+        quiz = False
         scores = defaultdict(int)
         chat_id = message.chat.id
         new_round()
 
         await message.answer(
-            f"The game has started!\nTranslate the word: <b>{current_word['eng']}</b>",
+            f"The game has started!\nTranslate the word: <b>{question(current_word)}</b>",
             parse_mode="HTML",
         )
 
+    @router.message(Command("quiz"))
+    async def start_quiz(message: Message):
+        global game_active, scores, chat_id, quiz, idle_rounds
+        if game_active:
+            await message.reply("The game is already running!")
+            return
+
+        game_active = True
+        quiz = True
+        idle_rounds = 0
+        scores = defaultdict(int)
+        chat_id = message.chat.id
+
+        await message.answer("The quiz has started! Pick the right translation in each poll.")
+        await send_quiz_round(message.bot)
+
+    # Votes in the polls of other modes fall through to their routers
+    @router.poll_answer(is_current_poll)
+    async def handle_poll_answer(poll_answer: PollAnswer, bot: Bot):
+        global current_poll, idle_rounds
+        # Another vote may have ended the round since the filter passed
+        poll = current_poll
+        if poll is None or poll["id"] != poll_answer.poll_id:
+            return
+        if poll_answer.user is None or poll_answer.option_ids != [poll["correct_option_id"]]:
+            return
+
+        # Only the first right answer scores, the poll of the next round follows the result
+        current_poll = None
+        idle_rounds = 0
+        word = current_word
+        names[poll_answer.user.id] = poll_answer.user.first_name
+        scores[poll_answer.user.id] += 1
+        await OUTBOX.send(
+            bot,
+            chat_id,
+            f"✅ <b>{poll_answer.user.first_name}</b> scores a point!\n"
+            f"Correct translation: <b>{word['eng']}</b> — <b>{word['rus']}</b>\n\n"
+            f"Current standings:\n{standings()}",
+            priority=Priority.HIGH,
+            parse_mode="HTML",
+        )
+        await next_quiz_round(bot, word)
+
+    @router.message(Command("direction"))
+    async def set_direction(message: Message, command: CommandObject):
+        direction = (command.args or "").strip().lower()
+        if direction not in DIRECTIONS:
+            current = directions.get(message.chat.id, config.SPEEDY_TRANSLATE_DIRECTION)
+            await message.reply(
+                f"Current direction: {DIRECTIONS[current]}.\n"
+                "Change it with /direction en, /direction ru or /direction mixed."
+            )
+            return
+
+        directions[message.chat.id] = direction
+        await message.reply(
+            f"Direction set to {DIRECTIONS[direction]}, starting from the next word."
+        )
+
     @router.message(Command("stop"))
     async def stop_game(message: Message):
-        global game_active
+        global game_active, current_poll
 
         if not game_active:
             await message.reply("The game is not active.")
             return
 
         game_active = False
+        current_poll = None
+        cancel_timers()
 
         if scores:
-            stats = sorted(scores.items(), key=lambda x: -x[1])
-            res = []
-            for user_id, score in stats:
-                try:
-                    member = await message.bot.get_chat_member(chat_id, user_id)
-                    res.append(f"{member.user.first_name}: {score}")
-                except Exception:
-                    res.append(f"Player {user_id}: {score}")
-
-            result_text = "\n".join(res)
+            result_text = standings()
             await message.bot.send_message(
                 chat_id,
                 f"The game has been stopped.\n\n<b>Leaderboard:</b>\n{result_text}",
@@ -91,34 +337,43 @@ def get_router() -> Router:
     async def handle_message(message: Message):
         global game_active
 
-        if not game_active or not current_word:
+        # Quiz rounds are answered in the polls
+        if not game_active or quiz or not current_word:
             return
 
-        if message.text.strip().lower() in [ans.lower() for ans in current_answers]:
-            scores[message.from_user.id] += 1
-
-            leaderboard = []
-            for uid, score in scores.items():
-                try:
-                    member = await message.bot.get_chat_member(chat_id, uid)
-                    leaderboard.append(f"{member.user.first_name}: {score}")
-                except Exception:
-                    leaderboard.append(f"Player {uid}: {score}")
+        credit = answer_credit(message.text)
+        if not credit:
+            return
 
-            leaderboard_text = "\n".join(leaderboard)
+        names[message.from_user.id] = message.from_user.first_name
+        scores[message.from_user.id] += credit
+        leaderboard_text = standings()
+        if credit == 1:
+            verdict = "scores a point!"
+        else:
+            verdict = f"scores {credit:g} of a point for an almost correct answer!"
 
-            await message.bot.send_message(
-                chat_id,
-                f"✅ <b>{message.from_user.first_name}</b> scores a point!\n"
-                f"Correct translation: <b>{current_word['eng']}</b> — <b>{current_word['rus']}</b>\n\n"
-                f"Current standings:\n{leaderboard_text}",
-                parse_mode="HTML",
-            )
+        # Both messages are coalescable, so under load they go out as a single one
+        OUTBOX.post(
+            message.bot,
+            chat_id,
+            f"✅ <b>{message.from_user.first_name}</b> {verdict}\n"
+            f"Correct translation: <b>{current_word['eng']}</b> — <b>{current_word['rus']}</b>\n\n"
+            f"Current standings:\n{leaderboard_text}",
+            priority=Priority.HIGH,
+            coalesce=True,
+            parse_mode="HTML",
+        )
 
-            new_round()
+        new_round()
 
-            await message.bot.send_message(
-                chat_id, f"Next word:\nTranslate: <b>{current_word['eng']}</b>", parse_mode="HTML"
-            )
+        OUTBOX.post(
+            message.bot,
+            chat_id,
+            f"Next word:\nTranslate: <b>{question(current_word)}</b>",
+            priority=Priority.HIGH,
+            coalesce=True,
+            parse_mode="HTML",
+        )
 
     return router
@@ -1,3 +1,5 @@
+import functools
+
 from aiogram import Router
 
 import config
@@ -6,32 +8,40 @@ from filter import ModeFilter
 from spyfall import dictionary
 from spyfall.database import Database
 from spyfall.game import GameManager
+from utils.lexicon import LEXICON, read_pairs
+from utils.metrics import ACTIVE_SESSIONS, SCHEDULED_TIMERS
+from utils.snapshot import SNAPSHOT
+from utils.warmup import WARMUP
 
 from .handlers.callbacks import register_callbacks
 from .handlers.commands import register_commands
+from .handlers.janitor import register_janitor
 from .handlers.messages import register_message_handlers
 from .handlers.timer import GameTimer
 
 
 def get_router(bot):
-    router = Router()
+    router = Router(name="spy")
     router.message.filter(ModeFilter("spy"))
 
     db = Database()
     game_manager = GameManager(db)
     timer = GameTimer(bot, db)
-    dict_instance = dictionary.Dictionary(
-        config.SPYFALL_DATABASE_PATH, config.SPYFALL_DICTIONARY_PATH
+    dict_instance = dictionary.Dictionary()
+    LEXICON.register(
+        dictionary.SOURCE, functools.partial(read_pairs, config.SPYFALL_DICTIONARY_PATH)
     )
 
-    async def on_startup():
-        await db.init_db()
-        await dict_instance.init_dictionary()
-
-    router.startup.register(on_startup)
+    WARMUP.register("spy", db.init_db)
+    WARMUP.register("spy", LEXICON.load)
 
     register_commands(router, bot, db, game_manager, dict_instance, timer)
     register_callbacks(router, bot, db, game_manager, timer)
     register_message_handlers(router, bot, db)
+    register_janitor(bot, game_manager, timer)
+
+    ACTIVE_SESSIONS.track("spy", function=db.count_active_games)
+    SNAPSHOT.register("spy", timer.dump, timer.restore)
+    SCHEDULED_TIMERS.track("spy", function=lambda: len(timer.running_timers))
 
     return router
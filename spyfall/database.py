@@ -1,14 +1,30 @@
 import logging
 
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
 
 import aiosqlite
 
 import config
 
+from utils.sharding import chat_condition
+
 
 logger = logging.getLogger(__name__)
 
+# Format of CURRENT_TIMESTAMP, game_start_time is stored in it as well so both compare as UTC
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def utc_now() -> datetime:
+    """Current UTC time without a timezone, as timestamps are read from the database"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def utc_timestamp(seconds_ago: float = 0) -> str:
+    """UTC timestamp of the moment the given number of seconds ago"""
+    return (utc_now() - timedelta(seconds=seconds_ago)).strftime(TIMESTAMP_FORMAT)
+
 
 class Database:
     def __init__(self, db_path: str = config.SPYFALL_DATABASE_PATH):
@@ -105,6 +121,38 @@ class Database:
             await db.commit()
 
         await self._migrate_database()
+        await self._create_indexes()
+
+    async def _create_indexes(self):
+        """Create indexes for lookups done on every message"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_games_chat_id_created_at ON games (chat_id, created_at)"
+            )
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_games_poll_id ON games (poll_id)")
+            await db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_games_status_created_at ON games (status, created_at)"
+            )
+            await db.execute(
+                """CREATE INDEX IF NOT EXISTS idx_games_status_game_start_time
+                   ON games (status, game_start_time)"""
+            )
+            await db.execute(
+                """CREATE INDEX IF NOT EXISTS idx_players_game_id_user_id
+                   ON players (game_id, user_id)"""
+            )
+            await db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_votes_game_id_voter_id ON votes (game_id, voter_id)"
+            )
+            await db.execute(
+                """CREATE INDEX IF NOT EXISTS idx_player_words_game_id_user_id
+                   ON player_words (game_id, user_id)"""
+            )
+            await db.execute(
+                """CREATE INDEX IF NOT EXISTS idx_player_stats_rating
+                   ON player_stats (rating DESC, games_won DESC)"""
+            )
+            await db.commit()
 
     async def _migrate_database(self):
         """Migrate database: add new columns if they don't exist"""
@@ -179,12 +227,19 @@ class Database:
                 row = await cursor.fetchone()
                 return dict(row) if row else None
 
+    async def count_active_games(self) -> int:
+        """Count games that are waiting for players or being played"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                "SELECT COUNT(*) FROM games WHERE status IN ('waiting', 'playing')"
+            ) as cursor:
+                (count,) = await cursor.fetchone()
+                return count
+
     async def start_game(self, game_id: int, location: str, duration: int = 300):
         """Start game with location"""
-        from datetime import datetime
-
         async with aiosqlite.connect(self.db_path) as db:
-            start_time = datetime.now().isoformat()
+            start_time = utc_timestamp()
             await db.execute(
                 """UPDATE games SET status = 'playing', location = ?, 
                    game_start_time = ?, game_duration = ? WHERE game_id = ?""",
@@ -256,6 +311,27 @@ class Database:
             await db.execute("UPDATE games SET status = 'finished' WHERE game_id = ?", (game_id,))
             await db.commit()
 
+    async def expire_stale_games(self, waiting_ttl: int, playing_ttl: int) -> List[Dict]:
+        """Finish games stuck in waiting or playing status for longer than their TTL"""
+        # Each shard worker expires only the games of its own chats, whose timers it runs
+        owned, owned_params = chat_condition()
+        condition = f"""((status = 'waiting' AND created_at < ?)
+                       OR (status = 'playing' AND game_start_time < ?)) AND {owned}"""
+        params = (utc_timestamp(waiting_ttl), utc_timestamp(playing_ttl), *owned_params)
+
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            await db.execute("BEGIN IMMEDIATE")
+            async with db.execute(
+                f"SELECT game_id, chat_id, status FROM games WHERE {condition}", params
+            ) as cursor:
+                rows = await cursor.fetchall()
+
+            if rows:
+                await db.execute(f"UPDATE games SET status = 'finished' WHERE {condition}", params)
+            await db.commit()
+            return [dict(row) for row in rows]
+
     async def add_player(self, game_id: int, user_id: int, username: str, is_spy: bool = False):
         """Add player to game"""
         async with aiosqlite.connect(self.db_path) as db:
@@ -1,5 +1,5 @@
 import random
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from spyfall.database import Database
 import config
 
@@ -75,3 +75,9 @@ class GameManager:
         """Finish game"""
         await self.db.finish_game(game_id)
         await self.db.clear_votes(game_id)
+
+    async def expire_stale_games(self) -> List[Dict]:
+        """Finish abandoned games"""
+        return await self.db.expire_stale_games(
+            config.SPYFALL_WAITING_TTL, config.SPYFALL_PLAYING_TTL
+        )
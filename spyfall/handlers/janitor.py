@@ -0,0 +1,42 @@
+import logging
+
+from aiogram import Bot
+
+import config
+
+from spyfall.game import GameManager
+from spyfall.handlers.timer import GameTimer
+from utils.janitor import JANITOR
+
+
+logger = logging.getLogger(__name__)
+
+MODE_NAME = "spy"
+
+
+def register_janitor(bot: Bot, game_manager: GameManager, timer: GameTimer = None):
+    """Register the sweeper for abandoned games"""
+
+    async def reclaim_stale_games() -> int:
+        """Finish abandoned games and release their timers"""
+        games = await game_manager.expire_stale_games()
+
+        for game in games:
+            if timer:
+                await timer.stop_timer(game["game_id"])
+
+            if not config.JANITOR_NOTIFY_CHATS:
+                continue
+
+            try:
+                await bot.send_message(
+                    game["chat_id"],
+                    f"⌛ Game {game['game_id']} was closed due to inactivity.\n"
+                    "Use /newgame to create a new one.",
+                )
+            except Exception as e:
+                logger.error(f"Error notifying chat {game['chat_id']} about expired game: {e}")
+
+        return len(games)
+
+    JANITOR.register(MODE_NAME, reclaim_stale_games)
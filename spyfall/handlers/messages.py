@@ -7,11 +7,18 @@ from aiogram.types import Message
 import config
 
 from spyfall.database import Database
+from utils.outbox import OUTBOX, Priority
 
 
 logger = logging.getLogger(__name__)
 
 
+def uses_word(text_lower: str, word: str) -> bool:
+    """Check that the lowercased text contains the word as a whole word"""
+    pattern = r"\b" + re.escape(word) + r"\b"
+    return re.search(pattern, text_lower) is not None
+
+
 def register_message_handlers(dp, bot: Bot, db: Database):
     """Register message handlers for word tracking"""
 
@@ -54,16 +61,15 @@ def register_message_handlers(dp, bot: Bot, db: Database):
             word = word_data["word"].lower()
             translation = word_data["translation"]
 
-            pattern = r"\b" + re.escape(word) + r"\b"
-            if re.search(pattern, text_lower):
+            if uses_word(text_lower, word):
                 await db.mark_word_used(active_game["game_id"], message.from_user.id, word)
 
-                try:
-                    await bot.send_message(
-                        message.chat.id,
-                        f"✅ Great! You used the word '{word_data['word']}'\n"
-                        f"📖 Translation: {translation}\n"
-                        f"🎁 You earned {config.SPYFALL_WORD_BONUS_POINTS} bonus points!",
-                    )
-                except Exception as e:
-                    logger.error(f"Error sending word notification to {message.from_user.id}: {e}")
+                OUTBOX.post(
+                    bot,
+                    message.chat.id,
+                    f"✅ Great! You used the word '{word_data['word']}'\n"
+                    f"📖 Translation: {translation}\n"
+                    f"🎁 You earned {config.SPYFALL_WORD_BONUS_POINTS} bonus points!",
+                    priority=Priority.LOW,
+                    coalesce=True,
+                )
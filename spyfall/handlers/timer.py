@@ -1,11 +1,12 @@
 import asyncio
 import logging
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 from aiogram import Bot
 
-from spyfall.database import Database
+from spyfall.database import Database, utc_now
+from utils.outbox import OUTBOX, Priority
 
 
 logger = logging.getLogger(__name__)
@@ -16,6 +17,7 @@ class GameTimer:
         self.bot = bot
         self.db = db
         self.running_timers = {}
+        self._arguments = {}
 
     async def start_timer(self, game_id: int, chat_id: int, duration: int):
         """Start timer for a game"""
@@ -24,12 +26,26 @@ class GameTimer:
 
         task = asyncio.create_task(self._timer_loop(game_id, chat_id, duration))
         self.running_timers[game_id] = task
+        self._arguments[game_id] = (chat_id, duration)
 
     async def stop_timer(self, game_id: int):
         """Stop timer for a game"""
         if game_id in self.running_timers:
             self.running_timers[game_id].cancel()
             del self.running_timers[game_id]
+            del self._arguments[game_id]
+
+    def dump(self) -> list:
+        """Running timers, their end is derived from the game start time in the database"""
+        return [
+            [game_id, chat_id, duration] for game_id, (chat_id, duration) in self._arguments.items()
+        ]
+
+    async def restore(self, timers: list, bot: Bot = None) -> int:
+        """Re-arm timers from a snapshot, a timer of a finished game stops on its first check"""
+        for game_id, chat_id, duration in timers:
+            await self.start_timer(game_id, chat_id, duration)
+        return len(timers)
 
     async def _timer_loop(self, game_id: int, chat_id: int, duration: int):
         """Timer loop that sends updates every minute"""
@@ -49,25 +65,32 @@ class GameTimer:
                         start_time = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
             else:
                 start_time = start_time_str
+            if start_time.tzinfo is not None:
+                start_time = start_time.astimezone(timezone.utc).replace(tzinfo=None)
 
             end_time = start_time + timedelta(seconds=duration)
 
             while True:
-                await asyncio.sleep(60)
+                # Wake up at the end exactly, a timer restored late may be past it already
+                left = (end_time - utc_now()).total_seconds()
+                await asyncio.sleep(min(60, max(0, left)))
 
                 game = await self.db.get_game(game_id)
                 if not game or game["status"] != "playing":
                     await self.stop_timer(game_id)
                     return
 
-                now = datetime.now()
+                now = utc_now()
                 remaining = end_time - now
 
                 if remaining.total_seconds() <= 0:
-                    await self.bot.send_message(
+                    # Queued in the lane of the ticks, so that none of them comes after it
+                    await OUTBOX.send(
+                        self.bot,
                         chat_id,
                         "⏰ Time's up! The game has ended.\n"
                         "Use /vote to start voting for the spy.",
+                        priority=Priority.LOW,
                     )
                     await self.stop_timer(game_id)
                     return
@@ -75,8 +98,11 @@ class GameTimer:
                 minutes = int(remaining.total_seconds() // 60)
                 seconds = int(remaining.total_seconds() % 60)
 
-                await self.bot.send_message(
-                    chat_id, f"⏰ Time remaining: {minutes} minutes {seconds} seconds"
+                OUTBOX.post(
+                    self.bot,
+                    chat_id,
+                    f"⏰ Time remaining: {minutes} minutes {seconds} seconds",
+                    priority=Priority.LOW,
                 )
 
         except asyncio.CancelledError:
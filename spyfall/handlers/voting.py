@@ -8,6 +8,7 @@ import config
 
 from spyfall.database import Database
 from spyfall.game import GameManager
+from utils.outbox import OUTBOX, Priority
 
 
 logger = logging.getLogger(__name__)
@@ -69,23 +70,24 @@ async def apply_game_results(
                     rating_change,
                 )
 
-                try:
-                    if used_words_count > 0:
-                        await bot.send_message(
-                            player["user_id"],
-                            f"📚 Word usage summary:\n"
-                            f"✅ Words used: {used_words_count}/5\n"
-                            f"🎁 Bonus points earned: +{word_bonus}",
-                        )
-                    else:
-                        await bot.send_message(
-                            player["user_id"],
-                            f"📚 Word usage summary:\n"
-                            f"❌ Words used: 0/5\n"
-                            f"⚠️ Penalty: {word_bonus} points",
-                        )
-                except Exception as e:
-                    logger.error(f"Error sending word summary to {player['user_id']}: {e}")
+                if used_words_count > 0:
+                    OUTBOX.post(
+                        bot,
+                        player["user_id"],
+                        f"📚 Word usage summary:\n"
+                        f"✅ Words used: {used_words_count}/5\n"
+                        f"🎁 Bonus points earned: +{word_bonus}",
+                        priority=Priority.LOW,
+                    )
+                else:
+                    OUTBOX.post(
+                        bot,
+                        player["user_id"],
+                        f"📚 Word usage summary:\n"
+                        f"❌ Words used: 0/5\n"
+                        f"⚠️ Penalty: {word_bonus} points",
+                        priority=Priority.LOW,
+                    )
 
         await game_manager.finish_game(game_id)
         return True
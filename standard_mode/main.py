@@ -2,17 +2,17 @@ from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message
 
-from chat_modes import DEFAULT_MODE, set_chat_mode
+from chat_modes import CHAT_MODES, DEFAULT_MODE
 from filter import ModeFilter
 
 
 def get_router() -> Router:
-    router = Router()
+    router = Router(name=DEFAULT_MODE)
     router.message.filter(ModeFilter(DEFAULT_MODE))
 
     @router.message(Command("start"))
     async def cmd_start(message: Message):
-        set_chat_mode(message.chat.id, DEFAULT_MODE)
+        CHAT_MODES.set(message.chat.id, DEFAULT_MODE)
         await message.answer(
             "👋 Hi! This is the standard mode.\n"
             "Use the /mode command to pick another game mode.",
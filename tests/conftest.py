@@ -0,0 +1,72 @@
+import multiprocessing
+import sqlite3
+
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from benchmarks.fixtures import Fixtures
+
+
+FIXTURE_GAMES = 5000
+
+
+class StatementLog:
+    """SQL statements executed by the code under test, with the database they ran against.
+
+    Statements are recorded through the sqlite3 trace callback, so they come with the bound
+    parameters expanded and connections opened by aiosqlite are traced too.
+    """
+
+    def __init__(self) -> None:
+        self.statements: list[tuple[str, str]] = []
+
+    @contextmanager
+    def capture(self) -> Iterator["StatementLog"]:
+        """Record statements of every connection opened inside the block."""
+        connect = sqlite3.connect
+
+        def traced_connect(database: Any, *args: Any, **kwargs: Any) -> sqlite3.Connection:
+            connection = connect(database, *args, **kwargs)
+            connection.set_trace_callback(
+                lambda statement: self.statements.append((str(database), statement))
+            )
+            return connection
+
+        sqlite3.connect = traced_connect
+        try:
+            yield self
+        finally:
+            sqlite3.connect = connect
+
+
+@pytest.fixture(scope="session")
+def fixtures(tmp_path_factory: pytest.TempPathFactory) -> Fixtures:
+    """Databases populated with a realistic history, shared by the whole session."""
+    return Fixtures(Path(tmp_path_factory.mktemp("data")), games=FIXTURE_GAMES)
+
+
+@pytest.fixture
+def statement_log() -> StatementLog:
+    """Empty statement log."""
+    return StatementLog()
+
+
+@pytest.fixture
+def isolated(tmp_path: Path) -> Callable[..., Any]:
+    """Runner of a function in a fresh interpreter whose bot keeps its databases in tmp_path.
+
+    The bot binds its storage paths on import, so a whole bot is only built in a process of its
+    own. The function gets the directory as its first argument and its result must be picklable.
+    """
+
+    def run(function: Callable[..., Any], *args: Any) -> Any:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            return executor.submit(function, tmp_path, *args).result(timeout=60)
+
+    return run
@@ -0,0 +1,69 @@
+import asyncio
+
+from typing import Any
+
+import pytest
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import GetMe, SendMessage
+
+from tools.fake_bot_api import FakeBotAPI, FakeSession
+from utils.bot_session import SingleflightMiddleware, TunedSession
+
+
+async def test_identical_concurrent_calls_share_one_request() -> None:
+    api = FakeBotAPI(latency=0.05)
+    api.add_user(1, "A")
+    api.add_user(2, "B")
+    api.add_chat(-5)
+    session = FakeSession(api)
+    session.middleware(SingleflightMiddleware(("getChatMember",)))
+    bot = Bot("123:fake", session=session)
+
+    members = await asyncio.gather(
+        *(bot.get_chat_member(-5, 1) for _ in range(3)), bot.get_chat_member(-5, 2)
+    )
+    assert [member.user.first_name for member in members] == ["A", "A", "A", "B"]
+    assert len(api.calls_of("getChatMember")) == 2
+
+    # Calls of other methods are never merged
+    await asyncio.gather(*(bot.send_message(-5, "hi") for _ in range(2)))
+    assert len(api.calls_of("sendMessage")) == 2
+
+    results = await asyncio.gather(
+        *(bot.get_chat_member(-5, 3) for _ in range(2)), return_exceptions=True
+    )
+    assert all(isinstance(result, TelegramBadRequest) for result in results)
+    assert len(api.calls_of("getChatMember")) == 3
+
+    # Finished calls are not cached
+    await bot.get_chat_member(-5, 1)
+    assert len(api.calls_of("getChatMember")) == 4
+
+
+async def test_requests_use_the_timeout_of_their_method(monkeypatch: pytest.MonkeyPatch) -> None:
+    timeouts: list[int | None] = []
+
+    async def make_request(self: AiohttpSession, bot: Bot, method: Any, timeout: Any) -> None:
+        timeouts.append(timeout)
+
+    monkeypatch.setattr(AiohttpSession, "make_request", make_request)
+    session = TunedSession(timeout=60, method_timeouts={"sendMessage": 3})
+    bot = Bot("123:fake", session=session)
+
+    await session.make_request(bot, SendMessage(chat_id=1, text="hi"))
+    await session.make_request(bot, GetMe())
+    await session.make_request(bot, SendMessage(chat_id=1, text="hi"), timeout=7)
+
+    assert timeouts == [3, None, 7]
+
+
+async def test_connection_pool_is_sized_through_the_session() -> None:
+    session = TunedSession(limit=7)
+    try:
+        client = await session.create_session()
+        assert client.connector.limit == 7
+    finally:
+        await session.close()
@@ -0,0 +1,82 @@
+import asyncio
+
+from types import SimpleNamespace
+
+from middlewares.chat_executor import ChatExecutorMiddleware
+
+
+def chat(chat_id: int) -> dict:
+    return {"event_chat": SimpleNamespace(id=chat_id)}
+
+
+def poll_answer(poll_id: str, user_id: int) -> tuple[SimpleNamespace, dict]:
+    event = SimpleNamespace(poll_answer=SimpleNamespace(poll_id=poll_id))
+    return event, {"event_from_user": SimpleNamespace(id=user_id)}
+
+
+async def test_updates_of_a_chat_are_handled_in_order() -> None:
+    executor = ChatExecutorMiddleware()
+    handled = []
+
+    async def handler(event: int, data: dict) -> int:
+        await asyncio.sleep(0.01 * (3 - event))
+        handled.append(event)
+        return event
+
+    results = await asyncio.gather(*(executor(handler, event, chat(1)) for event in range(3)))
+
+    assert results == [0, 1, 2]
+    assert handled == [0, 1, 2]
+
+
+async def test_chats_are_handled_concurrently() -> None:
+    executor = ChatExecutorMiddleware()
+    running = 0
+    peak = 0
+
+    async def handler(event: int, data: dict) -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    await asyncio.gather(*(executor(handler, None, chat(chat_id)) for chat_id in range(5)))
+
+    assert peak == 5
+    assert executor.active_chats == 5
+
+
+async def test_idle_workers_are_reaped() -> None:
+    executor = ChatExecutorMiddleware(idle_timeout=0.05)
+
+    async def handler(event: None, data: dict) -> str:
+        return "done"
+
+    assert await executor(handler, None, chat(1)) == "done"
+    assert executor.active_chats == 1
+
+    await asyncio.sleep(0.1)
+    assert executor.active_chats == 0
+    assert await executor(handler, None, chat(1)) == "done"
+
+
+async def test_poll_answers_are_queued_with_the_chat_of_the_poll() -> None:
+    executor = ChatExecutorMiddleware(poll_cache=1)
+    executor.remember_poll("old", -5)
+    executor.remember_poll("quiz", -7)
+
+    assert executor.resolve_key(*poll_answer("quiz", 1)) == -7
+    assert executor.resolve_key(*poll_answer("quiz", 2)) == -7
+    assert executor.resolve_key(*poll_answer("old", 1)) == ("user", 1)
+
+    handled = []
+
+    async def handler(event: SimpleNamespace, data: dict) -> None:
+        handled.append(("start", data["event_from_user"].id))
+        await asyncio.sleep(0.01)
+        handled.append(("end", data["event_from_user"].id))
+
+    await asyncio.gather(*(executor(handler, *poll_answer("quiz", user)) for user in (1, 2)))
+
+    assert handled == [("start", 1), ("end", 1), ("start", 2), ("end", 2)]
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+from chat_modes import DEFAULT_MODE, ChatModeStore
+
+
+async def test_modes_are_persisted_on_flush(tmp_path: Path) -> None:
+    store = ChatModeStore(str(tmp_path / "modes.db"))
+    await store.load()
+    store.set(1, "spy")
+    store.set(2, "words")
+    store.set(2, "wordweaver")
+    await store.flush()
+
+    reloaded = ChatModeStore(store.db_path)
+    await reloaded.load()
+    assert reloaded.get(1) == "spy"
+    assert reloaded.get(2) == "wordweaver"
+    assert reloaded.get(3) == DEFAULT_MODE
+
+
+async def test_failed_flush_keeps_the_changes(tmp_path: Path) -> None:
+    store = ChatModeStore(str(tmp_path / "modes.db"))
+    # Without a load the table doesn't exist yet, so the flush fails
+    store.set(1, "spy")
+    store.set(2, "words")
+    await store.flush()
+    store.set(2, "wordweaver")
+
+    await store.load()
+    await store.flush()
+
+    reloaded = ChatModeStore(store.db_path)
+    await reloaded.load()
+    assert (reloaded.get(1), reloaded.get(2)) == ("spy", "wordweaver")
+
+
+async def test_modes_set_before_load_win_and_stop_flushes(tmp_path: Path) -> None:
+    path = str(tmp_path / "modes.db")
+    stored = ChatModeStore(path)
+    await stored.load()
+    stored.set(1, "spy")
+    stored.set(2, "words")
+    await stored.flush()
+
+    store = ChatModeStore(path, flush_interval=3600)
+    store.set(1, "speedy_poll")
+    await store.start()
+    assert (store.get(1), store.get(2)) == ("speedy_poll", "words")
+
+    store.set(3, "wordweaver")
+    await store.stop()
+
+    reloaded = ChatModeStore(path)
+    await reloaded.load()
+    modes = [reloaded.get(chat_id) for chat_id in (1, 2, 3)]
+    assert modes == ["speedy_poll", "words", "wordweaver"]
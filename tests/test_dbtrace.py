@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import sqlite3
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import aiosqlite
+import pytest
+
+from utils.dbtrace import DBTrace
+
+
+@pytest.fixture
+def dbtrace() -> Iterator[DBTrace]:
+    trace = DBTrace(slow_threshold=60, budget=3, repeat_limit=2)
+    trace.install()
+    yield trace
+    trace.uninstall()
+
+
+async def test_statements_of_both_libraries_are_attributed_to_the_update(
+    dbtrace: DBTrace, tmp_path: Path
+) -> None:
+    path = tmp_path / "test.db"
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+
+    with dbtrace.track(1) as queries:
+        with sqlite3.connect(path) as connection:
+            connection.cursor().execute("INSERT INTO items VALUES (1)")
+        async with aiosqlite.connect(path) as connection:
+            await connection.execute("SELECT * FROM items")
+
+    assert queries.count == 2
+    assert queries.statements["SELECT * FROM items"] == 1
+
+
+async def test_concurrent_updates_are_kept_apart(dbtrace: DBTrace, tmp_path: Path) -> None:
+    path = tmp_path / "test.db"
+
+    async def handle(update_id: int, statements: int) -> int:
+        with dbtrace.track(update_id) as queries:
+            async with aiosqlite.connect(path) as connection:
+                for _ in range(statements):
+                    await connection.execute("SELECT 1")
+                    await asyncio.sleep(0)
+        return queries.count
+
+    assert await asyncio.gather(handle(1, 3), handle(2, 5)) == [3, 5]
+
+
+def test_budget_and_repeated_statements_are_flagged(
+    dbtrace: DBTrace, tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    with dbtrace.track(7) as queries, sqlite3.connect(tmp_path / "test.db") as connection:
+        for _ in range(4):
+            connection.execute("SELECT 1")
+
+    with caplog.at_level(logging.WARNING, logger="utils.dbtrace"):
+        dbtrace.check(queries, "spy.cmd_vote")
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("ran 4 queries" in message for message in messages)
+    assert any("same query 4 times" in message for message in messages)
+
+
+def test_uninstall_restores_plain_connections(tmp_path: Path) -> None:
+    trace = DBTrace()
+    trace.install()
+    trace.uninstall()
+
+    with sqlite3.connect(tmp_path / "test.db") as connection:
+        assert type(connection) is sqlite3.Connection
@@ -0,0 +1,57 @@
+from speedy_translate.distractors import DistractorIndex, part_of_speech
+
+
+PAIRS = [
+    ("run", "бегать"),
+    ("jump", "прыгать"),
+    ("swim", "плавать"),
+    ("red", "красный"),
+    ("green", "зелёный"),
+    ("house", "дом"),
+    ("world", "мир"),
+    ("peace", "мир"),
+]
+
+
+def test_part_of_speech_is_guessed_from_russian_endings() -> None:
+    assert part_of_speech("Бегать") == "verb"
+    assert part_of_speech("красный") == "adjective"
+    assert part_of_speech("дом") is None
+
+
+def test_similar_words_are_offered_first() -> None:
+    index = DistractorIndex(PAIRS, russian=True, size=2)
+
+    assert len(index) == 7
+    assert set(index.candidates("бегать")) == {"прыгать", "плавать"}
+    assert index.candidates("красный")[0] == "зелёный"
+    assert "мир" not in index.candidates("мир")
+
+
+def test_picked_options_skip_the_answers() -> None:
+    index = DistractorIndex(PAIRS, russian=False)
+
+    assert index.candidates("run")[:2] in {("jump", "swim"), ("swim", "jump")}
+    assert len(index.candidates("run")) == 7
+    assert "jump" not in index.pick("run", 6, exclude={"jump"})
+    assert len(index.pick("run", 3)) == 3
+    assert "run" not in index.pick("run", 10)
+
+
+def test_options_containing_an_answer_are_skipped() -> None:
+    pairs = [("leave", "покинуть"), ("go away", "уйти, выйти"), ("quit", "бросить")]
+    index = DistractorIndex(pairs, russian=True)
+
+    assert "уйти, выйти" in index.candidates("покинуть")
+    for _ in range(20):
+        assert index.pick("покинуть", 3, exclude={"покинуть", "уйти"}) == ["бросить"]
+
+
+def test_sparse_candidates_are_topped_up_with_random_words() -> None:
+    words = [(f"word{number}", "слово" * (number + 1)) for number in range(30)]
+    index = DistractorIndex([("cat", "кот"), *words], russian=True, size=0)
+
+    assert index.candidates("кот") == ()
+    options = index.pick("кот", 3, exclude={"кот"})
+    assert len(options) == len(set(options)) == 3
+    assert "кот" not in options
@@ -0,0 +1,67 @@
+import asyncio
+
+from pathlib import Path
+from typing import Any, Callable
+
+
+CHAT, ALICE, BOB = -5, 1, 2
+
+
+def play_speedy_translate(directory: Path) -> list[tuple[str, dict[str, Any]]]:
+    """Switch a chat to Speedy Translate and play a round, returning the recorded API calls."""
+    from tools.loadgen import isolate_storage
+
+    isolate_storage(directory)
+
+    async def play() -> list[tuple[str, dict[str, Any]]]:
+        from aiogram import Bot
+
+        import master_bot
+
+        from speedy_translate import main as speedy
+        from tools.fake_bot_api import FakeBotAPI, FakeSession
+        from utils.warmup import WARMUP
+
+        api = FakeBotAPI()
+        bot = Bot("123:fake", session=FakeSession(api))
+        dp = master_bot.build_dispatcher(bot)
+        await dp.emit_startup(bot=bot, dispatcher=dp, bots=[bot])
+        await WARMUP.wait_all()
+        try:
+            api.add_chat(CHAT)
+            api.add_user(ALICE, "Alice")
+            api.add_user(BOB, "Bob")
+
+            await dp.feed_raw_update(bot, api.text_update(CHAT, ALICE, "/mode"))
+            [menu] = api.messages(CHAT)
+            update = api.button_update(CHAT, ALICE, menu["message_id"], "mode_speedy_poll")
+            await dp.feed_raw_update(bot, update)
+
+            await dp.feed_raw_update(bot, api.text_update(CHAT, ALICE, "/start"))
+            await dp.feed_raw_update(bot, api.text_update(CHAT, BOB, "definitely wrong"))
+            answer = sorted(speedy.current_answers)[0]
+            await dp.feed_raw_update(bot, api.text_update(CHAT, BOB, answer))
+            await dp.feed_raw_update(bot, api.text_update(CHAT, ALICE, "/stop"))
+        finally:
+            await dp.emit_shutdown(bot=bot, dispatcher=dp, bots=[bot])
+
+        return [(call.method, call.params) for call in api.calls]
+
+    return asyncio.run(play())
+
+
+def test_a_game_is_played_through_the_fake_api(isolated: Callable[..., Any]) -> None:
+    calls = isolated(play_speedy_translate)
+
+    sent = [params["text"] for method, params in calls if method == "sendMessage"]
+    assert sent[0] == "Choose a mode:"
+    assert sent[1].startswith("The game has started!")
+    assert sent[2].startswith("✅ <b>Bob</b> scores a point!")
+    # The result and the next word are coalesced into one message
+    assert "Current standings:\nBob: 1\n\nNext word:" in sent[2]
+    assert sent[3] == "The game has been stopped.\n\n<b>Leaderboard:</b>\nBob: 1"
+
+    methods = [method for method, _ in calls]
+    assert methods.index("editMessageText") < methods.index("answerCallbackQuery")
+    chats = {params["chat_id"] for method, params in calls if method == "sendMessage"}
+    assert chats == {str(CHAT)}
@@ -0,0 +1,31 @@
+import pytest
+
+from benchmarks.footprint import check, imports_by_package
+
+
+def test_import_time_is_summed_per_package() -> None:
+    stderr = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       300 |        300 |     aiogram.types",
+            "import time:      1200 |       1500 |   aiogram",
+            "import time:       500 |        500 | spyfall",
+        ]
+    )
+
+    assert imports_by_package(stderr) == pytest.approx({"aiogram": 0.0015, "spyfall": 0.0005})
+
+
+def test_regressions_over_budget_are_reported() -> None:
+    results = {
+        "startup": {"ready": 2.0, "warm": 9.0},
+        "rss": 100 * 2**20,
+        "sessions": {"spy": 50 * 2**20, "words": 10 * 2**20},
+    }
+    budgets = {"ready_seconds": 5, "warm_seconds": 8, "mb_per_1000_sessions": {"spy": 40}}
+
+    failures = check(results, budgets)
+
+    assert len(failures) == 2
+    assert failures[0].startswith("warm took 9.00 s")
+    assert failures[1].startswith("1000 spy sessions take 50.0 MB")
@@ -0,0 +1,36 @@
+import pytest
+
+from utils import fuzzy
+from utils.fuzzy import TrigramIndex, levenshtein
+
+
+def test_levenshtein_stops_past_the_limit() -> None:
+    assert levenshtein("привет", "превет", 2) == 1
+    assert levenshtein("kitten", "sitting", 3) == 3
+    assert levenshtein("kitten", "sitting", 1) == 2
+    assert levenshtein("a", "abcd", 1) == 2
+
+
+def test_words_within_the_distance_are_found() -> None:
+    index = TrigramIndex(["привет", "пример", "способный", "ability", "mir"])
+
+    assert index.search("превет", 1) == [(1, "привет")]
+    assert index.search("способнй", 1) == [(1, "способный")]
+    assert index.search("abillity", 1) == [(1, "ability")]
+    assert index.search("mr", 1) == [(1, "mir")]
+    assert index.search("примет", 1) == [(1, "привет"), (1, "пример")]
+    assert index.search("hello", 1) == []
+
+
+def test_short_words_are_not_compared_with_every_word(monkeypatch: pytest.MonkeyPatch) -> None:
+    index = TrigramIndex(["mir", "mor", *(f"word{number}" for number in range(100))])
+    compared: list[str] = []
+
+    def counting(first: str, second: str, limit: int) -> int:
+        compared.append(second)
+        return levenshtein(first, second, limit)
+
+    monkeypatch.setattr(fuzzy, "levenshtein", counting)
+
+    assert index.search("mr", 1) == [(1, "mir"), (1, "mor")]
+    assert sorted(compared) == ["mir", "mor"]
@@ -0,0 +1,63 @@
+import sqlite3
+
+from pathlib import Path
+
+from spyfall.database import Database, utc_timestamp
+from words_game.work_with_dp import (
+    add_game_session,
+    create_tables,
+    expire_stale_sessions,
+    update_game_start,
+)
+
+
+async def test_spyfall_games_expire_by_their_utc_timestamps(tmp_path: Path) -> None:
+    database = Database(str(tmp_path / "spyfall.db"))
+    await database.init_db()
+    fresh_lobby = await database.create_game(1)
+    fresh_game = await database.create_game(2)
+    await database.start_game(fresh_game, "Airport")
+
+    with sqlite3.connect(database.db_path) as connection:
+        connection.executemany(
+            "INSERT INTO games (game_id, chat_id, status, game_start_time, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (10, 3, "waiting", None, utc_timestamp(120)),
+                (11, 4, "playing", utc_timestamp(120), utc_timestamp(600)),
+                (12, 5, "playing", utc_timestamp(30), utc_timestamp(600)),
+            ],
+        )
+
+    expired = await database.expire_stale_games(waiting_ttl=60, playing_ttl=60)
+
+    assert sorted(game["game_id"] for game in expired) == [10, 11]
+    assert (await database.get_game(10))["status"] == "finished"
+    assert (await database.get_game(12))["status"] == "playing"
+    assert (await database.get_game(fresh_lobby))["status"] == "waiting"
+    assert (await database.get_game(fresh_game))["status"] == "playing"
+
+
+def test_words_sessions_expire_by_their_utc_timestamps(tmp_path: Path) -> None:
+    path = str(tmp_path / "words.db")
+    create_tables(path)
+    fresh_lobby = add_game_session(path, 1, 100)
+    fresh_game = add_game_session(path, 2, 100)
+    update_game_start(path, fresh_game)
+    stale_lobby = add_game_session(path, 3, 100)
+    stale_game = add_game_session(path, 4, 100)
+    update_game_start(path, stale_game)
+
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "UPDATE game_session SET created_at = ? WHERE id = ?", (utc_timestamp(120), stale_lobby)
+        )
+        connection.execute(
+            "UPDATE game_session SET started_at = ? WHERE id = ?", (utc_timestamp(120), stale_game)
+        )
+
+    expired = expire_stale_sessions(path, waiting_ttl=60, started_ttl=60)
+
+    assert sorted(session_id for session_id, _, _ in expired) == [stale_lobby, stale_game]
+    assert fresh_lobby not in {session_id for session_id, _, _ in expired}
+    assert fresh_game not in {session_id for session_id, _, _ in expired}
@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from utils.lexicon import Lexicon, read_pairs
+
+
+def test_dictionaries_are_merged_and_sampled_per_source(tmp_path: Path) -> None:
+    (tmp_path / "english.txt").write_text("Apple\nworld\nzebra\n")
+    (tmp_path / "speedy.csv").write_text("eng,rus\nworld,мир\nworld,свет\n", encoding="utf-8")
+    (tmp_path / "spy.txt").write_text("world мир\npear груша\n", encoding="utf-8")
+
+    lexicon = Lexicon(tmp_path / "english.txt")
+    lexicon.register("speedy", lambda: read_pairs(tmp_path / "speedy.csv"))
+    lexicon.register("spy", lambda: read_pairs(tmp_path / "spy.txt"))
+    lexicon.load()
+
+    assert "apple" in lexicon and "WORLD" in lexicon and "pear" in lexicon
+    assert "plum" not in lexicon
+    assert lexicon.translate("World") == ("мир", "свет")
+    assert lexicon.sample(5, "speedy") == [("world", "мир")]
+    assert lexicon.random_english() in {"apple", "world", "zebra"}
+
+    [(english, _)] = lexicon.sample(1, "speedy")
+    assert english is next(word for word, _ in lexicon.sample(5, "spy") if word == "world")
+
+    lexicon.register("words", lambda: [("plum", "слива")])
+    assert lexicon.translate("plum") == ("слива",)
+
+
+def test_russian_words_lead_back_to_every_english_word(tmp_path: Path) -> None:
+    (tmp_path / "english.txt").write_text("")
+    lexicon = Lexicon(tmp_path / "english.txt")
+    lexicon.register("one", lambda: [("world", "мир"), ("light", "свёт")])
+    lexicon.register("two", lambda: [("peace", "мир; покой"), ("world", "Мир")])
+
+    assert lexicon.english_for(" Мир ") == ("world", "peace")
+    assert lexicon.english_for("покой") == ("peace",)
+    assert lexicon.english_for("свет") == ("light",)
+    assert lexicon.translate("world") == ("мир",)
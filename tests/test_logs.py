@@ -0,0 +1,39 @@
+import io
+import json
+import logging
+
+from utils.logs import LOG_CONTEXT, LogContext, LogPipeline, SamplingFilter
+
+
+def test_records_are_written_as_json_with_the_update_context() -> None:
+    stream = io.StringIO()
+    pipeline = LogPipeline(level="INFO", format="json", sampling={})
+    pipeline.install(stream)
+    logger = logging.getLogger("tests.logs")
+
+    token = LOG_CONTEXT.set(LogContext(update_id=7, chat_id=-100))
+    try:
+        LOG_CONTEXT.get().mode = "spy"
+        logger.info("User %s voted", 42)
+    finally:
+        LOG_CONTEXT.reset(token)
+    logger.warning("Outside of an update")
+    pipeline.close()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert records[0]["message"] == "User 42 voted"
+    assert (records[0]["update_id"], records[0]["chat_id"], records[0]["mode"]) == (7, -100, "spy")
+    assert records[1]["level"] == "WARNING"
+    assert "chat_id" not in records[1]
+
+
+def test_chatty_loggers_are_sampled_but_warnings_are_kept() -> None:
+    sampling = SamplingFilter({"spyfall": 0.0, "spyfall.database": 1.0})
+
+    def record(name: str, level: int) -> logging.LogRecord:
+        return logging.LogRecord(name, level, __file__, 1, "message", None, None)
+
+    assert not sampling.filter(record("spyfall.handlers.callbacks", logging.INFO))
+    assert sampling.filter(record("spyfall.handlers.callbacks", logging.WARNING))
+    assert sampling.filter(record("spyfall.database", logging.INFO))
+    assert sampling.filter(record("spyfallen", logging.DEBUG))
@@ -0,0 +1,62 @@
+from aiohttp.test_utils import TestClient, TestServer
+
+from utils.metrics import CONTENT_TYPE, Metrics
+
+
+async def registry() -> Metrics:
+    metrics = Metrics(port=0)
+    requests = metrics.counter("bot_updates", "Handled updates.", ("router",))
+    requests.inc("spy")
+    requests.inc("spy", amount=2)
+    requests.inc('say "hi"\\\n')
+
+    sessions = metrics.gauge("bot_sessions", "Open sessions.", ("mode",))
+    sessions.set(4, "words")
+    sessions.track("spy", function=lambda: 2)
+
+    async def broken() -> float:
+        raise RuntimeError("gone")
+
+    sessions.track("wordweaver", function=broken)
+
+    latency = metrics.histogram("bot_latency_seconds", "Latency.", ("mode",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        latency.observe(value, "spy")
+    return metrics
+
+
+async def test_registry_is_rendered_in_the_text_format() -> None:
+    metrics = await registry()
+    lines = (await metrics.render()).splitlines()
+
+    assert lines[:3] == [
+        "# HELP bot_event_loop_lag_seconds Delay of the event loop waking up a sleeping task.",
+        "# TYPE bot_event_loop_lag_seconds gauge",
+        "# HELP bot_updates Handled updates.",
+    ]
+    assert lines[3:] == [
+        "# TYPE bot_updates counter",
+        'bot_updates_total{router="spy"} 3',
+        'bot_updates_total{router="say \\"hi\\"\\\\\\n"} 1',
+        "# HELP bot_sessions Open sessions.",
+        "# TYPE bot_sessions gauge",
+        'bot_sessions{mode="words"} 4',
+        'bot_sessions{mode="spy"} 2',
+        "# HELP bot_latency_seconds Latency.",
+        "# TYPE bot_latency_seconds histogram",
+        'bot_latency_seconds_bucket{mode="spy",le="0.1"} 2',
+        'bot_latency_seconds_bucket{mode="spy",le="1.0"} 3',
+        'bot_latency_seconds_bucket{mode="spy",le="+Inf"} 4',
+        'bot_latency_seconds_sum{mode="spy"} 5.65',
+        'bot_latency_seconds_count{mode="spy"} 4',
+    ]
+
+
+async def test_metrics_are_served_over_http() -> None:
+    metrics = await registry()
+
+    async with TestClient(TestServer(metrics.build_app())) as client:
+        response = await client.get("/metrics")
+        assert response.status == 200
+        assert response.headers["Content-Type"] == CONTENT_TYPE
+        assert 'bot_sessions{mode="spy"} 2' in (await response.text()).splitlines()
@@ -0,0 +1,88 @@
+import pytest
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import Message, PollAnswer
+
+from chat_modes import CHAT_MODES
+from handlers import mode_dispatch
+from handlers.mode_dispatch import ModeRouter
+from tools.fake_bot_api import FakeBotAPI, FakeSession
+from utils.warmup import Warmup
+
+
+CHAT, OTHER, UNSET, ALICE = -5, -6, -7, 1
+
+
+def mode_router(mode: str) -> Router:
+    router = Router(name=mode)
+
+    @router.message()
+    async def handle(message: Message, chat_mode: str) -> str:
+        return f"{mode} got {message.text} in {chat_mode}"
+
+    @router.poll_answer()
+    async def vote(poll_answer: PollAnswer) -> str:
+        return f"{mode} got a vote"
+
+    return router
+
+
+def connect() -> tuple[FakeBotAPI, Bot]:
+    api = FakeBotAPI()
+    for chat_id in (CHAT, OTHER, UNSET):
+        api.add_chat(chat_id)
+    api.add_user(ALICE, "Alice")
+    return api, Bot("123:fake", session=FakeSession(api))
+
+
+@pytest.fixture
+def warmup(monkeypatch: pytest.MonkeyPatch) -> Warmup:
+    warmup = Warmup(prewarm=False)
+    monkeypatch.setattr(mode_dispatch, "WARMUP", warmup)
+    monkeypatch.setattr(CHAT_MODES, "_modes", {CHAT: "spy", OTHER: "gone"})
+    monkeypatch.setattr(CHAT_MODES, "_dirty", {})
+    return warmup
+
+
+async def test_updates_go_to_the_router_of_the_chat_mode(warmup: Warmup) -> None:
+    loaded = []
+    warmup.register("spy", lambda: loaded.append("spy"))
+    warmup.register("words", lambda: loaded.append("words"))
+    modes = ModeRouter()
+    modes.register("words", mode_router("words"))
+    modes.register("spy", mode_router("spy"))
+    dp = Dispatcher()
+    dp.include_router(modes)
+    api, bot = connect()
+
+    result = await dp.feed_raw_update(bot, api.text_update(CHAT, ALICE, "hi"))
+    assert result == "spy got hi in spy"
+    # Only the mode of the chat is warmed up before its update is handled
+    assert loaded == ["spy"]
+
+    # Unknown modes and the default one without a router leave the update unhandled
+    assert await dp.feed_raw_update(bot, api.text_update(OTHER, ALICE, "hi")) is UNHANDLED
+    assert await dp.feed_raw_update(bot, api.text_update(UNSET, ALICE, "hi")) is UNHANDLED
+
+
+async def test_chatless_updates_fall_through_once_every_mode_is_warm(warmup: Warmup) -> None:
+    loaded = []
+    warmup.register("spy", lambda: loaded.append("spy"))
+    warmup.register("words", lambda: loaded.append("words"))
+    api, bot = connect()
+    polls = [(await bot.send_poll(CHAT, "?", ["a", "b"])).poll.id for _ in range(2)]
+    modes = ModeRouter()
+    words = mode_router("words")
+    words.poll_answer.filter(lambda poll_answer: poll_answer.poll_id == polls[0])
+    modes.register("words", words)
+    modes.register("spy", mode_router("spy"))
+    dp = Dispatcher()
+    dp.include_router(modes)
+
+    # Mode routers are offered the update in registration order
+    result = await dp.feed_raw_update(bot, api.poll_answer_update(polls[1], ALICE, [0]))
+    assert result == "spy got a vote"
+    assert sorted(loaded) == ["spy", "words"]
+    result = await dp.feed_raw_update(bot, api.poll_answer_update(polls[0], ALICE, [0]))
+    assert result == "words got a vote"
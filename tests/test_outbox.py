@@ -0,0 +1,137 @@
+import asyncio
+
+from typing import Any
+
+import pytest
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from utils.outbox import MESSAGE_LIMIT, Outbox, Priority
+
+
+class StubBot:
+    """Bot that records sent messages and can hold them back or fail them with flood control."""
+
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, str, float]] = []
+        self.release = asyncio.Event()
+        self.release.set()
+        self.in_flight = asyncio.Event()
+        self.flood: list[int] = []
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any) -> str:
+        self.in_flight.set()
+        await self.release.wait()
+        if self.flood:
+            retry_after = self.flood.pop()
+            raise TelegramRetryAfter(SendMessage(chat_id=chat_id, text=text), "", retry_after)
+        self.sent.append((chat_id, text, asyncio.get_running_loop().time()))
+        return text
+
+    def texts(self) -> list[str]:
+        return [text for _, text, _ in self.sent]
+
+
+async def started(**kwargs: Any) -> Outbox:
+    unlimited = {"rate": 1000, "burst": 1000, "chat_rate": 1000, "chat_burst": 1000}
+    outbox = Outbox(**{**unlimited, **kwargs})
+    await outbox.start()
+    return outbox
+
+
+async def hold(outbox: Outbox, bot: StubBot) -> asyncio.Task:
+    """Send a first message and keep it in flight, so that the next ones stay queued."""
+    bot.release.clear()
+    first = asyncio.create_task(outbox.send(bot, 1, "first"))
+    await bot.in_flight.wait()
+    return first
+
+
+async def test_queued_messages_go_out_by_priority_then_in_order() -> None:
+    outbox, bot = await started(), StubBot()
+    first = await hold(outbox, bot)
+
+    sends = [
+        asyncio.create_task(outbox.send(bot, 1, text, priority=priority))
+        for text, priority in [
+            ("low", Priority.LOW),
+            ("normal 1", Priority.NORMAL),
+            ("high", Priority.HIGH),
+            ("normal 2", Priority.NORMAL),
+        ]
+    ]
+    await asyncio.sleep(0)
+    assert outbox.pending == 4
+
+    bot.release.set()
+    await asyncio.gather(first, *sends)
+    assert bot.texts() == ["first", "high", "normal 1", "normal 2", "low"]
+    await outbox.stop()
+
+
+async def test_coalescable_messages_are_merged_up_to_the_limit() -> None:
+    outbox, bot = await started(), StubBot()
+    first = await hold(outbox, bot)
+
+    long, short, tail = "x" * (MESSAGE_LIMIT - 1000), "y" * 900, "z" * 200
+    sends = [
+        asyncio.create_task(outbox.send(bot, 1, long, coalesce=True)),
+        asyncio.create_task(outbox.send(bot, 1, short, coalesce=True)),
+        asyncio.create_task(outbox.send(bot, 1, tail, coalesce=True)),
+        asyncio.create_task(outbox.send(bot, 1, "plain")),
+    ]
+    await asyncio.sleep(0)
+
+    bot.release.set()
+    results = await asyncio.gather(first, *sends)
+    assert bot.texts() == ["first", f"{long}\n\n{short}", tail, "plain"]
+    assert results[1] == results[2] == f"{long}\n\n{short}"
+    await outbox.stop()
+
+
+async def test_flood_control_pauses_the_chat_and_retries() -> None:
+    outbox, bot = await started(), StubBot()
+    bot.flood = [1]
+    loop = asyncio.get_running_loop()
+    started_at = loop.time()
+
+    retried = asyncio.create_task(outbox.send(bot, 1, "retried"))
+    await asyncio.sleep(0.05)
+    assert await outbox.send(bot, 2, "other chat") == "other chat"
+    assert await retried == "retried"
+
+    sent = {text: at - started_at for _, text, at in bot.sent}
+    assert sent["other chat"] < 0.5
+    assert sent["retried"] >= 0.9
+    await outbox.stop()
+
+
+async def test_chat_and_global_buckets_space_messages_out() -> None:
+    outbox, bot = await started(chat_rate=20, chat_burst=1), StubBot()
+    await asyncio.gather(*(outbox.send(bot, 1, str(index)) for index in range(3)))
+    times = [at for _, _, at in bot.sent]
+    assert times[-1] - times[0] >= 0.09
+    await outbox.stop()
+
+    outbox, bot = await started(rate=20, burst=1), StubBot()
+    await asyncio.gather(*(outbox.send(bot, chat_id, "hi") for chat_id in range(3)))
+    times = [at for _, _, at in bot.sent]
+    assert times[-1] - times[0] >= 0.09
+    await outbox.stop()
+
+
+async def test_stop_drains_the_queue_within_the_timeout() -> None:
+    outbox, bot = await started(chat_rate=20, chat_burst=1), StubBot()
+    for index in range(3):
+        outbox.post(bot, 1, str(index))
+    await outbox.stop()
+    assert bot.texts() == ["0", "1", "2"]
+
+    outbox, bot = await started(chat_rate=1, chat_burst=1, drain_timeout=0.1), StubBot()
+    sends = [asyncio.create_task(outbox.send(bot, 1, str(index))) for index in range(3)]
+    await asyncio.sleep(0)
+    await outbox.stop()
+    assert bot.texts() == ["0"]
+    with pytest.raises(asyncio.CancelledError):
+        await sends[-1]
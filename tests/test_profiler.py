@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+import aiosqlite
+import pytest
+
+from utils.profiler import Profile, SamplingProfiler
+
+
+def _busy_loop(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def test_profile_samples_the_loop_and_aiosqlite_threads(tmp_path) -> None:
+    profiler = SamplingProfiler(interval=0.001)
+    async with aiosqlite.connect(tmp_path / "test.db"):
+        task = asyncio.create_task(profiler.profile(0.3))
+        await asyncio.sleep(0.05)
+        _busy_loop(0.15)
+        profile = await task
+
+    threads = {thread for thread, _ in profile.stacks}
+    assert threads == {"event-loop", "aiosqlite"}
+    assert any("_busy_loop" in frame for frame, _, _ in profile.hot_functions(5))
+    assert "_busy_loop (test_profiler.py" in profile.summary()
+
+
+async def test_only_one_profile_runs_at_a_time() -> None:
+    profiler = SamplingProfiler(interval=0.01)
+    task = asyncio.create_task(profiler.profile(0.1))
+    await asyncio.sleep(0)
+
+    assert profiler.running
+    with pytest.raises(RuntimeError):
+        await profiler.profile(0.1)
+    await task
+    assert not profiler.running
+
+
+def test_collapsed_stacks_are_folded_per_thread() -> None:
+    profile = Profile(0.005)
+    for _ in range(3):
+        profile.add("event-loop", ("main (a.py:1)", "handle;x (b.py:2)"))
+    profile.add("aiosqlite", ("run (threading.py:1)",))
+
+    assert profile.collapsed() == (
+        "event-loop;main (a.py:1);handle,x (b.py:2) 3\naiosqlite;run (threading.py:1) 1\n"
+    )
@@ -0,0 +1,221 @@
+"""Query plans of every SQL statement the games run.
+
+Statements are collected by running the database layers against the benchmark fixtures, then
+each one is explained on the same database. A full table scan fails the test unless it is
+listed in ``ALLOWED_SCANS`` with the reason it is acceptable.
+"""
+
+import inspect
+import random
+import re
+import sqlite3
+
+from collections.abc import Callable
+from typing import Any, Final
+
+import pytest
+
+from aiogram import Bot, Dispatcher
+
+import config
+import words_game.tg_bot_only_commands as words_game_bot
+
+from benchmarks.fixtures import SPYFALL_DATABASE_CALLS, Fixtures
+from spyfall.database import Database
+from tests.conftest import StatementLog
+from tools.fake_bot_api import FakeBotAPI, FakeSession
+from wordweaver.adapters.user import UserAdapter
+from words_game import work_with_dp
+
+
+# (statement pattern, plan pattern, reason)
+ALLOWED_SCANS: Final[list[tuple[str, str, str]]] = [
+    (
+        r"^SELECT en, ru FROM words$",
+        r"^SCAN words$",
+        "runs once at startup to load the dictionary into the lexicon",
+    ),
+    (
+        r"^SELECT 1 FROM words LIMIT 1$",
+        r"^SCAN words",
+        "stops at the first row, checks on startup whether the dictionary is imported",
+    ),
+    (
+        r"FROM player_stats\s+WHERE games_played > 0",
+        r"^SCAN player_stats USING INDEX idx_player_stats_rating$",
+        "walks the rating index and stops at the limit",
+    ),
+]
+
+DML = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+# Arguments of every work_with_dp function that queries the game tables
+WORDS_GAME_CALLS: Final[dict[str, Callable[[Fixtures, random.Random], tuple]]] = {
+    "add_or_update_user": lambda f, rng: (f.random_user(rng), "player"),
+    "add_game_session": lambda f, rng: (f.random_chat(rng), f.random_user(rng)),
+    "update_game_start": lambda f, rng: (f.random_game(rng),),
+    "update_game_finish": lambda f, rng: (f.random_game(rng),),
+    "add_game_player": lambda f, rng: (*f.random_player(rng), 5),
+    "deactivate_game_player": lambda f, rng: f.random_player(rng),
+    "get_active_session": lambda f, rng: (f.random_chat(rng),),
+    "get_all_words": lambda f, rng: (),
+    "get_next_player": lambda f, rng: f.random_player(rng),
+    "get_player_name": lambda f, rng: (f.random_user(rng),),
+    "get_active_players": lambda f, rng: (f.random_game(rng),),
+    "update_last_word": lambda f, rng: (*f.random_player(rng), "apple"),
+    "get_session_status": lambda f, rng: (f.random_game(rng),),
+    "get_winner_and_update_leaders": lambda f, rng: (f.random_game(rng),),
+    "update_games_played_for_all_players": lambda f, rng: (
+        f.random_game(rng),
+        f.random_chat(rng),
+    ),
+    "expire_stale_sessions": lambda f, rng: (
+        config.WORDS_GAME_WAITING_TTL,
+        config.WORDS_GAME_STARTED_TTL,
+    ),
+}
+
+# Schema management that never runs on a hot path
+WORDS_GAME_SCHEMA: Final[set[str]] = {
+    "create_database",
+    "create_tables",
+    "delete_table",
+    "clear_database",
+}
+
+
+def _allowed(statement: str, detail: str) -> bool:
+    return any(
+        re.search(statement_pattern, statement) and re.search(plan_pattern, detail)
+        for statement_pattern, plan_pattern, _ in ALLOWED_SCANS
+    )
+
+
+def _plan(database: str, statement: str) -> list[str]:
+    with sqlite3.connect(database) as connection:
+        return [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {statement}")]
+
+
+def assert_no_scans(log: StatementLog) -> None:
+    """Fail with the offending plans if a logged statement scans a table."""
+    statements = {
+        (database, " ".join(statement.split()))
+        for database, statement in log.statements
+        if DML.match(statement)
+    }
+    assert statements, "no statements were captured"
+
+    failures = []
+    for database, statement in sorted(statements):
+        plan = _plan(database, statement)
+        scans = [
+            detail
+            for detail in plan
+            if detail.startswith("SCAN ") and not _allowed(statement, detail)
+        ]
+        if scans:
+            failures.append(statement + "\n" + "\n".join(f"    {detail}" for detail in plan))
+
+    assert not failures, "Statements scanning a table:\n\n" + "\n\n".join(failures)
+
+
+def _public_functions(module: Any) -> set[str]:
+    return {
+        name
+        for name, value in vars(module).items()
+        if inspect.isfunction(value)
+        and value.__module__ == module.__name__
+        and not name.startswith("_")
+    }
+
+
+@pytest.fixture(scope="module")
+def spyfall_fixtures(fixtures: Fixtures) -> Fixtures:
+    """Fixtures with the spyfall database built, it can't be built from a running loop."""
+    assert fixtures.spyfall_database
+    return fixtures
+
+
+def test_spyfall_database_calls_cover_every_method() -> None:
+    methods = {
+        name
+        for name, value in vars(Database).items()
+        if inspect.iscoroutinefunction(value) and not name.startswith("_")
+    }
+    assert methods - {"init_db"} == set(SPYFALL_DATABASE_CALLS)
+
+
+async def test_spyfall_database(spyfall_fixtures: Fixtures, statement_log: StatementLog) -> None:
+    database = spyfall_fixtures.spyfall_database
+    rng = random.Random(0)
+    with statement_log.capture():
+        for method, arguments in SPYFALL_DATABASE_CALLS.items():
+            await getattr(database, method)(*arguments(spyfall_fixtures, rng))
+
+    assert_no_scans(statement_log)
+
+
+def test_words_game_calls_cover_every_function() -> None:
+    functions = _public_functions(work_with_dp)
+    assert functions - WORDS_GAME_SCHEMA == set(WORDS_GAME_CALLS)
+
+
+def test_words_game_database(fixtures: Fixtures, statement_log: StatementLog) -> None:
+    path = fixtures.words_game_database
+    rng = random.Random(0)
+    with statement_log.capture():
+        for function, arguments in WORDS_GAME_CALLS.items():
+            getattr(work_with_dp, function)(path, *arguments(fixtures, rng))
+
+    assert_no_scans(statement_log)
+
+
+async def test_words_game_commands(
+    fixtures: Fixtures, statement_log: StatementLog, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = fixtures.words_game_database
+    monkeypatch.setattr(words_game_bot, "DB_NAME", path)
+    monkeypatch.setattr(words_game_bot, "active_games", {})
+
+    with sqlite3.connect(path) as connection:
+        words = dict(connection.execute("SELECT substr(en, 1, 1), en FROM words"))
+
+    api = FakeBotAPI()
+    chat_id = api.add_chat(-42)["id"]
+    creator, other = api.add_user(1, "Alice")["id"], api.add_user(2, "Bob")["id"]
+    bot = Bot("42:TEST", session=FakeSession(api))
+    dispatcher = Dispatcher()
+    dispatcher.include_router(words_game_bot.get_router(bot))
+
+    async def send(user_id: int, text: str) -> None:
+        update = api.text_update(chat_id, user_id, text)
+        await dispatcher.feed_raw_update(bot, update, chat_mode=words_game_bot.MODE_NAME)
+
+    try:
+        with statement_log.capture():
+            await send(creator, "/newgame")
+            await send(other, "/join")
+            await send(creator, "/startgame")
+
+            game = words_game_bot.active_games[chat_id]
+            await send(game["current_player"], words[game["last_word"][-1]])
+
+            await send(creator, "/rating")
+            await send(other, "/leave")
+            await send(creator, "/stop")
+    finally:
+        for task in list(words_game_bot.background_tasks):
+            task.cancel()
+
+    assert_no_scans(statement_log)
+
+
+async def test_wordweaver_users(tmp_path: Any, statement_log: StatementLog) -> None:
+    users = UserAdapter(path=tmp_path / "wordweaver.db")
+    await users.migrate()
+    with statement_log.capture():
+        await users.get(1)
+        await users.progress(1, 10)
+        await users.progress(2, 5)
+
+    assert_no_scans(statement_log)
@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+from pathlib import Path
+from typing import Any, Callable
+
+
+CHAT, ALICE = -5, 1
+
+
+def run_bot(directory: Path, start: bool) -> dict[str, Any]:
+    """Run the whole bot through startup and shutdown, starting a speedy game on the way."""
+    from tools.loadgen import isolate_storage
+
+    isolate_storage(directory)
+
+    async def run() -> dict[str, Any]:
+        from aiogram import Bot
+
+        import master_bot
+
+        from speedy_translate import main as speedy
+        from tools.fake_bot_api import FakeBotAPI, FakeSession
+        from utils.warmup import WARMUP
+
+        api = FakeBotAPI()
+        api.add_chat(CHAT)
+        api.add_user(ALICE, "Alice")
+        bot = Bot("123:fake", session=FakeSession(api))
+        dp = master_bot.build_dispatcher(bot)
+        await dp.emit_startup(bot=bot, dispatcher=dp, bots=[bot])
+        await WARMUP.wait_all()
+        try:
+            if start:
+                await dp.feed_raw_update(bot, api.text_update(CHAT, ALICE, "/mode"))
+                [menu] = api.messages(CHAT)
+                update = api.button_update(CHAT, ALICE, menu["message_id"], "mode_speedy_poll")
+                await dp.feed_raw_update(bot, update)
+                await dp.feed_raw_update(bot, api.text_update(CHAT, ALICE, "/start"))
+            state = {"active": speedy.game_active, "word": speedy.current_word}
+        finally:
+            await dp.emit_shutdown(bot=bot, dispatcher=dp, bots=[bot])
+
+        snapshot = json.loads((directory / "snapshot.json").read_text(encoding="utf-8"))
+        return {**state, "modes": sorted(snapshot["modes"])}
+
+    return asyncio.run(run())
+
+
+def test_the_shutdown_snapshot_brings_games_back(isolated: Callable[..., Any]) -> None:
+    before = isolated(run_bot, True)
+    assert before["active"]
+    assert "speedy_poll" in before["modes"]
+
+    # The game is restored by the warmup of the next start and saved again on its shutdown
+    after = isolated(run_bot, False)
+    assert after["active"]
+    assert after["word"] == before["word"]
+    assert "speedy_poll" in after["modes"]
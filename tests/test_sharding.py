@@ -0,0 +1,28 @@
+from aiogram.types import Chat, PollAnswer, Update, User
+
+from utils.sharding import ShardFront, shard_of
+
+
+USER = User(id=7, is_bot=False, first_name="A")
+
+
+def test_updates_of_a_chat_go_to_one_worker() -> None:
+    front = ShardFront(workers=4)
+    chats = [Chat(id=chat_id, type="supergroup") for chat_id in (-1001, -1002, -1003, 44)]
+
+    for chat in chats:
+        update = Update(update_id=1)
+        assert front.route(update, {"event_chat": chat}) == shard_of(chat.id, 4)
+
+    assert {front.route(Update(update_id=1), {"event_chat": chat}) for chat in chats} == {0, 1, 2, 3}
+
+
+def test_poll_answers_go_to_the_worker_that_sent_the_poll() -> None:
+    front = ShardFront(workers=4)
+    front._polls["poll"] = (shard_of(USER.id, 4) + 1) % 4
+
+    answer = Update(update_id=1, poll_answer=PollAnswer(poll_id="poll", user=USER, option_ids=[0]))
+    unknown = Update(update_id=2, poll_answer=PollAnswer(poll_id="other", user=USER, option_ids=[0]))
+
+    assert front.route(answer, {"event_from_user": USER}) == front._polls["poll"]
+    assert front.route(unknown, {"event_from_user": USER}) == shard_of(USER.id, 4)
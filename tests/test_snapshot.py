@@ -0,0 +1,68 @@
+import json
+import time
+
+from pathlib import Path
+
+from utils.snapshot import Snapshots
+from wordweaver.container import CONTAINER
+from wordweaver.entities.player import PlayerEntity
+from wordweaver.telegram import ROUND_TIMEOUT, Background
+
+
+async def test_sessions_survive_a_restart(tmp_path: Path) -> None:
+    path = str(tmp_path / "snapshot.json")
+    sessions = {1: ["a", "b"]}
+    restored = {}
+
+    async def restore(state, bot) -> int:
+        restored.update({int(chat_id): words for chat_id, words in state})
+        return len(state)
+
+    before = Snapshots(path=path)
+    before.register("mode", lambda: list(sessions.items()), restore)
+    await before.start(bot=None)
+    await before.stop()
+
+    after = Snapshots(path=path)
+    after.register("mode", lambda: [], restore)
+    assert await after.restore(bot=None) == {"mode": 1}
+    assert restored == sessions
+
+
+async def test_stale_snapshots_are_ignored(tmp_path: Path) -> None:
+    path = tmp_path / "snapshot.json"
+    path.write_text(json.dumps({"saved_at": time.time() - 3600, "modes": {"mode": [1]}}))
+
+    async def restore(state, bot) -> int:
+        raise AssertionError("A stale snapshot must not be restored")
+
+    snapshots = Snapshots(path=str(path), max_age=60)
+    snapshots.register("mode", list, restore)
+
+    assert await snapshots.restore(bot=None) == {}
+
+
+async def test_wordweaver_round_is_restored_with_its_timer() -> None:
+    sessions = CONTAINER.session_adapter()
+    executor = sessions.get_or_create(-1)
+    executor.join(PlayerEntity(id=1, username="alice"))
+    executor.join(PlayerEntity(id=2, username="bob"))
+    executor.start()
+    executor.arm(ROUND_TIMEOUT)
+    state = json.loads(json.dumps(sessions.dump()))
+    sessions.clear(-1)
+
+    timers = set(Background._tasks)
+    try:
+        assert await Background.restore(state, bot=None) == 1
+        restored = sessions.get_or_create(-1)
+        assert restored.is_started()
+        assert restored.usernames == ["alice", "bob"]
+        assert restored.what() == executor.what()
+        assert restored.deadline - time.time() > ROUND_TIMEOUT.total_seconds() - 1
+        assert len(Background._tasks - timers) == 1
+    finally:
+        for task in Background._tasks - timers:
+            task.cancel()
+        sessions.clear(-1)
+
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import time
+
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+import pytest
+
+from aiogram import Bot, Dispatcher
+
+import config
+
+from middlewares.chat_executor import ChatExecutorMiddleware, PollTracker
+from speedy_translate import main as speedy
+from tools.fake_bot_api import FakeBotAPI, FakeSession
+from utils.lexicon import LEXICON
+
+
+CHAT, ALICE, BOB = -5, 1, 2
+
+
+@dataclass
+class Quiz:
+    api: FakeBotAPI
+    bot: Bot
+    dp: Dispatcher
+
+    async def command(self, text: str) -> None:
+        update = self.api.text_update(CHAT, ALICE, text)
+        await self.dp.feed_raw_update(self.bot, update, chat_mode=speedy.MODE_NAME)
+
+    async def vote(self, user_id: int, correct: bool = True, poll: dict | None = None) -> None:
+        poll = poll or speedy.current_poll
+        option = poll["correct_option_id"]
+        option = option if correct else (option + 1) % (config.SPEEDY_QUIZ_DISTRACTORS + 1)
+        update = self.api.poll_answer_update(poll["id"], user_id, [option])
+        await self.dp.feed_raw_update(self.bot, update)
+
+    def sent(self) -> list[str]:
+        return [call.params.get("text", "poll") for call in self.api.calls]
+
+
+def reset() -> None:
+    speedy.cancel_timers()
+    speedy.game_active = False
+    speedy.current_poll = None
+    speedy.names.clear()
+    speedy.directions.clear()
+
+
+@pytest.fixture(params=[True, False], ids=["executor", "concurrent"])
+async def quiz(request: pytest.FixtureRequest) -> AsyncIterator[Quiz]:
+    api = FakeBotAPI()
+    api.add_chat(CHAT)
+    api.add_user(ALICE, "Alice")
+    api.add_user(BOB, "Bob")
+    session = FakeSession(api)
+    dp = Dispatcher()
+    if request.param:
+        executor = ChatExecutorMiddleware()
+        dp.update.outer_middleware(executor)
+        session.middleware(PollTracker(executor))
+    dp.include_router(speedy.get_router())
+    LEXICON.load()
+    speedy.build_distractors()
+
+    reset()
+    quiz = Quiz(api, Bot("123:fake", session=session), dp)
+    await quiz.command("/quiz")
+    yield quiz
+    reset()
+
+
+async def test_the_first_right_vote_scores_before_the_next_poll(quiz: Quiz) -> None:
+    first = speedy.current_poll
+    [poll] = quiz.api.calls_of("sendPoll")
+    assert poll.params["type"] == "quiz"
+    assert len(json.loads(poll.params["options"])) == config.SPEEDY_QUIZ_DISTRACTORS + 1
+
+    await quiz.vote(BOB, correct=False)
+    assert speedy.current_poll is first
+    await quiz.vote(ALICE)
+    await quiz.vote(BOB, poll=first)
+
+    assert dict(speedy.scores) == {ALICE: 1}
+    assert speedy.current_poll["id"] != first["id"]
+    sent = quiz.sent()
+    assert sent[0].startswith("The quiz has started!")
+    assert sent[1:3] == ["poll", sent[2]]
+    assert sent[2].startswith("✅ <b>Alice</b> scores a point!")
+    assert sent[2].endswith("Current standings:\nAlice: 1")
+    assert sent[3:] == ["poll"]
+    assert not quiz.api.calls_of("getChatMember")
+
+
+async def test_simultaneous_right_votes_score_once(quiz: Quiz) -> None:
+    # With latency the handler of the first vote is suspended while the second one comes in
+    quiz.api.latency = 0.01
+    poll = speedy.current_poll
+    await asyncio.gather(quiz.vote(ALICE, poll=poll), quiz.vote(BOB, poll=poll))
+
+    assert sum(speedy.scores.values()) == 1
+    assert len(quiz.api.calls_of("sendPoll")) == 2
+
+
+async def test_unanswered_rounds_time_out_until_the_quiz_stops(
+    quiz: Quiz, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(config, "SPEEDY_QUIZ_IDLE_ROUNDS", 2)
+    first = speedy.current_poll
+    word = speedy.current_word
+
+    await speedy.quiz_timeout(quiz.bot, first["id"], 0)
+    assert quiz.sent()[2] == f"⌛ Time is up! <b>{word['eng']}</b> — <b>{word['rus']}</b>"
+    assert len(quiz.api.calls_of("sendPoll")) == 2
+
+    # The timer of an answered or replaced poll does nothing
+    await speedy.quiz_timeout(quiz.bot, first["id"], 0)
+    assert len(quiz.api.calls_of("sendPoll")) == 2
+
+    await speedy.quiz_timeout(quiz.bot, speedy.current_poll["id"], 0)
+    assert not speedy.game_active
+    assert quiz.sent()[-1].startswith("Nobody has answered for a while, the quiz is over.")
+    assert len(quiz.api.calls_of("sendPoll")) == 2
+
+
+async def test_a_restored_quiz_picks_up_its_round(quiz: Quiz) -> None:
+    await quiz.vote(ALICE)
+    game = json.loads(json.dumps(speedy.dump_game()))
+    reset()
+
+    game["current_poll"]["deadline"] = time.time() - 1
+    assert await speedy.restore_game(game, quiz.bot) == 1
+    await asyncio.sleep(0.05)
+    assert quiz.sent()[-2].startswith("⌛ Time is up!")
+    assert quiz.sent()[-1] == "poll"
+
+    await quiz.command("/stop")
+    assert quiz.sent()[-1] == "The game has been stopped.\n\n<b>Leaderboard:</b>\nAlice: 1"
+
+    # A snapshot taken between rounds starts the next one right away
+    game["current_poll"] = None
+    polls = len(quiz.api.calls_of("sendPoll"))
+    assert await speedy.restore_game(game, quiz.bot) == 1
+    assert len(quiz.api.calls_of("sendPoll")) == polls + 1
+    assert speedy.current_poll is not None
@@ -0,0 +1,141 @@
+import asyncio
+import random
+
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+import pytest
+
+from aiogram import Bot, Dispatcher
+
+import config
+
+from speedy_translate import main as speedy
+from tools.fake_bot_api import FakeBotAPI, FakeSession
+from utils.lexicon import LEXICON
+
+
+CHAT, ALICE = -5, 1
+
+
+@dataclass
+class Chat:
+    api: FakeBotAPI
+    bot: Bot
+    dp: Dispatcher
+
+    async def say(self, text: str) -> None:
+        update = self.api.text_update(CHAT, ALICE, text)
+        await self.dp.feed_raw_update(self.bot, update, chat_mode=speedy.MODE_NAME)
+        # Results of the answers are posted in the background
+        await asyncio.sleep(0)
+
+    def sent(self) -> list[str]:
+        return [call.params["text"] for call in self.api.calls_of("sendMessage")]
+
+
+def reset() -> None:
+    speedy.game_active = False
+    speedy.quiz = False
+    speedy.names.clear()
+    speedy.directions.clear()
+
+
+@pytest.fixture(autouse=True)
+def lexicon() -> None:
+    speedy.get_router()
+    LEXICON.load()
+
+
+@pytest.fixture
+async def chat() -> AsyncIterator[Chat]:
+    api = FakeBotAPI()
+    api.add_chat(CHAT)
+    api.add_user(ALICE, "Alice")
+    dp = Dispatcher()
+    dp.include_router(speedy.get_router())
+
+    reset()
+    yield Chat(api, Bot("123:fake", session=FakeSession(api)), dp)
+    reset()
+
+
+def test_near_misses_get_partial_credit(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, "SPEEDY_TRANSLATE_FUZZY_CREDIT", 0.25)
+    monkeypatch.setattr(speedy, "current_answers", {"thing", "see"})
+
+    assert speedy.answer_credit("Thing!") == 1
+    assert speedy.answer_credit("thinh") == 0.25
+    assert speedy.answer_credit("thingy") == 0.25
+    assert speedy.answer_credit("thinnng") == 0
+    # Short answers have too few letters to tell a typo from another word
+    assert speedy.answer_credit("sea") == 0
+
+
+def test_real_words_are_not_typos(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(speedy, "current_answers", {"thing"})
+
+    assert LEXICON.is_answer("think")
+    assert speedy.answer_credit("think") == 0
+
+
+def test_partial_credit_can_be_turned_off(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, "SPEEDY_TRANSLATE_FUZZY_DISTANCE", 0)
+    monkeypatch.setattr(speedy, "current_answers", {"thing"})
+
+    assert speedy.answer_credit("thing") == 1
+    assert speedy.answer_credit("thinh") == 0
+
+
+async def test_direction_is_set_per_chat(chat: Chat) -> None:
+    await chat.say("/direction")
+    await chat.say("/direction sideways")
+    await chat.say("/direction  RU ")
+
+    usage = (
+        "Current direction: {}.\nChange it with /direction en, /direction ru or /direction mixed."
+    )
+    assert chat.sent() == [
+        usage.format("English → Russian"),
+        usage.format("English → Russian"),
+        "Direction set to Russian → English, starting from the next word.",
+    ]
+    assert speedy.directions == {CHAT: "ru"}
+
+    await chat.say("/direction")
+    assert chat.sent()[-1] == usage.format("Russian → English")
+
+
+async def test_russian_words_take_every_english_translation(
+    chat: Chat, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(LEXICON, "sample", lambda count, source: [("house", "дом")])
+    await chat.say("/direction ru")
+    await chat.say("/start")
+    assert chat.sent()[-1] == "The game has started!\nTranslate the word: <b>дом</b>"
+    # "home" comes from the reverse index, the dictionary pairs it with "дом" as well
+    assert {"home", "house"} <= speedy.current_answers
+
+    await chat.say("home")
+    await chat.say("House")
+    await chat.say("дом")
+
+    assert dict(speedy.scores) == {ALICE: 2}
+    assert chat.sent()[-1] == "Next word:\nTranslate: <b>дом</b>"
+
+
+async def test_mixed_rounds_ask_both_ways(chat: Chat) -> None:
+    random.seed(7)
+    await chat.say("/direction mixed")
+    await chat.say("/start")
+
+    asked = set()
+    for _ in range(20):
+        word = speedy.current_word
+        asked.add(word["direction"])
+        expected = word["eng"] if word["direction"] == "ru" else word["rus"]
+        assert speedy.answer_credit(expected) == 1
+        await chat.say(sorted(speedy.current_answers)[0])
+
+    assert asked == {"en", "ru"}
+    assert sum(speedy.scores.values()) == 20
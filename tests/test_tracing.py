@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+from pathlib import Path
+
+from utils.tracing import Tracer
+
+
+def _spans(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+async def test_spans_form_a_tree_under_the_update(tmp_path: Path) -> None:
+    tracer = Tracer(path=str(tmp_path / "spans.jsonl"), sample_rate=1.0)
+
+    with tracer.trace("update message", update_id=1):
+        with tracer.span("handler spy.cmd_startgame"):
+            tracer.record("db SELECT games", 0.0, 0.001)
+            await asyncio.create_task(asyncio.sleep(0))
+
+    tracer.flush()
+    spans = {span["name"]: span for span in _spans(tmp_path / "spans.jsonl")}
+    root, handler, db = (
+        spans["update message"],
+        spans["handler spy.cmd_startgame"],
+        spans["db SELECT games"],
+    )
+    assert root["parent_id"] is None
+    assert root["attributes"] == {"update_id": 1}
+    assert handler["parent_id"] == root["span_id"]
+    assert db["parent_id"] == handler["span_id"]
+    assert len({span["trace_id"] for span in spans.values()}) == 1
+
+
+def test_unsampled_traces_are_kept_only_when_slow(tmp_path: Path) -> None:
+    path = tmp_path / "spans.jsonl"
+    tracer = Tracer(path=str(path), sample_rate=0.0, slow_threshold=0.0)
+    with tracer.trace("slow"):
+        pass
+
+    tracer.slow_threshold = 60
+    with tracer.trace("fast"):
+        pass
+
+    tracer.flush()
+    assert [span["name"] for span in _spans(path)] == ["slow"]
+
+
+async def test_spans_of_spawned_tasks_after_the_update_are_exported(tmp_path: Path) -> None:
+    path = tmp_path / "spans.jsonl"
+    tracer = Tracer(path=str(path), sample_rate=1.0, linger=60)
+    released = asyncio.Event()
+
+    async def background() -> None:
+        await released.wait()
+        with tracer.span("api sendMessage"):
+            pass
+
+    with tracer.trace("update message"):
+        task = asyncio.create_task(background())
+
+    released.set()
+    await task
+
+    tracer.flush()
+    assert [span["name"] for span in _spans(path)] == ["update message", "api sendMessage"]
+
+
+def test_nothing_is_recorded_while_disabled() -> None:
+    tracer = Tracer(path="")
+    with tracer.trace("update message") as root, tracer.span("handler") as span:
+        assert root is None
+        assert span is None
+
+
+def test_spans_are_written_by_a_thread_until_flushed(tmp_path: Path) -> None:
+    path = tmp_path / "spans.jsonl"
+    tracer = Tracer(path=str(path), sample_rate=1.0)
+    for update_id in range(50):
+        with tracer.trace("update message", update_id=update_id):
+            pass
+    tracer.flush()
+    assert [span["attributes"]["update_id"] for span in _spans(path)] == list(range(50))
+
+    # The writer starts again after a flush
+    with tracer.trace("update message", update_id=50):
+        pass
+    tracer.flush()
+    assert len(_spans(path)) == 51
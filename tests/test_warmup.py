@@ -0,0 +1,65 @@
+import asyncio
+import threading
+
+from utils.warmup import Warmup
+
+
+async def test_modes_warm_up_in_the_background() -> None:
+    warmup = Warmup(prewarm=True)
+    release = threading.Event()
+    loaded = []
+
+    def load_lexicon() -> None:
+        release.wait(5)
+        loaded.append("lexicon")
+
+    async def migrate() -> None:
+        loaded.append("schema")
+
+    warmup.register("mode", load_lexicon)
+    warmup.register("mode", migrate)
+
+    await warmup.start()
+    assert not warmup.ready("mode")
+    assert warmup.ready("other")
+
+    waiter = asyncio.create_task(warmup.wait("mode"))
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+
+    release.set()
+    await waiter
+    assert warmup.ready("mode")
+    assert loaded == ["lexicon", "schema"]
+
+
+async def test_cold_modes_warm_up_on_first_use() -> None:
+    warmup = Warmup(prewarm=False)
+    loaded = []
+
+    async def failing() -> None:
+        raise OSError("no such file")
+
+    warmup.register("mode", failing)
+    warmup.register("mode", lambda: loaded.append("rest"))
+
+    await warmup.start()
+    await asyncio.sleep(0)
+    assert not warmup.ready("mode")
+
+    await warmup.wait("mode")
+    assert warmup.ready("mode")
+    assert loaded == ["rest"]
+
+
+async def test_warm_modes_stay_ready_after_stop() -> None:
+    warmup = Warmup(prewarm=True)
+    warmup.register("warm", lambda: None)
+    warmup.register("cold", asyncio.Event().wait)
+
+    await warmup.start()
+    await warmup.wait("warm")
+    await warmup.stop()
+
+    assert warmup.ready("warm")
+    assert not warmup.ready("cold")
@@ -0,0 +1,92 @@
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from middlewares.chat_executor import ChatExecutorMiddleware
+from utils.webhook import SECRET_HEADER, WebhookServer
+
+
+def update(update_id: int, text: str, chat_id: int = -5) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "group", "title": "Test"},
+            "from": {"id": 1, "is_bot": False, "first_name": "A"},
+            "text": text,
+        },
+    }
+
+
+async def test_webhook_queues_valid_updates_and_rejects_the_rest() -> None:
+    dp = Dispatcher()
+    handled: list[str] = []
+    release = asyncio.Event()
+
+    @dp.message()
+    async def handle(message: Message) -> None:
+        await release.wait()
+        handled.append(message.text)
+
+    server = WebhookServer(
+        dp, Bot("123:secret"), path="/webhook", secret_token="s3cret", queue_size=1, concurrency=1
+    )
+    headers = {SECRET_HEADER: "s3cret"}
+
+    async with TestClient(TestServer(server.build_app())) as client:
+        response = await client.post("/webhook", json=update(1, "one"))
+        assert response.status == 403
+        wrong = {SECRET_HEADER: "x"}
+        response = await client.post("/webhook", json=update(1, "one"), headers=wrong)
+        assert response.status == 403
+
+        response = await client.post("/webhook", data="{not json", headers=headers)
+        assert response.status == 400
+
+        response = await client.post("/webhook", json=update(1, "one"), headers=headers)
+        assert response.status == 200
+        # The first update takes the only slot, the second one waits for it and the third one
+        # fills the queue
+        await asyncio.sleep(0.01)
+        response = await client.post("/webhook", json=update(2, "two"), headers=headers)
+        assert response.status == 200
+        await asyncio.sleep(0.01)
+        response = await client.post("/webhook", json=update(3, "three"), headers=headers)
+        assert response.status == 200
+        response = await client.post("/webhook", json=update(4, "four"), headers=headers)
+        assert response.status == 503
+
+        release.set()
+        await asyncio.sleep(0.01)
+        assert handled == ["one", "two", "three"]
+
+
+async def test_a_busy_chat_does_not_hold_up_the_others() -> None:
+    dp = Dispatcher()
+    dp.update.outer_middleware(ChatExecutorMiddleware())
+    handled: list[str] = []
+    release = asyncio.Event()
+
+    @dp.message()
+    async def handle(message: Message) -> None:
+        if message.text == "slow":
+            await release.wait()
+        handled.append(message.text)
+
+    server = WebhookServer(dp, Bot("123:secret"), path="/webhook", secret_token="", concurrency=8)
+
+    async with TestClient(TestServer(server.build_app())) as client:
+        await client.post("/webhook", json=update(1, "slow", chat_id=-5))
+        # Updates queued behind the slow one in its chat don't keep the other chat waiting
+        for update_id in range(2, 6):
+            await client.post("/webhook", json=update(update_id, "spam", chat_id=-5))
+        await client.post("/webhook", json=update(6, "other", chat_id=-6))
+        await asyncio.sleep(0.01)
+        assert handled == ["other"]
+
+        release.set()
+        await asyncio.sleep(0.01)
+        assert handled == ["other", "slow", "spam", "spam", "spam", "spam"]
@@ -0,0 +1,25 @@
+import sqlite3
+
+from pathlib import Path
+
+from words_game.importer import import_dictionaries, import_words, read_files
+from words_game.work_with_dp import create_tables
+
+
+def test_word_lists_are_streamed_into_the_words_table(tmp_path: Path) -> None:
+    database = str(tmp_path / "words_game.db")
+    create_tables(database)
+    (tmp_path / "words.csv").write_text("en,ru\nApple,яблоко\npear,груша\n", encoding="utf-8")
+    (tmp_path / "words.txt").write_text("apple яблоня\nplum слива\n\n", encoding="utf-8")
+
+    report = import_words(
+        database, read_files([tmp_path / "words.csv", tmp_path / "words.txt"]), batch_size=2
+    )
+
+    assert (report.rows, report.inserted) == (4, 3)
+    with sqlite3.connect(database) as connection:
+        words = dict(connection.execute("SELECT en, ru FROM words"))
+    assert words == {"apple": "яблоко", "pear": "груша", "plum": "слива"}
+
+    # The startup import only fills an empty table
+    assert import_dictionaries(database, [tmp_path / "words.txt"]) is None
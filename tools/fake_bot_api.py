@@ -0,0 +1,498 @@
+"""Local stand-in for the subset of the Telegram Bot API used by the bot.
+
+Point the bot at it with ``BOT_API_SERVER=http://127.0.0.1:8081`` and script users, chats, messages
+and poll answers either from Python through :class:`FakeBotAPI` or over the ``/_fake/*`` control
+endpoints when it runs standalone::
+
+    $ python -m tools.fake_bot_api --port 8081 --latency 0.05 --chat-rate 1
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import time
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiohttp import web
+
+from utils.outbox import TokenBucket
+
+
+logger = logging.getLogger(__name__)
+
+LIMITED_METHODS = frozenset({"sendmessage", "editmessagetext", "sendpoll"})
+
+
+class ApiError(Exception):
+    """Error answered to the client in the Bot API format."""
+
+    def __init__(self, code: int, description: str, *, retry_after: int | None = None) -> None:
+        super().__init__(description)
+        self.code = code
+        self.description = description
+        self.retry_after = retry_after
+
+    def to_json(self) -> dict[str, Any]:
+        """Error response body."""
+        body: dict[str, Any] = {
+            "ok": False,
+            "error_code": self.code,
+            "description": self.description,
+        }
+        if self.retry_after is not None:
+            body["parameters"] = {"retry_after": self.retry_after}
+        return body
+
+
+@dataclass
+class RecordedCall:
+    """Bot API call received by the fake server."""
+
+    method: str
+    params: dict[str, Any]
+    at: float = field(default_factory=time.monotonic)
+
+
+class FakeBotAPI:
+    """Scriptable in-memory Bot API.
+
+    Parameters
+    ----------
+    latency
+        Seconds every call is delayed by.
+    rate, chat_rate
+        Global and per-chat limits on sent and edited messages per second, ``None`` disables them.
+        Calls over the limit fail with 429 and ``retry_after`` like the real API.
+    bot_id
+        Id of the bot, requests over HTTP take it from the token.
+    history
+        Number of sent messages kept per chat, ``None`` keeps all of them.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        rate: float | None = None,
+        chat_rate: float | None = None,
+        bot_id: int = 1000,
+        bot_username: str = "fake_bot",
+        history: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.history = history
+        self.rate = rate
+        self.chat_rate = chat_rate
+        self.me = {
+            "id": bot_id,
+            "is_bot": True,
+            "first_name": "Fake Bot",
+            "username": bot_username,
+            "can_join_groups": True,
+            "can_read_all_group_messages": True,
+            "supports_inline_queries": False,
+        }
+        self.calls: list[RecordedCall] = []
+        self.users: dict[int, dict[str, Any]] = {}
+        self.chats: dict[int, dict[str, Any]] = {}
+        self.sent: dict[int, dict[int, dict[str, Any]]] = {}
+        self.polls: dict[str, dict[str, Any]] = {}
+
+        self._updates: list[dict[str, Any]] = []
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._poll_ids = itertools.count(1)
+        self._callback_ids = itertools.count(1)
+        self._new_updates: asyncio.Event | None = None
+        self._bucket: TokenBucket | None = None
+        self._chat_buckets: dict[int, TokenBucket] = {}
+        self._methods = {
+            "getme": self._get_me,
+            "getupdates": self._get_updates,
+            "sendmessage": self._send_message,
+            "editmessagetext": self._edit_message_text,
+            "deletemessage": self._delete_message,
+            "sendpoll": self._send_poll,
+            "getchatmember": self._get_chat_member,
+            "answercallbackquery": self._answer_callback_query,
+        }
+
+    # Scripting
+
+    def add_user(self, user_id: int, first_name: str, username: str | None = None) -> dict:
+        """Register a user, it also gets a private chat with the bot."""
+        user = {"id": user_id, "is_bot": False, "first_name": first_name}
+        if username:
+            user["username"] = username
+        self.users[user_id] = user
+        self.chats[user_id] = {"id": user_id, "type": "private", "first_name": first_name}
+        return user
+
+    def add_chat(self, chat_id: int, title: str = "Test group", type: str = "supergroup") -> dict:
+        """Register a group chat."""
+        chat = {"id": chat_id, "type": type, "title": title}
+        self.chats[chat_id] = chat
+        return chat
+
+    def send_text(self, chat_id: int, user_id: int, text: str) -> dict:
+        """Deliver a text message from a user to the bot."""
+        return self.push_update(self.text_update(chat_id, user_id, text))
+
+    def press_button(self, chat_id: int, user_id: int, message_id: int, data: str) -> dict:
+        """Press an inline button of a message sent by the bot."""
+        return self.push_update(self.button_update(chat_id, user_id, message_id, data))
+
+    def answer_poll(self, poll_id: str, user_id: int, option_ids: list[int]) -> dict:
+        """Vote in a poll sent by the bot."""
+        return self.push_update(self.poll_answer_update(poll_id, user_id, option_ids))
+
+    def push_update(self, update: dict) -> dict:
+        """Queue an update for getUpdates."""
+        self._updates.append(update)
+        if self._new_updates is not None:
+            self._new_updates.set()
+        return update
+
+    def new_update(self, **payload: Any) -> dict:
+        """Raw update with the next update id."""
+        return {"update_id": next(self._update_ids), **payload}
+
+    def text_update(self, chat_id: int, user_id: int, text: str) -> dict:
+        """Update with a text message from a user, without queueing it."""
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": self._chat(chat_id),
+            "from": self._user(user_id),
+            "text": text,
+        }
+        if text.startswith("/"):
+            command = text.split()[0]
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+        return self.new_update(message=message)
+
+    def button_update(self, chat_id: int, user_id: int, message_id: int, data: str) -> dict:
+        """Update with an inline button press, without queueing it."""
+        message = self.sent.get(chat_id, {}).get(message_id)
+        if message is None:
+            raise KeyError(f"Message {message_id} was not sent to chat {chat_id}")
+
+        callback_query = {
+            "id": str(next(self._callback_ids)),
+            "from": self._user(user_id),
+            "chat_instance": str(chat_id),
+            "message": message,
+            "data": data,
+        }
+        return self.new_update(callback_query=callback_query)
+
+    def poll_answer_update(self, poll_id: str, user_id: int, option_ids: list[int]) -> dict:
+        """Update with a poll vote, without queueing it."""
+        poll = self.polls[poll_id]
+        for option_id in option_ids:
+            poll["options"][option_id]["voter_count"] += 1
+        poll["total_voter_count"] += 1
+
+        poll_answer = {"poll_id": poll_id, "user": self._user(user_id), "option_ids": option_ids}
+        return self.new_update(poll_answer=poll_answer)
+
+    def messages(self, chat_id: int) -> list[dict[str, Any]]:
+        """Messages the bot has sent to the chat and not deleted."""
+        return list(self.sent.get(chat_id, {}).values())
+
+    def calls_of(self, method: str) -> list[RecordedCall]:
+        """Recorded calls of a method."""
+        return [call for call in self.calls if call.method.lower() == method.lower()]
+
+    # Dispatch
+
+    async def call(self, method: str, params: dict[str, Any]) -> Any:
+        """Execute a Bot API method and return its result."""
+        self.calls.append(RecordedCall(method, params))
+
+        handler = self._methods.get(method.lower())
+        if handler is None:
+            raise ApiError(404, "Not Found")
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method.lower() in LIMITED_METHODS:
+            self._check_rate(_int(params["chat_id"]))
+
+        return await handler(params)
+
+    def build_app(self) -> web.Application:
+        """Build the aiohttp application serving the fake API and its control endpoints."""
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self._handle)
+        app.router.add_post("/_fake/user", self._control_user)
+        app.router.add_post("/_fake/chat", self._control_chat)
+        app.router.add_post("/_fake/message", self._control_message)
+        app.router.add_post("/_fake/poll_answer", self._control_poll_answer)
+        app.router.add_get("/_fake/calls", self._control_calls)
+        return app
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        params: dict[str, Any] = dict(request.query)
+        if request.content_type == "application/json":
+            params.update(await request.json())
+        elif request.can_read_body:
+            params.update(await request.post())
+
+        bot_id, _, _ = request.match_info["token"].partition(":")
+        if bot_id.isdigit():
+            self.me["id"] = int(bot_id)
+
+        try:
+            result = await self.call(request.match_info["method"], params)
+        except ApiError as e:
+            return web.json_response(e.to_json(), status=e.code)
+        except KeyError as e:
+            error = ApiError(400, f"Bad Request: parameter {e} is required")
+            return web.json_response(error.to_json(), status=400)
+        except ValueError as e:
+            error = ApiError(400, f"Bad Request: {e}")
+            return web.json_response(error.to_json(), status=400)
+
+        return web.json_response({"ok": True, "result": result})
+
+    def _check_rate(self, chat_id: int) -> None:
+        buckets = []
+        if self.rate:
+            if self._bucket is None:
+                self._bucket = TokenBucket(self.rate, self.rate)
+            buckets.append(self._bucket)
+
+        if self.chat_rate:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, 1)
+            buckets.append(bucket)
+
+        now = asyncio.get_running_loop().time()
+        if delay := max((bucket.delay(now) for bucket in buckets), default=0):
+            retry_after = max(1, round(delay))
+            raise ApiError(
+                429, f"Too Many Requests: retry after {retry_after}", retry_after=retry_after
+            )
+
+        for bucket in buckets:
+            bucket.take(now)
+
+    def _user(self, user_id: int) -> dict[str, Any]:
+        user = self.users.get(user_id)
+        if user is None:
+            raise ApiError(400, "Bad Request: user not found")
+        return user
+
+    def _chat(self, chat_id: int) -> dict[str, Any]:
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            raise ApiError(400, "Bad Request: chat not found")
+        return chat
+
+    def _store(self, chat_id: int, **payload: Any) -> dict[str, Any]:
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": self._chat(chat_id),
+            "from": self.me,
+            **{key: value for key, value in payload.items() if value is not None},
+        }
+        messages = self.sent.setdefault(chat_id, {})
+        messages[message["message_id"]] = message
+        if self.history is not None and len(messages) > self.history:
+            del messages[next(iter(messages))]
+        return message
+
+    # Methods
+
+    async def _get_me(self, params: dict[str, Any]) -> dict[str, Any]:
+        return self.me
+
+    async def _get_updates(self, params: dict[str, Any]) -> list[dict[str, Any]]:
+        offset = _int(params.get("offset", 0))
+        limit = _int(params.get("limit", 100))
+        timeout = float(params.get("timeout", 0))
+
+        if offset:
+            self._updates = [update for update in self._updates if update["update_id"] >= offset]
+
+        if not self._updates and timeout:
+            self._new_updates = asyncio.Event()
+            try:
+                async with asyncio.timeout(timeout):
+                    await self._new_updates.wait()
+            except TimeoutError:
+                pass
+            finally:
+                self._new_updates = None
+
+        return self._updates[:limit]
+
+    async def _send_message(self, params: dict[str, Any]) -> dict[str, Any]:
+        return self._store(
+            _int(params["chat_id"]),
+            text=params["text"],
+            reply_markup=_json(params.get("reply_markup")),
+        )
+
+    async def _edit_message_text(self, params: dict[str, Any]) -> dict[str, Any]:
+        chat_id = _int(params["chat_id"])
+        message = self.sent.get(chat_id, {}).get(_int(params["message_id"]))
+        if message is None:
+            raise ApiError(400, "Bad Request: message to edit not found")
+
+        reply_markup = _json(params.get("reply_markup"))
+        if message.get("text") == params["text"] and message.get("reply_markup") == reply_markup:
+            raise ApiError(400, "Bad Request: message is not modified")
+
+        message["text"] = params["text"]
+        message["edit_date"] = int(time.time())
+        message.pop("reply_markup", None)
+        if reply_markup:
+            message["reply_markup"] = reply_markup
+        return message
+
+    async def _delete_message(self, params: dict[str, Any]) -> bool:
+        messages = self.sent.get(_int(params["chat_id"]), {})
+        if messages.pop(_int(params["message_id"]), None) is None:
+            raise ApiError(400, "Bad Request: message to delete not found")
+        return True
+
+    async def _send_poll(self, params: dict[str, Any]) -> dict[str, Any]:
+        options = [
+            option if isinstance(option, str) else option["text"]
+            for option in _json(params["options"])
+        ]
+        poll_type = params.get("type") or "regular"
+        poll = {
+            "id": str(next(self._poll_ids)),
+            "question": params["question"],
+            "options": [{"text": text, "voter_count": 0} for text in options],
+            "total_voter_count": 0,
+            "is_closed": False,
+            "is_anonymous": _bool(params.get("is_anonymous", True)),
+            "type": poll_type,
+            "allows_multiple_answers": _bool(params.get("allows_multiple_answers", False)),
+        }
+        if poll_type == "quiz":
+            poll["correct_option_id"] = _int(params.get("correct_option_id", 0))
+
+        self.polls[poll["id"]] = poll
+        return self._store(_int(params["chat_id"]), poll=poll)
+
+    async def _get_chat_member(self, params: dict[str, Any]) -> dict[str, Any]:
+        self._chat(_int(params["chat_id"]))
+        return {"status": "member", "user": self._user(_int(params["user_id"]))}
+
+    async def _answer_callback_query(self, params: dict[str, Any]) -> bool:
+        return True
+
+    # Control endpoints
+
+    async def _control_user(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        return web.json_response(self.add_user(body["id"], body["first_name"], body.get("username")))
+
+    async def _control_chat(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        chat = self.add_chat(body["id"], body.get("title", "Test group"), body.get("type", "supergroup"))
+        return web.json_response(chat)
+
+    async def _control_message(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        return web.json_response(self.send_text(body["chat_id"], body["user_id"], body["text"]))
+
+    async def _control_poll_answer(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        update = self.answer_poll(body["poll_id"], body["user_id"], body["option_ids"])
+        return web.json_response(update)
+
+    async def _control_calls(self, request: web.Request) -> web.Response:
+        calls = [{"method": call.method, "params": call.params, "at": call.at} for call in self.calls]
+        return web.json_response(calls, dumps=lambda obj: json.dumps(obj, default=str))
+
+
+class FakeSession(BaseSession):
+    """Bot session that calls a :class:`FakeBotAPI` in-process instead of going over HTTP.
+
+    Parameters are prepared and responses are checked exactly like in a real session, so API
+    errors surface as the usual aiogram exceptions.
+    """
+
+    def __init__(self, api: FakeBotAPI, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.fake_api = api
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[TelegramType], timeout: int | None = None
+    ) -> TelegramType:
+        """Execute the method against the fake API."""
+        files: dict[str, Any] = {}
+        params = {}
+        for key, value in method.model_dump(warnings=False).items():
+            if (value := self.prepare_value(value, bot=bot, files=files)) is not None:
+                params[key] = value
+
+        try:
+            body = {"ok": True, "result": await self.fake_api.call(method.__api_method__, params)}
+            status_code = 200
+        except ApiError as e:
+            body, status_code = e.to_json(), e.code
+
+        response = self.check_response(
+            bot=bot, method=method, status_code=status_code, content=self.json_dumps(body)
+        )
+        return response.result
+
+    async def stream_content(self, url: str, **kwargs: Any) -> Any:
+        """Files are not supported by the fake API."""
+        raise NotImplementedError("The fake Bot API doesn't serve files")
+
+    async def close(self) -> None:
+        """Nothing to close."""
+
+
+def _int(value: Any) -> int:
+    return int(value)
+
+
+def _bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.lower() == "true"
+    return bool(value)
+
+
+def _json(value: Any) -> Any:
+    """Decode a complex parameter, form-encoded requests carry them as JSON strings."""
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every call")
+    parser.add_argument("--rate", type=float, help="global sent messages per second")
+    parser.add_argument("--chat-rate", type=float, help="sent messages per second in a chat")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    api = FakeBotAPI(latency=args.latency, rate=args.rate, chat_rate=args.chat_rate)
+    web.run_app(api.build_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Bulk import of bilingual word lists into the words_game dictionary.
+
+Files are CSV with a header or ``en ru`` lines, like ``spyfall/slovarik.txt``. They are streamed
+into the ``words`` table in large batches of a single transaction, words already in the table
+are kept::
+
+    $ python -m tools.import_words spyfall/slovarik.txt speedy_translate/dictionary.csv
+    $ python -m tools.import_words big.csv --database /tmp/words_game.db --batch-size 50000
+"""
+
+import argparse
+
+from pathlib import Path
+
+import config
+
+from words_game.importer import import_words, read_files
+from words_game.work_with_dp import create_tables
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+", type=Path, help="word lists to import")
+    parser.add_argument("--database", default=config.WORDS_GAME_DATABASE_PATH)
+    parser.add_argument("--batch-size", type=int, default=config.WORDS_GAME_IMPORT_BATCH)
+    args = parser.parse_args()
+
+    create_tables(args.database)
+    report = import_words(args.database, read_files(args.files), batch_size=args.batch_size)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,560 @@
+"""Synthetic load generator for the dispatcher.
+
+Feeds scripted chats of every game mode through the real ``master_bot`` dispatcher, with the Bot
+API replaced by an in-process :class:`~tools.fake_bot_api.FakeBotAPI` and the databases moved to
+a temporary directory, and reports throughput, handler latency, database statements and event
+loop lag::
+
+    $ python -m tools.loadgen --chats 200 --rate 500 --duration 60 --modes spy words
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from collections import Counter, deque
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+
+import config
+
+from tools.fake_bot_api import FakeBotAPI, FakeSession
+from utils.basedir import BASEDIR
+from utils.dbtrace import DBTRACE
+from utils.logs import LogPipeline
+from utils.tracing import TRACER, TracingRequestMiddleware
+
+
+logger = logging.getLogger(__name__)
+
+MODES = ("spy", "words", "wordweaver", "speedy_poll")
+CHATTER = (
+    "hmm, let me think about it",
+    "I have been there last summer",
+    "do you like it there?",
+    "that sounds suspicious",
+    "no idea, honestly",
+    "it was crowded and noisy",
+)
+TURN = re.compile(r"it's (.+?)'s turn", re.IGNORECASE)
+PLAYER_WORD = re.compile(r"^\s*• (.+?) - ", re.MULTILINE)
+SPYFALL_ROUNDS = 4
+WORDS_GAME_TURNS = 20
+HISTORY = 50
+TICK = 0.01
+LAG_INTERVAL = 0.05
+
+
+class StatementCounter:
+    """Counts SQL statements run by every sqlite3 connection, including aiosqlite ones."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._lock = threading.Lock()
+        self._connect = sqlite3.connect
+
+    def install(self) -> None:
+        """Start counting statements of connections opened from now on."""
+
+        def connect(*args: Any, **kwargs: Any) -> sqlite3.Connection:
+            connection = self._connect(*args, **kwargs)
+            connection.set_trace_callback(self._trace)
+            return connection
+
+        sqlite3.connect = connect
+
+    def uninstall(self) -> None:
+        """Stop counting statements of new connections."""
+        sqlite3.connect = self._connect
+
+    def _trace(self, statement: str) -> None:
+        with self._lock:
+            self.count += 1
+
+
+@dataclass
+class Report:
+    """Results of a load run."""
+
+    duration: float = 0.0
+    updates: int = 0
+    errors: int = 0
+    saturated: int = 0
+    statements: int = 0
+    latencies: list[float] = field(default_factory=list)
+    lags: list[float] = field(default_factory=list)
+    api_calls: Counter = field(default_factory=Counter)
+
+    def summary(self) -> dict[str, Any]:
+        """Aggregated numbers of the run."""
+        return {
+            "duration": round(self.duration, 2),
+            "updates": self.updates,
+            "throughput": round(self.updates / self.duration, 1) if self.duration else 0.0,
+            "errors": self.errors,
+            "saturated": self.saturated,
+            "latency_ms": _percentiles(self.latencies),
+            "statements": self.statements,
+            "statements_per_update": round(self.statements / self.updates, 2) if self.updates else 0.0,
+            "loop_lag_ms": _percentiles(self.lags),
+            "api_calls": dict(self.api_calls.most_common()),
+        }
+
+    def format(self) -> str:
+        """Human readable summary."""
+        summary = self.summary()
+        latency, lag = summary["latency_ms"], summary["loop_lag_ms"]
+        api_calls = ", ".join(f"{method} {count}" for method, count in summary["api_calls"].items())
+        return "\n".join(
+            [
+                f"updates          {summary['updates']} in {summary['duration']}s "
+                f"({summary['throughput']}/s), {summary['errors']} errors, "
+                f"{summary['saturated']} updates skipped with every chat busy",
+                f"handler latency  p50 {latency['p50']} ms, p99 {latency['p99']} ms, "
+                f"max {latency['max']} ms",
+                f"db statements    {summary['statements']} "
+                f"({summary['statements_per_update']} per update)",
+                f"loop lag         p50 {lag['p50']} ms, p99 {lag['p99']} ms, max {lag['max']} ms",
+                f"bot api calls    {api_calls}",
+            ]
+        )
+
+
+@dataclass
+class SyntheticChat:
+    """Group chat with scripted players."""
+
+    api: FakeBotAPI
+    chat_id: int
+    mode: str
+    users: list[dict[str, Any]]
+    rng: random.Random
+    script: Iterator[dict] | None = None
+
+    def text(self, user: dict[str, Any], text: str) -> dict:
+        """Update with a message from the user."""
+        return self.api.text_update(self.chat_id, user["id"], text)
+
+    def press(self, user: dict[str, Any], message_id: int, data: str) -> dict:
+        """Update with a button press of the user."""
+        return self.api.button_update(self.chat_id, user["id"], message_id, data)
+
+    def vote(self, poll: dict[str, Any], user: dict[str, Any]) -> dict:
+        """Update with a vote of the user in the poll."""
+        option_id = self.rng.randrange(len(poll["options"]))
+        return self.api.poll_answer_update(poll["id"], user["id"], [option_id])
+
+    def chatter(self, user: dict[str, Any] | None = None) -> str:
+        """Small talk, mentioning one of the words the bot gave the user when there are any."""
+        text = self.rng.choice(CHATTER)
+        if user is not None and (words := self.words_of(user)):
+            text = f"{text} {self.rng.choice(words)}"
+        return text
+
+    def user(self, user_id: int) -> dict[str, Any] | None:
+        """Player by id."""
+        return next((user for user in self.users if user["id"] == user_id), None)
+
+    def turn(self) -> dict[str, Any] | None:
+        """Player whose turn the bot announced last."""
+        for message in reversed(self.api.messages(self.chat_id)):
+            if match := TURN.search(message.get("text", "")):
+                name = match.group(1)
+                return next((user for user in self.users if user["first_name"] == name), None)
+        return None
+
+    def button(self, prefix: str) -> tuple[int, str] | None:
+        """Latest button with callback data starting with the prefix."""
+        for message in reversed(self.api.messages(self.chat_id)):
+            keyboard = message.get("reply_markup", {}).get("inline_keyboard", [])
+            data = [
+                button["callback_data"]
+                for row in keyboard
+                for button in row
+                if button.get("callback_data", "").startswith(prefix)
+            ]
+            if data:
+                return message["message_id"], self.rng.choice(data)
+        return None
+
+    def poll(self) -> dict[str, Any] | None:
+        """Latest poll sent to the chat."""
+        for message in reversed(self.api.messages(self.chat_id)):
+            if "poll" in message:
+                return message["poll"]
+        return None
+
+    def words_of(self, user: dict[str, Any]) -> list[str]:
+        """Words the bot privately sent to the user for the current game."""
+        for message in reversed(self.api.messages(user["id"])):
+            if words := PLAYER_WORD.findall(message.get("text", "")):
+                return words
+        return []
+
+
+def spyfall_script(chat: SyntheticChat) -> Iterator[dict]:
+    """Lobby, start, ask and answer rounds with chatter, then a vote."""
+    host, *guests = chat.users
+    while True:
+        yield chat.text(host, "/newgame")
+        for user in guests:
+            yield chat.text(user, "/join")
+        yield chat.text(host, "/startgame")
+
+        asker = chat.turn()
+        if asker is None:
+            yield chat.text(host, "/endgame")
+            continue
+
+        for _ in range(SPYFALL_ROUNDS):
+            yield chat.text(asker, "/ask")
+            if (button := chat.button("ask_")) is None:
+                break
+
+            message_id, data = button
+            target = chat.user(int(data.rsplit("_", 1)[1]))
+            yield chat.press(asker, message_id, data)
+            for speaker in (asker, target, asker, target):
+                yield chat.text(speaker, chat.chatter(speaker))
+            yield chat.text(target, "/answer")
+            asker = target
+
+        yield chat.text(host, "/vote")
+        if (poll := chat.poll()) is not None:
+            for user in chat.users:
+                yield chat.vote(poll, user)
+
+
+def words_game_script(chat: SyntheticChat, words: dict[str, list[str]]) -> Iterator[dict]:
+    """Lobby and a chain of turns, mostly valid ones."""
+    from words_game.tg_bot_only_commands import active_games
+
+    host, *guests = chat.users
+    every_word = [word for bucket in words.values() for word in bucket]
+    while True:
+        yield chat.text(host, "/newgame")
+        for user in guests:
+            yield chat.text(user, "/join")
+        yield chat.text(host, "/startgame")
+
+        for _ in range(WORDS_GAME_TURNS):
+            game = active_games.get(chat.chat_id)
+            if not game or not game.get("last_word"):
+                break
+            if (player := chat.user(game.get("current_player"))) is None:
+                break
+
+            bucket = words.get(game["last_word"][-1])
+            if bucket and chat.rng.random() < 0.8:
+                word = chat.rng.choice(bucket)
+            else:
+                word = chat.rng.choice(every_word)
+            yield chat.text(player, word)
+
+        yield chat.text(host, "/stop")
+
+
+def wordweaver_script(chat: SyntheticChat, words: list[str]) -> Iterator[dict]:
+    """Lobby, chatter while waiting and guesses of the player on turn."""
+    from wordweaver.container import CONTAINER
+
+    sessions = CONTAINER.session_adapter()
+    host, *guests = chat.users
+    while True:
+        if not sessions.has(chat.chat_id):
+            yield chat.text(host, "/start")
+            for user in guests:
+                yield chat.text(user, "/join")
+            continue
+
+        executor = sessions.get_or_create(chat.chat_id)
+        if not executor.is_started() or not executor.is_alive():
+            yield chat.text(chat.rng.choice(chat.users), chat.chatter())
+            continue
+
+        player = chat.user(executor.who().id)
+        letters = executor.what()
+        candidates = chat.rng.sample(words, min(len(words), 500))
+        guess = next(
+            (word for word in candidates if all(letter in word for letter in letters)),
+            candidates[0],
+        )
+        yield chat.text(player, guess)
+
+
+def speedy_translate_script(chat: SyntheticChat) -> Iterator[dict]:
+    """Answers to the current word, half of them right."""
+    from speedy_translate import main as speedy
+
+    while True:
+        if not speedy.game_active:
+            yield chat.text(chat.users[0], "/start")
+            continue
+
+        user = chat.rng.choice(chat.users)
+        if speedy.current_answers and chat.rng.random() < 0.5:
+            yield chat.text(user, chat.rng.choice(sorted(speedy.current_answers)))
+        else:
+            yield chat.text(user, chat.chatter())
+
+
+class LoadGenerator:
+    """Offers updates of synthetic chats to the dispatcher at a fixed rate.
+
+    Every chat has at most one update in flight, so its script can look at the outcome of the
+    previous one. When every chat is busy the offered update is skipped and counted as saturated.
+    """
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        api: FakeBotAPI,
+        chats: list[SyntheticChat],
+        *,
+        rate: float,
+        duration: float,
+        statements: StatementCounter,
+    ) -> None:
+        self.dp = dp
+        self.bot = bot
+        self.api = api
+        self.chats = chats
+        self.rate = rate
+        self.duration = duration
+        self.statements = statements
+        self.report = Report()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def run(self) -> Report:
+        """Run the load and return its report."""
+        loop = asyncio.get_running_loop()
+        idle = deque(self.chats)
+        monitor = asyncio.create_task(self._watch_lag())
+
+        started = last = loop.time()
+        deadline = started + self.duration
+        statements = self.statements.count
+        credit = 0.0
+
+        while (now := loop.time()) < deadline:
+            credit += (now - last) * self.rate
+            last = now
+
+            while credit >= 1 and idle:
+                credit -= 1
+                self._feed(idle.popleft(), idle)
+
+            if credit >= 1:
+                self.report.saturated += int(credit)
+                credit -= int(credit)
+
+            await asyncio.sleep(TICK)
+
+        if self._tasks:
+            await asyncio.wait(self._tasks)
+
+        monitor.cancel()
+        self.report.duration = loop.time() - started
+        self.report.statements = self.statements.count - statements
+        self.report.api_calls.update(call.method for call in self.api.calls)
+        return self.report
+
+    def _feed(self, chat: SyntheticChat, idle: deque) -> None:
+        try:
+            update = next(chat.script)
+        except Exception as e:
+            # A broken script takes its chat out of the run instead of stopping the run
+            self.report.errors += 1
+            logger.error(f"Script of chat {chat.chat_id} ({chat.mode}) failed: {e}")
+            return
+
+        task = asyncio.create_task(self._handle(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda _: idle.append(chat))
+
+    async def _handle(self, update: dict) -> None:
+        started = time.perf_counter()
+        try:
+            await self.dp.feed_raw_update(self.bot, update)
+        except Exception as e:
+            self.report.errors += 1
+            logger.debug(f"Update {update['update_id']} failed: {e}")
+        finally:
+            self.report.updates += 1
+            self.report.latencies.append(time.perf_counter() - started)
+
+    async def _watch_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.report.lags.append(loop.time() - started - LAG_INTERVAL)
+
+
+def isolate_storage(directory: Path) -> None:
+    """Point every database of the bot to the directory, keeping the words_game dictionary."""
+    words_game_database = directory / "words_game.db"
+    shutil.copyfile(config.WORDS_GAME_DATABASE_PATH, words_game_database)
+
+    config.SPYFALL_DATABASE_PATH = str(directory / "spy_game.db")
+    config.WORDS_GAME_DATABASE_PATH = str(words_game_database)
+    config.CHAT_MODES_DATABASE_PATH = str(directory / "chat_modes.db")
+
+    from utils.snapshot import SNAPSHOT
+
+    SNAPSHOT.path = str(directory / "snapshot.json")
+
+    from dependency_injector.providers import Singleton
+
+    from wordweaver.adapters.user import UserAdapter
+    from wordweaver.container import CONTAINER
+
+    CONTAINER.user_adapter.override(Singleton(UserAdapter, path=directory / "wordweaver.db"))
+
+
+def build_chats(
+    api: FakeBotAPI, modes: list[str], count: int, users: int, rng: random.Random
+) -> list[SyntheticChat]:
+    """Register chats and players with the fake API and assign the chats their modes."""
+    from chat_modes import CHAT_MODES
+
+    with sqlite3.connect(config.WORDS_GAME_DATABASE_PATH) as connection:
+        words_by_letter: dict[str, list[str]] = {}
+        for (word,) in connection.execute("SELECT en FROM words"):
+            if word:
+                words_by_letter.setdefault(word[0].lower(), []).append(word.lower())
+
+    english = (BASEDIR / "data" / "english.txt").read_text().split()
+
+    scripts: dict[str, Callable[[SyntheticChat], Iterator[dict]]] = {
+        "spy": spyfall_script,
+        "words": lambda chat: words_game_script(chat, words_by_letter),
+        "wordweaver": lambda chat: wordweaver_script(chat, english),
+        "speedy_poll": speedy_translate_script,
+    }
+
+    chats = []
+    for index in range(count):
+        chat_id = -1_000_000_000 - index
+        mode = modes[index % len(modes)]
+        api.add_chat(chat_id, title=f"Load {index}")
+        players = [
+            api.add_user(
+                chat_id * -100 + number, f"Player{number}", username=f"player_{index}_{number}"
+            )
+            for number in range(users)
+        ]
+        CHAT_MODES.set(chat_id, mode)
+
+        chat = SyntheticChat(api, chat_id, mode, players, random.Random(rng.random()))
+        chat.script = scripts[mode](chat)
+        chats.append(chat)
+
+    return chats
+
+
+async def run(args: argparse.Namespace) -> Report:
+    """Set up an isolated bot and run the load against it."""
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        isolate_storage(Path(directory))
+        statements = StatementCounter()
+        statements.install()
+
+        import master_bot
+        import wordweaver.telegram
+
+        wordweaver.telegram.LOBBY_TIMEOUT = timedelta(seconds=args.lobby)
+
+        api = FakeBotAPI(latency=args.latency, history=HISTORY)
+        session = FakeSession(api)
+        if args.trace:
+            DBTRACE.install()
+            TRACER.path, TRACER.sample_rate = str(args.trace), args.trace_sample
+            session.middleware(TracingRequestMiddleware())
+        bot = Bot(token="123456:loadgen", session=session)
+        dp = master_bot.build_dispatcher(bot)
+
+        await dp.emit_startup(bot=bot, dispatcher=dp, bots=[bot])
+        try:
+            chats = build_chats(api, args.modes, args.chats, args.users, rng)
+            generator = LoadGenerator(
+                dp,
+                bot,
+                api,
+                chats,
+                rate=args.rate,
+                duration=args.duration,
+                statements=statements,
+            )
+            return await generator.run()
+        finally:
+            await dp.emit_shutdown(bot=bot, dispatcher=dp, bots=[bot])
+            statements.uninstall()
+            DBTRACE.uninstall()
+            TRACER.flush()
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p99": 0.0, "max": 0.0}
+
+    ordered = sorted(values)
+
+    def pick(quantile: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(quantile * len(ordered)))] * 1000, 2)
+
+    return {"p50": pick(0.5), "p99": pick(0.99), "max": round(ordered[-1] * 1000, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=100, help="number of synthetic chats")
+    parser.add_argument("--rate", type=float, default=200, help="offered updates per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run")
+    parser.add_argument("--users", type=int, default=4, help="players per chat, at least 3")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--latency", type=float, default=0.0, help="Bot API latency in seconds")
+    parser.add_argument("--lobby", type=float, default=1.0, help="wordweaver lobby seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--trace", type=Path, help="append spans of the updates to this file")
+    parser.add_argument("--trace-sample", type=float, default=1.0, help="share of traced updates")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    if args.users < 3:
+        parser.error("spyfall needs at least 3 players per chat")
+
+    # Through the same pipeline as the bot, so logging costs the event loop what it does there
+    logs = LogPipeline(level=args.log_level, format="text")
+    logs.install()
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        logs.close()
+
+    if args.json:
+        print(json.dumps(report.summary(), indent=2))
+    else:
+        print(report.format())
+
+
+if __name__ == "__main__":
+    main()
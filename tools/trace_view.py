@@ -0,0 +1,254 @@
+"""Viewer for the spans exported by ``utils.tracing``.
+
+Lists the slowest traces, draws the waterfall of one of them, sums up where the time goes per
+stage, or converts the traces for flame graph tools::
+
+    $ python -m tools.trace_view traces.jsonl --top 10 -k cmd_startgame
+    $ python -m tools.trace_view traces.jsonl --waterfall 3f2a
+    $ python -m tools.trace_view traces.jsonl --stages -k cmd_startgame
+    $ python -m tools.trace_view traces.jsonl --collapsed > stacks.txt
+    $ python -m tools.trace_view traces.jsonl --chrome trace.json
+"""
+
+import argparse
+import json
+
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+
+BAR_WIDTH = 50
+
+
+@dataclass
+class Node:
+    """Span with its children."""
+
+    span: dict[str, Any]
+    children: list["Node"] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        """Name of the span."""
+        return self.span["name"]
+
+    @property
+    def start(self) -> float:
+        """UNIX start time of the span."""
+        return self.span["start"]
+
+    @property
+    def duration(self) -> float:
+        """Duration of the span in seconds."""
+        return self.span["duration"]
+
+    @property
+    def self_time(self) -> float:
+        """Time not covered by the children, concurrent children may cover all of it."""
+        return max(0.0, self.duration - sum(child.duration for child in self.children))
+
+    def walk(self, depth: int = 0) -> Iterator[tuple[int, "Node"]]:
+        """The span and its descendants in start order with their depth."""
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+
+@dataclass
+class Trace:
+    """Spans of one update."""
+
+    trace_id: str
+    roots: list[Node]
+
+    @property
+    def root(self) -> Node:
+        """Earliest root span, the update itself unless it was lost."""
+        return self.roots[0]
+
+    @property
+    def start(self) -> float:
+        """Start of the trace."""
+        return min(node.start for node in self.roots)
+
+    @property
+    def duration(self) -> float:
+        """Time from the first span start to the last span end."""
+        return max(node.start + node.duration for _, node in self.walk()) - self.start
+
+    def walk(self) -> Iterator[tuple[int, Node]]:
+        """All spans of the trace in start order with their depth."""
+        for root in self.roots:
+            yield from root.walk()
+
+    def matches(self, keyword: str | None) -> bool:
+        """Whether any span name contains the keyword."""
+        return keyword is None or any(keyword in node.name for _, node in self.walk())
+
+
+def load(paths: Iterable[Path]) -> list[Trace]:
+    """Read spans and assemble them into traces."""
+    spans: dict[str, dict[int, dict[str, Any]]] = defaultdict(dict)
+    for path in paths:
+        with path.open(encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    span = json.loads(line)
+                    spans[span["trace_id"]][span["span_id"]] = span
+
+    traces = []
+    for trace_id, by_id in spans.items():
+        nodes = {span_id: Node(span) for span_id, span in by_id.items()}
+        roots = []
+        for node in nodes.values():
+            parent = nodes.get(node.span["parent_id"])
+            (parent.children if parent else roots).append(node)
+        for node in nodes.values():
+            node.children.sort(key=lambda child: child.start)
+        roots.sort(key=lambda root: (root.span["parent_id"] is not None, root.start))
+        traces.append(Trace(trace_id, roots))
+
+    return traces
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:9.1f} ms"
+
+
+def _describe(node: Node) -> str:
+    attributes = node.span.get("attributes") or {}
+    details = [f"{key}={value}" for key, value in attributes.items() if key != "statement"]
+    if node.span.get("error"):
+        details.append(f"error={node.span['error']}")
+    return f"{node.name} {' '.join(details)}".rstrip()
+
+
+def top(traces: list[Trace], count: int) -> str:
+    """Traces with the slowest updates, background work they left behind is not counted."""
+    lines = []
+    for trace in sorted(traces, key=lambda trace: -trace.root.duration)[:count]:
+        handlers = [node.name for _, node in trace.walk() if node.name.startswith("handler ")]
+        lines.append(
+            f"{trace.trace_id}  {_ms(trace.root.duration)}  {_describe(trace.root)}  "
+            f"{', '.join(handlers) or '-'}"
+        )
+    return "\n".join(lines)
+
+
+def waterfall(trace: Trace, *, statements: bool = False) -> str:
+    """Spans of the trace as bars on a shared timeline."""
+    scale = BAR_WIDTH / (trace.duration or 1)
+    lines = [f"trace {trace.trace_id}, {trace.duration * 1000:.1f} ms"]
+    for depth, node in trace.walk():
+        offset = int((node.start - trace.start) * scale)
+        width = max(1, round(node.duration * scale))
+        bar = " " * offset + "█" * min(width, BAR_WIDTH - offset)
+        lines.append(f"{bar:<{BAR_WIDTH}} {_ms(node.duration)}  {'  ' * depth}{_describe(node)}")
+        if statements and (statement := (node.span.get("attributes") or {}).get("statement")):
+            lines.append(f"{'':<{BAR_WIDTH}} {'':12}  {'  ' * (depth + 1)}{statement}")
+    return "\n".join(lines)
+
+
+def stages(traces: list[Trace]) -> str:
+    """Self time per span name over all traces, the biggest first."""
+    totals: dict[str, list[float]] = defaultdict(list)
+    for trace in traces:
+        for _, node in trace.walk():
+            totals[node.name].append(node.self_time)
+
+    lines = [f"{'self total':>12} {'count':>7} {'mean':>12} {'max':>12}  stage"]
+    for name, times in sorted(totals.items(), key=lambda item: -sum(item[1])):
+        lines.append(
+            f"{_ms(sum(times))} {len(times):7d} {_ms(sum(times) / len(times))} "
+            f"{_ms(max(times))}  {name}"
+        )
+    return "\n".join(lines)
+
+
+def collapsed(traces: list[Trace]) -> str:
+    """Self time per span stack in the folded format of flamegraph.pl and speedscope."""
+    stacks: dict[str, float] = defaultdict(float)
+
+    def fold(node: Node, path: tuple[str, ...]) -> None:
+        path = (*path, node.name.replace(";", ","))
+        stacks[";".join(path)] += node.self_time
+        for child in node.children:
+            fold(child, path)
+
+    for trace in traces:
+        for root in trace.roots:
+            fold(root, ())
+
+    # Weights are microseconds, flame graph tools expect integers
+    return "\n".join(f"{stack} {round(weight * 1e6)}" for stack, weight in stacks.items() if weight)
+
+
+def chrome(traces: list[Trace]) -> dict[str, Any]:
+    """Traces in the Chrome trace event format, for Perfetto or chrome://tracing."""
+    events = []
+    for thread, trace in enumerate(sorted(traces, key=lambda trace: trace.start), start=1):
+        events.append(
+            {
+                "ph": "M",
+                "name": "thread_name",
+                "pid": 1,
+                "tid": thread,
+                "args": {"name": f"{_describe(trace.root)} {trace.trace_id}"},
+            }
+        )
+        for _, node in trace.walk():
+            events.append(
+                {
+                    "ph": "X",
+                    "name": node.name,
+                    "pid": 1,
+                    "tid": thread,
+                    "ts": node.start * 1e6,
+                    "dur": node.duration * 1e6,
+                    "args": node.span.get("attributes") or {},
+                }
+            )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", type=Path, help="JSONL files with spans")
+    parser.add_argument("-k", dest="keyword", help="only traces with a span name containing it")
+    view = parser.add_mutually_exclusive_group()
+    view.add_argument("--top", type=int, default=20, help="list the N slowest traces")
+    view.add_argument("--waterfall", metavar="TRACE", help="draw a trace, 'slowest' for the slowest")
+    view.add_argument("--stages", action="store_true", help="self time per stage")
+    view.add_argument("--collapsed", action="store_true", help="folded stacks for flame graphs")
+    view.add_argument("--chrome", type=Path, metavar="PATH", help="write a Chrome trace file")
+    parser.add_argument("--statements", action="store_true", help="show SQL in the waterfall")
+    args = parser.parse_args()
+
+    traces = [trace for trace in load(args.paths) if trace.matches(args.keyword)]
+    if not traces:
+        parser.exit(1, "No traces found\n")
+
+    if args.waterfall:
+        if args.waterfall == "slowest":
+            found = [max(traces, key=lambda trace: trace.root.duration)]
+        else:
+            found = [trace for trace in traces if trace.trace_id.startswith(args.waterfall)]
+        if not found:
+            parser.exit(1, f"No trace {args.waterfall}\n")
+        print(waterfall(found[0], statements=args.statements))
+    elif args.stages:
+        print(stages(traces))
+    elif args.collapsed:
+        print(collapsed(traces))
+    elif args.chrome:
+        args.chrome.write_text(json.dumps(chrome(traces)))
+        print(f"Wrote {len(traces)} traces to {args.chrome}")
+    else:
+        print(top(traces, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import asyncio
+import bisect
+import time
+
+from dataclasses import dataclass, field
+from typing import Any, Final
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+
+import config
+
+from utils.metrics import Collector, Metrics, Sample, histogram_samples
+from utils.tracing import TracingRequestMiddleware
+
+
+LATENCY_BUCKETS: Final[tuple[float, ...]] = (
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+@dataclass
+class MethodStats:
+    """Latency and error counters of a single Bot API method."""
+
+    calls: int = 0
+    errors: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    def observe(self, elapsed: float, *, failed: bool) -> None:
+        """Record a finished call."""
+        self.calls += 1
+        self.errors += failed
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+
+
+class StatsMiddleware(BaseRequestMiddleware):
+    """Records latency and errors of every Bot API call per method."""
+
+    def __init__(self) -> None:
+        self.methods: dict[str, MethodStats] = {}
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Any:
+        stats = self.methods.setdefault(method.__api_method__, MethodStats())
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = await make_request(bot, method)
+            failed = False
+            return response
+        finally:
+            stats.observe(time.perf_counter() - started, failed=failed)
+
+    def export(self, metrics: Metrics) -> None:
+        """Expose the stats in the metrics registry."""
+        metrics.register(
+            Collector(
+                "bot_api_request_duration_seconds",
+                "Time spent on Bot API calls per method.",
+                "histogram",
+                self._duration_samples,
+            )
+        )
+        metrics.register(
+            Collector(
+                "bot_api_request_errors",
+                "Failed Bot API calls per method.",
+                "counter",
+                self._error_samples,
+            )
+        )
+
+    def _duration_samples(self) -> list[Sample]:
+        return [
+            sample
+            for method, stats in self.methods.items()
+            for sample in histogram_samples(
+                "bot_api_request_duration_seconds",
+                {"method": method},
+                LATENCY_BUCKETS,
+                stats.buckets,
+                stats.total,
+            )
+        ]
+
+    def _error_samples(self) -> list[Sample]:
+        return [
+            ("bot_api_request_errors_total", {"method": method}, stats.errors)
+            for method, stats in self.methods.items()
+        ]
+
+
+class SingleflightMiddleware(BaseRequestMiddleware):
+    """Shares one in-flight request between identical calls of idempotent methods."""
+
+    def __init__(self, methods: tuple[str, ...] = config.BOT_API_SINGLEFLIGHT_METHODS) -> None:
+        self.methods = frozenset(methods)
+        self._inflight: dict[tuple[int, str, str], asyncio.Future] = {}
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Any:
+        if method.__api_method__ not in self.methods:
+            return await make_request(bot, method)
+
+        key = (bot.id, method.__api_method__, method.model_dump_json(exclude_none=True))
+        if future := self._inflight.get(key):
+            return await asyncio.shield(future)
+
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            response = await make_request(bot, method)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Followers get the error, the leader re-raises it, nobody else has to retrieve it
+            future.exception()
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            del self._inflight[key]
+
+
+class TunedSession(AiohttpSession):
+    """Aiohttp session with a sized connection pool and per-method request timeouts.
+
+    Requests go to ``api_server`` instead of Telegram when it is set, e.g. to a local
+    ``tools.fake_bot_api`` server.
+    """
+
+    def __init__(
+        self,
+        *,
+        limit: int = config.BOT_API_POOL_LIMIT,
+        timeout: float = config.BOT_API_TIMEOUT,
+        method_timeouts: dict[str, float] = config.BOT_API_METHOD_TIMEOUTS,
+        api_server: str = config.BOT_API_SERVER,
+    ) -> None:
+        api = TelegramAPIServer.from_base(api_server) if api_server else PRODUCTION
+        super().__init__(api=api, limit=limit, timeout=timeout)
+        self.method_timeouts = method_timeouts
+
+        self.singleflight = SingleflightMiddleware()
+        self.stats = StatsMiddleware()
+        self.middleware(self.singleflight)
+        self.middleware(self.stats)
+        self.middleware(TracingRequestMiddleware())
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[TelegramType], timeout: int | None = None
+    ) -> TelegramType:
+        """Make the request with the timeout configured for its method."""
+        if timeout is None:
+            timeout = self.method_timeouts.get(method.__api_method__)
+        return await super().make_request(bot, method, timeout)
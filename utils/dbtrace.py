@@ -0,0 +1,241 @@
+import contextvars
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Final
+
+import aiosqlite
+
+import config
+
+from utils.tracing import TRACER
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UpdateQueries:
+    """Statements executed while an update was handled."""
+
+    update_id: int | None
+    count: int = 0
+    elapsed: float = 0.0
+    statements: Counter[str] = field(default_factory=Counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, statement: str, elapsed: float) -> None:
+        """Count a statement, it may come from an aiosqlite thread."""
+        with self._lock:
+            self.count += 1
+            self.elapsed += elapsed
+            self.statements[statement] += 1
+
+    def repeated(self, limit: int) -> list[tuple[str, int]]:
+        """Statements executed more than ``limit`` times, the usual sign of an N+1 loop."""
+        return [(statement, count) for statement, count in self.statements.items() if count > limit]
+
+
+CURRENT_UPDATE: Final[contextvars.ContextVar[UpdateQueries | None]] = contextvars.ContextVar(
+    "dbtrace_update", default=None
+)
+
+
+STATEMENT_TABLE: Final[re.Pattern] = re.compile(
+    r"\b(?:FROM|INTO|UPDATE(?:\s+OR\s+\w+)?)\s+(\w+)", re.IGNORECASE
+)
+
+
+def statement_name(statement: str) -> str:
+    """Short name of a statement: its kind and the table it works on, like ``SELECT games``."""
+    kind = statement.split(maxsplit=1)[0].upper() if statement.strip() else "?"
+    if match := STATEMENT_TABLE.search(statement):
+        return f"{kind} {match.group(1)}"
+    return kind
+
+
+def _shorten(statement: str, limit: int = 200) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[: limit - 3] + "..."
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that reports the time of every statement it executes."""
+
+    def execute(self, sql: str, parameters: Any = (), /) -> "TracedCursor":
+        """Execute a statement."""
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            DBTRACE.record(self.connection, sql, time.perf_counter() - started)
+
+    def executemany(self, sql: str, parameters: Any, /) -> "TracedCursor":
+        """Execute a statement for every set of parameters."""
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            DBTRACE.record(self.connection, sql, time.perf_counter() - started)
+
+    def executescript(self, script: str, /) -> "TracedCursor":
+        """Execute a script of statements."""
+        started = time.perf_counter()
+        try:
+            return super().executescript(script)
+        finally:
+            DBTRACE.record(self.connection, script, time.perf_counter() - started)
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose cursors are traced, including the ones behind ``execute`` shortcuts."""
+
+    def cursor(self, factory: type[sqlite3.Cursor] = TracedCursor) -> sqlite3.Cursor:
+        """Open a cursor."""
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:
+        """Execute a statement on a new cursor."""
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, parameters: Any, /) -> sqlite3.Cursor:
+        """Execute a statement for every set of parameters on a new cursor."""
+        return self.cursor().executemany(sql, parameters)
+
+    def executescript(self, script: str, /) -> sqlite3.Cursor:
+        """Execute a script of statements on a new cursor."""
+        return self.cursor().executescript(script)
+
+
+class DBTrace:
+    """Times every SQLite statement of the process and attributes it to the current update.
+
+    Once installed, ``sqlite3.connect`` opens traced connections. aiosqlite opens its connections
+    through it as well, and its calls carry the context of the awaiting task into the worker
+    thread, so statements of both libraries are counted against the update in ``CURRENT_UPDATE``.
+    Statements slower than ``slow_threshold`` seconds are logged, and updates that go over the
+    query ``budget`` or repeat a statement more than ``repeat_limit`` times are flagged.
+    """
+
+    def __init__(
+        self,
+        *,
+        slow_threshold: float = config.DB_SLOW_QUERY_THRESHOLD,
+        budget: int = config.DB_QUERY_BUDGET,
+        repeat_limit: int = config.DB_REPEAT_LIMIT,
+    ) -> None:
+        self.slow_threshold = slow_threshold
+        self.budget = budget
+        self.repeat_limit = repeat_limit
+        self._connect = None
+        self._execute = None
+
+    @property
+    def installed(self) -> bool:
+        """Whether connections are traced."""
+        return self._connect is not None
+
+    def install(self) -> None:
+        """Trace connections opened from now on."""
+        if self.installed:
+            return
+
+        self._connect = connect = sqlite3.connect
+        self._execute = execute = aiosqlite.Connection._execute
+
+        @wraps(connect)
+        def traced_connect(database: Any, *args: Any, **kwargs: Any) -> sqlite3.Connection:
+            kwargs.setdefault("factory", TracedConnection)
+            connection = connect(database, *args, **kwargs)
+            if isinstance(connection, TracedConnection):
+                connection.database = str(database)
+            return connection
+
+        @wraps(execute)
+        async def traced_execute(
+            connection: aiosqlite.Connection, fn: Any, *args: Any, **kwargs: Any
+        ) -> Any:
+            context = contextvars.copy_context()
+            return await execute(connection, context.run, fn, *args, **kwargs)
+
+        sqlite3.connect = traced_connect
+        aiosqlite.Connection._execute = traced_execute
+
+    def uninstall(self) -> None:
+        """Stop tracing new connections."""
+        if self.installed:
+            sqlite3.connect = self._connect
+            aiosqlite.Connection._execute = self._execute
+            self._connect = self._execute = None
+
+    @contextmanager
+    def track(self, update_id: int | None) -> Iterator[UpdateQueries]:
+        """Attribute statements executed inside the block to the update."""
+        queries = UpdateQueries(update_id)
+        token = CURRENT_UPDATE.set(queries)
+        try:
+            yield queries
+        finally:
+            CURRENT_UPDATE.reset(token)
+
+    def record(self, connection: sqlite3.Connection, statement: str, elapsed: float) -> None:
+        """Account a finished statement."""
+        database = getattr(connection, "database", "?")
+        if TRACER.recording:
+            TRACER.record(
+                f"db {statement_name(statement)}",
+                time.time() - elapsed,
+                elapsed,
+                statement=_shorten(statement, 1000),
+                database=database,
+            )
+
+        queries = CURRENT_UPDATE.get()
+        if queries is not None:
+            queries.record(statement, elapsed)
+
+        if elapsed >= self.slow_threshold:
+            logger.warning(
+                "Slow query took %.1f ms on %s in update %s: %s",
+                elapsed * 1000,
+                database,
+                queries.update_id if queries else "-",
+                _shorten(statement),
+            )
+
+    def check(self, queries: UpdateQueries, handler: str) -> None:
+        """Flag an update that went over the query budget or repeated a statement."""
+        if queries.count > self.budget:
+            top = ", ".join(
+                f"{count}x {_shorten(statement, 80)}"
+                for statement, count in queries.statements.most_common(3)
+            )
+            logger.warning(
+                "Update %s handled by %s ran %d queries in %.1f ms, over the budget of %d: %s",
+                queries.update_id,
+                handler,
+                queries.count,
+                queries.elapsed * 1000,
+                self.budget,
+                top,
+            )
+
+        for statement, count in queries.repeated(self.repeat_limit):
+            logger.warning(
+                "Update %s handled by %s ran the same query %d times: %s",
+                queries.update_id,
+                handler,
+                count,
+                _shorten(statement),
+            )
+
+
+DBTRACE: Final[DBTrace] = DBTrace()
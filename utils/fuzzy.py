@@ -0,0 +1,80 @@
+from collections import Counter
+from collections.abc import Iterable
+
+
+def levenshtein(first: str, second: str, limit: int) -> int:
+    """Edit distance of the strings, or ``limit + 1`` as soon as it is known to exceed ``limit``."""
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    if len(first) > len(second):
+        first, second = second, first
+
+    previous = list(range(len(first) + 1))
+    for row, char in enumerate(second, 1):
+        current = [row]
+        for column, other in enumerate(first, 1):
+            current.append(
+                min(
+                    previous[column] + 1,
+                    current[column - 1] + 1,
+                    previous[column - 1] + (char != other),
+                )
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def trigrams(word: str) -> set[str]:
+    """Trigrams of the word padded with spaces, so short words have them too."""
+    padded = f"  {word} "
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Finds the words within a small edit distance of a string without comparing it to each.
+
+    An edit changes at most three trigrams of a word, so a word within ``max_distance`` edits
+    shares all but ``3 * max_distance`` of the query's trigrams. Only those candidates, counted
+    from the posting lists of the query's trigrams, get their edit distance computed. Queries too
+    short for that bound still need a shared trigram, so no search compares against every word.
+    """
+
+    def __init__(self, words: Iterable[str] = ()) -> None:
+        self._words: list[str] = []
+        self._ids: dict[str, int] = {}
+        self._postings: dict[str, list[int]] = {}
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._ids
+
+    def add(self, word: str) -> None:
+        """Index the word."""
+        if word in self._ids:
+            return
+        self._ids[word] = len(self._words)
+        for trigram in trigrams(word):
+            self._postings.setdefault(trigram, []).append(len(self._words))
+        self._words.append(word)
+
+    def search(self, word: str, max_distance: int) -> list[tuple[int, str]]:
+        """Indexed words within ``max_distance`` edits of the word, closest first."""
+        query = trigrams(word)
+        # Short words may miss a few matches sharing no trigram with them rather than scan all
+        needed = max(len(query) - 3 * max_distance, 1)
+        shared: Counter[int] = Counter()
+        for trigram in query:
+            shared.update(self._postings.get(trigram, ()))
+        candidates = [self._words[index] for index, count in shared.items() if count >= needed]
+
+        matches = []
+        for candidate in candidates:
+            if (distance := levenshtein(word, candidate, max_distance)) <= max_distance:
+                matches.append((distance, candidate))
+        return sorted(matches)
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+
+from collections.abc import Awaitable, Callable
+from typing import Final
+
+import config
+
+from utils.warmup import WARMUP
+
+
+logger = logging.getLogger(__name__)
+
+Sweeper = Callable[[], Awaitable[int]]
+
+
+class Janitor:
+    """Periodically reclaims abandoned game sessions.
+
+    Every game mode registers a sweeper: a coroutine function that expires its stale sessions,
+    evicts their in-memory state and returns how many sessions it reclaimed.
+    """
+
+    def __init__(self, interval: float = config.JANITOR_INTERVAL) -> None:
+        self.interval = interval
+        self.reclaimed: dict[str, int] = {}
+        self._sweepers: dict[str, Sweeper] = {}
+        self._task: asyncio.Task | None = None
+
+    def register(self, name: str, sweeper: Sweeper) -> None:
+        """Register a sweeper under the game mode name."""
+        self._sweepers[name] = sweeper
+        self.reclaimed.setdefault(name, 0)
+
+    async def sweep(self) -> dict[str, int]:
+        """Run every sweeper once and report how many sessions each of them reclaimed."""
+        report = {}
+        for name, sweeper in self._sweepers.items():
+            # A cold mode has nothing to reclaim yet and may have no tables to sweep
+            if not WARMUP.ready(name):
+                report[name] = 0
+                continue
+            try:
+                report[name] = await sweeper()
+            except Exception as e:
+                logger.error(f"Janitor sweep for {name} failed: {e}")
+                report[name] = 0
+
+            self.reclaimed[name] += report[name]
+
+        total = sum(report.values())
+        level = logging.INFO if total else logging.DEBUG
+        logger.log(level, "Janitor reclaimed %d stale sessions: %s", total, report)
+
+        return report
+
+    async def start(self) -> None:
+        """Start the background sweep loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the background sweep loop."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.sweep()
+
+
+JANITOR: Final[Janitor] = Janitor()
@@ -0,0 +1,189 @@
+import csv
+import logging
+import random
+import re
+import sys
+import threading
+import time
+
+from collections.abc import Callable, Iterable, Iterator
+from os import PathLike
+from typing import Final
+
+import config
+
+from utils.basedir import BASEDIR
+from utils.fuzzy import TrigramIndex
+
+
+logger = logging.getLogger(__name__)
+
+Pair = tuple[str, str]
+PairSource = Callable[[], Iterable[Pair]]
+
+VARIANT_SEPARATORS: Final[re.Pattern] = re.compile(r"[,;/]")
+
+
+def normalize(text: str) -> str:
+    """Answer in the form it is compared in: lowercase, single spaces, ``ё`` spelled as ``е``."""
+    return " ".join(text.lower().replace("ё", "е").split()).strip(".!?")
+
+
+def variants(translation: str) -> list[str]:
+    """Normalized variants of a translation like ``оставить, покинуть``."""
+    parts = VARIANT_SEPARATORS.split(translation)
+    return [variant for part in parts if (variant := normalize(part))]
+
+
+def read_pairs(path: str | PathLike) -> Iterator[Pair]:
+    """English words and their translations from a CSV file with a header or ``en ru`` lines."""
+    path = BASEDIR / path
+    with path.open(encoding="utf-8") as file:
+        if path.suffix == ".csv":
+            rows = csv.reader(file)
+            next(rows, None)
+        else:
+            rows = (line.split(" ", 1) for line in file)
+        for row in rows:
+            if len(row) == 2:
+                yield row[0].strip(), row[1].strip()
+
+
+class Lexicon:
+    """Words of every game mode, loaded once per process.
+
+    It holds the English word list used for validation and the English to Russian translations
+    of the dictionaries the modes register with :meth:`register`, with a reverse index from the
+    normalized Russian variants to the English words and a trigram index of both for typo
+    tolerant answer checks. Translations of all sources are merged, so a word is checked the same
+    way in every game, while :meth:`sample` draws from the dictionary of one source only. Every
+    string is interned, a word known to several sources is stored once.
+    """
+
+    def __init__(self, english_path: str | PathLike = config.LEXICON_ENGLISH_PATH) -> None:
+        self.english_path = english_path
+        self._sources: dict[str, PairSource] = {}
+        self._english: frozenset[str] = frozenset()
+        self._english_words: tuple[str, ...] = ()
+        self._translations: dict[str, tuple[str, ...]] = {}
+        self._reverse: dict[str, tuple[str, ...]] = {}
+        self._answers = TrigramIndex()
+        self._pairs: dict[str, tuple[Pair, ...]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def register(self, source: str, load: PairSource) -> None:
+        """Register a dictionary, ``load`` returns its pairs of English words and translations.
+
+        A dictionary registered after the lexicon has been loaded is loaded right away.
+        """
+        self._sources[source] = load
+        if self._loaded:
+            with self._lock:
+                self._merge(source)
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the words are loaded."""
+        return self._loaded
+
+    def load(self) -> None:
+        """Load the word list and every registered dictionary unless they are loaded already."""
+        with self._lock:
+            if self._loaded:
+                return
+
+            started = time.perf_counter()
+            with (BASEDIR / self.english_path).open(encoding="utf-8") as file:
+                words = dict.fromkeys(word for line in file if (word := self._normalize(line)))
+            self._english = frozenset(words)
+            self._english_words = tuple(words)
+            for source in self._sources:
+                self._merge(source)
+
+            self._loaded = True
+            logger.info(
+                "Loaded %d English words and %d translations in %.2f s",
+                len(self._english),
+                len(self._translations),
+                time.perf_counter() - started,
+            )
+
+    def _merge(self, source: str) -> None:
+        pairs: dict[str, str] = {}
+        try:
+            for english, russian in self._sources[source]():
+                english = self._normalize(english or "")
+                russian = sys.intern((russian or "").strip())
+                if english and russian:
+                    pairs.setdefault(english, russian)
+                    known = self._translations.get(english, ())
+                    if normalize(russian) not in map(normalize, known):
+                        self._translations[english] = (*known, russian)
+                        self._index_reverse(english, russian)
+        except Exception as e:
+            # The other dictionaries are still usable
+            logger.error(f"Failed to load the {source} dictionary: {e}")
+        self._pairs[source] = tuple(pairs.items())
+
+    def _index_reverse(self, english: str, russian: str) -> None:
+        self._answers.add(english)
+        for variant in variants(russian):
+            variant = sys.intern(variant)
+            self._answers.add(variant)
+            known = self._reverse.get(variant, ())
+            if english not in known:
+                self._reverse[variant] = (*known, english)
+
+    def __contains__(self, word: str) -> bool:
+        """Whether the word is English, words of the dictionaries count too."""
+        self._ensure_loaded()
+        word = word.strip().lower()
+        return word in self._english or word in self._translations
+
+    def translate(self, word: str) -> tuple[str, ...]:
+        """Russian translations of the English word, empty if it has none."""
+        self._ensure_loaded()
+        return self._translations.get(word.strip().lower(), ())
+
+    def english_for(self, russian: str) -> tuple[str, ...]:
+        """English words that translate to the Russian word, of every dictionary."""
+        self._ensure_loaded()
+        return self._reverse.get(normalize(russian), ())
+
+    def is_answer(self, text: str) -> bool:
+        """Whether the text is an English word or a Russian translation of the dictionaries."""
+        self._ensure_loaded()
+        return normalize(text) in self._answers
+
+    def near(self, text: str, max_distance: int) -> list[str]:
+        """Dictionary words and translations within ``max_distance`` edits, closest first."""
+        self._ensure_loaded()
+        return [word for _, word in self._answers.search(normalize(text), max_distance)]
+
+    def random_english(self) -> str:
+        """Random word of the English word list, dictionaries are not drawn from."""
+        self._ensure_loaded()
+        return random.choice(self._english_words)
+
+    def sample(self, count: int, source: str) -> list[Pair]:
+        """Random distinct words of the source's dictionary with their translations."""
+        self._ensure_loaded()
+        pairs = self._pairs.get(source, ())
+        return random.sample(pairs, min(count, len(pairs)))
+
+    def pairs(self, source: str) -> tuple[Pair, ...]:
+        """Every word of the source's dictionary with its translation."""
+        self._ensure_loaded()
+        return self._pairs.get(source, ())
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+    @staticmethod
+    def _normalize(word: str) -> str:
+        return sys.intern(word.strip().lower())
+
+
+LEXICON: Final[Lexicon] = Lexicon()
@@ -0,0 +1,184 @@
+import contextvars
+import json
+import logging
+import queue
+import random
+import sys
+import time
+
+from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener
+from typing import IO, Any, Final
+
+import config
+
+from utils.metrics import METRICS
+
+
+CONTEXT_FIELDS: Final[tuple[str, ...]] = ("update_id", "chat_id", "mode")
+
+DROPPED = METRICS.counter(
+    "bot_log_records_dropped", "Log records dropped because the log queue was full."
+)
+
+
+@dataclass
+class LogContext:
+    """Update that is being handled, attached to the records logged meanwhile.
+
+    It is shared by the tasks the update spawns, so the mode filled in on the way down to the
+    handler shows up in all of their records.
+    """
+
+    update_id: int | None = None
+    chat_id: int | None = None
+    mode: str | None = None
+
+
+LOG_CONTEXT: Final[contextvars.ContextVar[LogContext | None]] = contextvars.ContextVar(
+    "log_context", default=None
+)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the fields of the current :class:`LogContext` onto records."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = LOG_CONTEXT.get()
+        for name in CONTEXT_FIELDS:
+            setattr(record, name, getattr(context, name) if context else None)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a share of the chatty records of some loggers.
+
+    ``rates`` maps logger names to the share of their records below ``level`` to keep, the
+    longest matching name wins, so ``{"spyfall": 0.1}`` also samples ``spyfall.handlers``.
+    Warnings and errors are always kept. Kept records carry their ``sample_rate``.
+    """
+
+    def __init__(self, rates: dict[str, float], *, level: int = logging.WARNING) -> None:
+        super().__init__()
+        self.rates = rates
+        self.level = level
+        self._cache: dict[str, float] = {}
+
+    def rate(self, name: str) -> float:
+        """Share of the records of the logger to keep."""
+        if name not in self._cache:
+            matches = [
+                prefix for prefix in self.rates if name == prefix or name.startswith(f"{prefix}.")
+            ]
+            self._cache[name] = self.rates[max(matches, key=len)] if matches else 1.0
+        return self._cache[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.level:
+            return True
+        rate = self.rate(record.name)
+        if rate < 1.0:
+            if random.random() >= rate:
+                return False
+            record.sample_rate = rate
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as JSON lines, with the update context when there is one."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in (*CONTEXT_FIELDS, "sample_rate"):
+            if (value := getattr(record, name, None)) is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records over to the writer thread and drops them when it falls behind.
+
+    Only the message is rendered on the calling thread, formatting and I/O are left to the
+    listener. There is a single process on the other end, so records are not pickled.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments may change after the call returns, so the message is rendered right away
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DROPPED.inc()
+
+
+class LogPipeline:
+    """Logging that never blocks the event loop on slow output.
+
+    Records get the update context and sampling on the calling thread, then go through a
+    bounded queue to a thread that formats and writes them. Records that don't fit in the queue
+    are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        *,
+        level: str = config.LOG_LEVEL,
+        format: str = config.LOG_FORMAT,
+        sampling: dict[str, float] = config.LOG_SAMPLING,
+        queue_size: int = config.LOG_QUEUE_SIZE,
+    ) -> None:
+        self.level = level
+        self.format = format
+        self.sampling = sampling
+        self.queue_size = queue_size
+        self._listener: QueueListener | None = None
+        self._handler: QueueHandler | None = None
+
+    def install(self, stream: IO[str] | None = None) -> None:
+        """Route the records of every logger through the pipeline."""
+        if self._listener is not None:
+            return
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        if self.format == "json":
+            output.setFormatter(JsonFormatter())
+        else:
+            output.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+
+        self._handler = NonBlockingQueueHandler(queue.Queue(self.queue_size))
+        self._handler.addFilter(SamplingFilter(self.sampling))
+        self._handler.addFilter(ContextFilter())
+
+        root = logging.getLogger()
+        root.setLevel(self.level)
+        root.addHandler(self._handler)
+        self._listener = QueueListener(self._handler.queue, output, respect_handler_level=True)
+        self._listener.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write out the queued records and detach the pipeline."""
+        if self._listener is None:
+            return
+
+        logging.getLogger().removeHandler(self._handler)
+        deadline = time.monotonic() + timeout
+        while not self._handler.queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # A writer stuck on the output is a daemon thread and is left behind
+        if self._handler.queue.empty():
+            self._listener.stop()
+        self._listener = self._handler = None
+
+
+LOGS: Final[LogPipeline] = LogPipeline()
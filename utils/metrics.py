@@ -0,0 +1,285 @@
+import asyncio
+import bisect
+import inspect
+import logging
+import time
+
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Final, TypeVar
+
+from aiohttp import web
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE: Final[str] = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = tuple[str, ...]
+Sample = tuple[str, dict[str, str], float]
+GaugeFunction = Callable[[], float | Awaitable[float]]
+MetricType = TypeVar("MetricType", bound="Metric")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_sample(name: str, labels: dict[str, str], value: float) -> str:
+    if labels:
+        pairs = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+        name = f"{name}{{{pairs}}}"
+    return f"{name} {_format_bound(value)}"
+
+
+def _format_bound(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(value)
+
+
+class Metric:
+    """Metric family with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Labels = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+
+    def _labels(self, values: Labels) -> dict[str, str]:
+        if len(values) != len(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {values}")
+        return dict(zip(self.labels, values, strict=True))
+
+    async def samples(self) -> Iterable[Sample]:
+        """Current samples of the family."""
+        return ()
+
+
+class Counter(Metric):
+    """Monotonically growing count per label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Labels = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Add to the count of the label values."""
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    async def samples(self) -> Iterable[Sample]:
+        """Current samples of the family."""
+        return [
+            (f"{self.name}_total", self._labels(labels), value)
+            for labels, value in self.values.items()
+        ]
+
+
+class Gauge(Metric):
+    """Value that goes up and down, either set directly or read from a function on scrape."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Labels = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self.values: dict[Labels, float] = {}
+        self.functions: dict[Labels, GaugeFunction] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        """Set the value of the label values."""
+        self.values[labels] = value
+
+    def track(self, *labels: str, function: GaugeFunction) -> None:
+        """Read the value of the label values from a plain or async function on every scrape."""
+        self.functions[labels] = function
+
+    async def samples(self) -> Iterable[Sample]:
+        """Current samples of the family."""
+        values = dict(self.values)
+        for labels, function in self.functions.items():
+            try:
+                value = function()
+                if inspect.isawaitable(value):
+                    value = await value
+            except Exception as e:
+                logger.warning(f"Gauge {self.name}{labels} failed: {e}")
+                continue
+            values[labels] = value
+
+        return [(self.name, self._labels(labels), value) for labels, value in values.items()]
+
+
+class Histogram(Metric):
+    """Distribution of observed values per label values."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Labels = (),
+        *,
+        buckets: tuple[float, ...] = config.METRICS_LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+        self.counts: dict[Labels, list[int]] = {}
+        self.sums: dict[Labels, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record a value of the label values."""
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+            self.sums[labels] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    async def samples(self) -> Iterable[Sample]:
+        """Current samples of the family."""
+        return [
+            sample
+            for labels, counts in self.counts.items()
+            for sample in histogram_samples(
+                self.name, self._labels(labels), self.buckets, counts, self.sums[labels]
+            )
+        ]
+
+
+def histogram_samples(
+    name: str, labels: dict[str, str], buckets: tuple[float, ...], counts: list[int], total: float
+) -> list[Sample]:
+    """Samples of a histogram from per-bucket counts, the last count being above every bucket."""
+    samples = []
+    cumulative = 0
+    for bound, count in zip((*buckets, float("inf")), counts, strict=True):
+        cumulative += count
+        samples.append((f"{name}_bucket", {**labels, "le": _format_bound(bound)}, cumulative))
+    samples.append((f"{name}_sum", labels, total))
+    samples.append((f"{name}_count", labels, cumulative))
+    return samples
+
+
+class Collector(Metric):
+    """Metric family whose samples are produced by a function on every scrape."""
+
+    def __init__(
+        self, name: str, documentation: str, kind: str, collect: Callable[[], Iterable[Sample]]
+    ) -> None:
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.collect = collect
+
+    async def samples(self) -> Iterable[Sample]:
+        """Current samples of the family."""
+        return self.collect()
+
+
+class Metrics:
+    """Registry of the bot metrics, served in the Prometheus text format.
+
+    Besides the registered metrics it samples the event loop lag, and serves ``/metrics`` on
+    ``port`` when one is configured.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str = config.METRICS_HOST,
+        port: int = config.METRICS_PORT,
+        lag_interval: float = config.METRICS_LAG_INTERVAL,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.lag_interval = lag_interval
+        self._metrics: dict[str, Metric] = {}
+        self._lag_task: asyncio.Task | None = None
+        self._runner: web.AppRunner | None = None
+
+        self.loop_lag = self.gauge(
+            "bot_event_loop_lag_seconds", "Delay of the event loop waking up a sleeping task."
+        )
+
+    def register(self, metric: MetricType) -> MetricType:
+        """Add a metric to the registry, or return the registered one with the same name."""
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labels: Labels = ()) -> Counter:
+        """Registered counter."""
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Labels = ()) -> Gauge:
+        """Registered gauge."""
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Labels = (),
+        *,
+        buckets: tuple[float, ...] = config.METRICS_LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Registered histogram, of latencies unless other buckets are given."""
+        return self.register(Histogram(name, documentation, labels, buckets=buckets))
+
+    async def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            samples = await metric.samples()
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(_format_sample(*sample) for sample in samples)
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Serve the metrics."""
+        return web.Response(body=await self.render(), headers={"Content-Type": CONTENT_TYPE})
+
+    def build_app(self) -> web.Application:
+        """Build the aiohttp application serving the metrics."""
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        return app
+
+    async def start(self) -> None:
+        """Start sampling the loop lag and serving the metrics if a port is configured."""
+        if self._lag_task is None:
+            self._lag_task = asyncio.create_task(self._sample_lag())
+
+        if self.port and self._runner is None:
+            self._runner = web.AppRunner(self.build_app(), access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, self.host, self.port).start()
+            logger.info("Serving metrics on %s:%d/metrics", self.host, self.port)
+
+    async def stop(self) -> None:
+        """Stop sampling and serving."""
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _sample_lag(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.lag_interval)
+            self.loop_lag.set(max(0.0, time.perf_counter() - started - self.lag_interval))
+
+
+METRICS: Final[Metrics] = Metrics()
+
+ACTIVE_SESSIONS: Final[Gauge] = METRICS.gauge(
+    "bot_active_sessions", "Game sessions currently held by a mode.", ("mode",)
+)
+SCHEDULED_TIMERS: Final[Gauge] = METRICS.gauge(
+    "bot_scheduled_timers", "Background timers currently scheduled by a mode.", ("mode",)
+)
@@ -0,0 +1,277 @@
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import logging
+
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Final
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import Message
+
+import config
+
+from utils.tracing import TRACER
+
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_LIMIT: Final[int] = 4096
+
+
+class Priority(IntEnum):
+    """Delivery lane of a message, lower goes first."""
+
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = asyncio.get_running_loop().time()
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available."""
+        self._refill(now)
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def full(self, now: float) -> bool:
+        """Check that the bucket has refilled completely."""
+        self._refill(now)
+        return self._tokens >= self.capacity
+
+    def take(self, now: float) -> None:
+        """Consume a token."""
+        self._refill(now)
+        self._tokens -= 1
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+@dataclass(order=True)
+class _Item:
+    priority: int
+    seq: int
+    bot: Bot = field(compare=False)
+    text: str = field(compare=False)
+    kwargs: dict[str, Any] = field(compare=False)
+    coalesce: bool = field(compare=False)
+    futures: list[asyncio.Future] = field(compare=False, default_factory=list)
+    # Delivery runs in the context of the sender, so its API call lands in the sender's trace
+    context: contextvars.Context = field(compare=False, default_factory=contextvars.copy_context)
+
+
+@dataclass
+class _Lane:
+    bucket: TokenBucket
+    items: list[_Item] = field(default_factory=list)
+    blocked_until: float = 0.0
+    busy: bool = False
+
+
+class Outbox:
+    """Outbound message queue shared by all game modes.
+
+    Messages are sent through a global and a per-chat token bucket, so bursts are smoothed out
+    instead of hitting Telegram flood limits. Within a chat, higher priority lanes go first and
+    ``TelegramRetryAfter`` pauses the chat and retries the message. Coalescable texts queued for
+    the same chat are merged into a single message.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: float = config.OUTBOX_RATE,
+        burst: float = config.OUTBOX_BURST,
+        chat_rate: float = config.OUTBOX_CHAT_RATE,
+        chat_burst: float = config.OUTBOX_CHAT_BURST,
+        drain_timeout: float = config.OUTBOX_DRAIN_TIMEOUT,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.drain_timeout = drain_timeout
+        self._lanes: dict[int, _Lane] = {}
+        self._seq = itertools.count()
+        self._bucket: TokenBucket | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._deliveries: set[asyncio.Task] = set()
+
+    async def send(
+        self,
+        bot: Bot,
+        chat_id: int,
+        text: str,
+        *,
+        priority: Priority = Priority.NORMAL,
+        coalesce: bool = False,
+        **kwargs: Any,
+    ) -> Message:
+        """Queue a message and wait until it is delivered."""
+        if self._task is None:
+            return await bot.send_message(chat_id, text, **kwargs)
+
+        with TRACER.span("outbox", chat_id=chat_id, priority=Priority(priority).name):
+            future = asyncio.get_running_loop().create_future()
+            item = _Item(priority, next(self._seq), bot, text, kwargs, coalesce, [future])
+
+            lane = self._lanes.get(chat_id)
+            if lane is None:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst)
+                lane = self._lanes[chat_id] = _Lane(bucket)
+
+            heapq.heappush(lane.items, item)
+            self._wakeup.set()
+
+            return await future
+
+    def post(self, bot: Bot, chat_id: int, text: str, **kwargs: Any) -> None:
+        """Queue a message without waiting for it, delivery errors are logged."""
+        task = asyncio.create_task(self.send(bot, chat_id, text, **kwargs))
+        self._deliveries.add(task)
+        task.add_done_callback(self._log_failure)
+
+    @property
+    def pending(self) -> int:
+        """Number of queued messages."""
+        return sum(len(lane.items) for lane in self._lanes.values())
+
+    async def start(self) -> None:
+        """Start the delivery loop."""
+        if self._task is None:
+            self._bucket = TokenBucket(self.rate, self.burst)
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Deliver what is queued within the drain timeout and stop the delivery loop."""
+        if self._task is None:
+            return
+
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout(self.drain_timeout):
+                # Posted messages are counted too, they may not have reached their lane yet
+                while (
+                    self.pending
+                    or self._deliveries
+                    or any(lane.busy for lane in self._lanes.values())
+                ):
+                    await asyncio.sleep(0.05)
+
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+        for lane in self._lanes.values():
+            for item in lane.items:
+                for future in item.futures:
+                    future.cancel()
+        self._lanes.clear()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            chat_id, wait = self._next_ready(now)
+
+            if chat_id is None:
+                self._wakeup.clear()
+                with contextlib.suppress(TimeoutError):
+                    async with asyncio.timeout(wait):
+                        await self._wakeup.wait()
+                continue
+
+            if delay := self._bucket.delay(now):
+                await asyncio.sleep(delay)
+                continue
+
+            lane = self._lanes[chat_id]
+            self._bucket.take(now)
+            lane.bucket.take(now)
+            lane.busy = True
+
+            item = self._pop(lane)
+            task = asyncio.create_task(self._deliver(chat_id, lane, item), context=item.context)
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+
+    def _next_ready(self, now: float) -> tuple[int | None, float | None]:
+        """Chat whose next message can go out now, or how long to wait for one."""
+        best, best_item, wait = None, None, None
+
+        for chat_id, lane in list(self._lanes.items()):
+            if lane.busy:
+                continue
+
+            if not lane.items:
+                if lane.bucket.full(now):
+                    del self._lanes[chat_id]
+                continue
+
+            delay = max(lane.bucket.delay(now), lane.blocked_until - now)
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+            elif best_item is None or lane.items[0] < best_item:
+                best, best_item = chat_id, lane.items[0]
+
+        return best, wait
+
+    @staticmethod
+    def _pop(lane: _Lane) -> _Item:
+        item = heapq.heappop(lane.items)
+
+        while (
+            item.coalesce
+            and lane.items
+            and lane.items[0].coalesce
+            and lane.items[0].bot is item.bot
+            and lane.items[0].kwargs == item.kwargs
+            and len(item.text) + len(lane.items[0].text) + 2 <= MESSAGE_LIMIT
+        ):
+            following = heapq.heappop(lane.items)
+            item.text += "\n\n" + following.text
+            item.futures.extend(following.futures)
+
+        return item
+
+    async def _deliver(self, chat_id: int, lane: _Lane, item: _Item) -> None:
+        try:
+            message = await item.bot.send_message(chat_id, item.text, **item.kwargs)
+        except TelegramRetryAfter as e:
+            logger.warning(f"Flood control in chat {chat_id}, retrying in {e.retry_after}s")
+            lane.blocked_until = asyncio.get_running_loop().time() + e.retry_after
+            heapq.heappush(lane.items, item)
+        except Exception as e:
+            for future in item.futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in item.futures:
+                if not future.done():
+                    future.set_result(message)
+        finally:
+            lane.busy = False
+            self._wakeup.set()
+
+    def _log_failure(self, task: asyncio.Task) -> None:
+        self._deliveries.discard(task)
+        if not task.cancelled() and (exception := task.exception()):
+            logger.error(f"Error delivering queued message: {exception}")
+
+
+OUTBOX: Final[Outbox] = Outbox()
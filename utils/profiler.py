@@ -0,0 +1,141 @@
+import asyncio
+import sys
+import threading
+import time
+
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import FrameType
+from typing import Final
+
+import aiosqlite
+
+import config
+
+
+Frame = str
+Stack = tuple[Frame, ...]
+
+# Frames where a thread waits for work rather than doing it
+IDLE_FRAMES: tuple[str, ...] = ("select (selectors.py", "wait (threading.py", "get (queue.py")
+
+
+def _frame_label(frame: FrameType) -> Frame:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def _stack(frame: FrameType | None) -> Stack:
+    frames = []
+    while frame is not None:
+        frames.append(_frame_label(frame))
+        frame = frame.f_back
+    return tuple(reversed(frames))
+
+
+@dataclass
+class Profile:
+    """Stacks sampled from the profiled threads, outermost frame first."""
+
+    interval: float
+    duration: float = 0.0
+    samples: int = 0
+    stacks: Counter[tuple[str, Stack]] = field(default_factory=Counter)
+
+    def add(self, thread: str, stack: Stack) -> None:
+        """Count a sampled stack of a thread."""
+        self.stacks[thread, stack] += 1
+
+    def collapsed(self) -> str:
+        """Stacks in the folded format of flamegraph.pl and speedscope, weighted by samples."""
+        lines = [
+            ";".join((thread, *(frame.replace(";", ",") for frame in stack))) + f" {count}"
+            for (thread, stack), count in self.stacks.most_common()
+        ]
+        return "\n".join(lines) + "\n"
+
+    def hot_functions(self, count: int) -> list[tuple[Frame, int, int]]:
+        """Busiest functions as ``(frame, self samples, total samples)``, idle waits left out."""
+        own: Counter[Frame] = Counter()
+        total: Counter[Frame] = Counter()
+        for (_, stack), samples in self.stacks.items():
+            if not stack or stack[-1].startswith(IDLE_FRAMES):
+                continue
+            own[stack[-1]] += samples
+            for frame in set(stack):
+                total[frame] += samples
+        return [(frame, samples, total[frame]) for frame, samples in own.most_common(count)]
+
+    def summary(self, count: int = config.PROFILER_TOP) -> str:
+        """Plain text report with the hot functions and the share of busy samples per thread."""
+        busy: Counter[str] = Counter()
+        seen: Counter[str] = Counter()
+        for (thread, stack), samples in self.stacks.items():
+            seen[thread] += samples
+            if stack and not stack[-1].startswith(IDLE_FRAMES):
+                busy[thread] += samples
+
+        lines = [f"{self.samples} samples over {self.duration:.1f}s every {self.interval * 1000:g} ms"]
+        for thread, samples in seen.most_common():
+            lines.append(f"{thread}: busy in {busy[thread] / samples:.0%} of samples")
+
+        lines.append("")
+        lines.append(" self%  total%  function")
+        for frame, own, total in self.hot_functions(count):
+            share = max(1, self.samples)
+            lines.append(f"{own / share:6.1%} {total / share:7.1%}  {frame}")
+        return "\n".join(lines)
+
+
+class SamplingProfiler:
+    """Periodically samples the stacks of the event loop thread and the aiosqlite threads.
+
+    Sampling reads ``sys._current_frames`` from a separate thread, so the profiled code is not
+    instrumented and only pays for the GIL hand-offs, a few hundred per second.
+    """
+
+    def __init__(self, *, interval: float = config.PROFILER_INTERVAL) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Whether a profile is being taken."""
+        return self._lock.locked()
+
+    @staticmethod
+    def _threads(loop_thread: int) -> dict[int, str]:
+        threads = {loop_thread: "event-loop"}
+        for thread in threading.enumerate():
+            if isinstance(thread, aiosqlite.Connection) and thread.ident is not None:
+                threads[thread.ident] = "aiosqlite"
+        return threads
+
+    async def profile(self, duration: float) -> Profile:
+        """Profile the running loop and the aiosqlite threads for ``duration`` seconds."""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already being taken")
+        try:
+            return await asyncio.to_thread(self.run, duration, threading.get_ident())
+        finally:
+            self._lock.release()
+
+    def run(self, duration: float, loop_thread: int) -> Profile:
+        """Sample for ``duration`` seconds in the calling thread, which must not be profiled."""
+        profile = Profile(self.interval)
+        started = time.perf_counter()
+        deadline = started + duration
+        while (now := time.perf_counter()) < deadline:
+            threads = self._threads(loop_thread)
+            for ident, frame in sys._current_frames().items():
+                if name := threads.get(ident):
+                    profile.add(name, _stack(frame))
+            profile.samples += 1
+            time.sleep(max(0.0, self.interval - (time.perf_counter() - now)))
+
+        profile.duration = time.perf_counter() - started
+        return profile
+
+
+PROFILER: Final[SamplingProfiler] = SamplingProfiler()
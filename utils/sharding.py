@@ -0,0 +1,269 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import socket
+import sys
+
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import SendPoll, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import Message, TelegramObject, Update
+
+import config
+
+from utils.metrics import METRICS
+from utils.outbox import OUTBOX
+from utils.snapshot import SNAPSHOT
+from utils.warmup import WARMUP
+
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+def shard_of(chat_id: int, workers: int) -> int:
+    """Worker that owns the chat."""
+    return abs(chat_id) % workers
+
+
+def chat_condition(column: str = "chat_id") -> tuple[str, tuple[int, ...]]:
+    """SQL condition and parameters selecting the rows of chats owned by this worker.
+
+    Outside of a sharded worker every chat is owned, so the condition always holds.
+    """
+    if config.SHARD_INDEX < 0:
+        return "1", ()
+    return f"abs({column}) % ? = ?", (config.SHARD_WORKERS, config.SHARD_INDEX)
+
+
+async def _write(writer: asyncio.StreamWriter, message: dict[str, Any]) -> None:
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+
+@dataclass
+class _Worker:
+    index: int
+    process: asyncio.subprocess.Process | None = None
+    writer: asyncio.StreamWriter | None = None
+    reader_task: asyncio.Task | None = None
+    ready: asyncio.Future | None = None
+
+
+class ShardFront(BaseMiddleware):
+    """Receives updates and forwards each of them to the worker process that owns its chat.
+
+    Workers run the full dispatcher, each one for its share of the chats, so per-chat order and
+    in-memory game state stay in one process. The front talks to every worker over a Unix socket
+    pair with newline-delimited JSON: updates go down, and workers report the polls they send, so
+    that chatless poll answers reach the worker that runs the poll. Other chatless updates are
+    sharded by their sender.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = config.SHARD_WORKERS,
+        poll_cache: int = config.SHARD_POLL_CACHE,
+        ready_timeout: float = config.SHARD_READY_TIMEOUT,
+        stop_timeout: float = config.SHARD_STOP_TIMEOUT,
+    ) -> None:
+        self.workers = workers
+        self.poll_cache = poll_cache
+        self.ready_timeout = ready_timeout
+        self.stop_timeout = stop_timeout
+        self.update_types: list[str] = []
+        self._workers: list[_Worker] = []
+        self._polls: OrderedDict[str, int] = OrderedDict()
+        self._stopping = False
+
+    def setup(self, dp: Dispatcher) -> None:
+        """Register the middleware on the front dispatcher, which has no handlers of its own."""
+        dp.update.outer_middleware(self)
+
+    async def start(self) -> None:
+        """Spawn the workers and wait until they are ready to take updates."""
+        self._workers = [_Worker(index) for index in range(self.workers)]
+        # The first worker creates and migrates the databases alone, the rest start together
+        await self._spawn(self._workers[0])
+        await asyncio.gather(*(self._spawn(worker) for worker in self._workers[1:]))
+        logger.info("Started %d shard workers", self.workers)
+
+    async def stop(self) -> None:
+        """Close the update streams and wait for the workers to finish what they have."""
+        self._stopping = True
+        for worker in self._workers:
+            if worker.writer is not None:
+                worker.writer.close()
+
+        for worker in self._workers:
+            try:
+                async with asyncio.timeout(self.stop_timeout):
+                    await worker.process.wait()
+            except TimeoutError:
+                logger.warning("Shard worker %d did not stop in time, killing it", worker.index)
+                worker.process.kill()
+                await worker.process.wait()
+            if worker.reader_task is not None:
+                worker.reader_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await worker.reader_task
+
+    def route(self, update: Update, data: dict[str, Any]) -> int:
+        """Worker the update is forwarded to."""
+        if chat := data.get("event_chat"):
+            return shard_of(chat.id, self.workers)
+        if update.poll_answer and update.poll_answer.poll_id in self._polls:
+            return self._polls[update.poll_answer.poll_id]
+        if user := data.get("event_from_user"):
+            return shard_of(user.id, self.workers)
+        return shard_of(update.update_id, self.workers)
+
+    async def __call__(
+        self,
+        handler: Handler,
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        worker = self._workers[self.route(event, data)]
+        if worker.writer is None or worker.writer.is_closing():
+            logger.warning(
+                "Shard worker %d is down, update %d is dropped", worker.index, event.update_id
+            )
+            return None
+
+        # Nothing is awaited before the write, so updates reach a worker in the order they came
+        payload = event.model_dump_json(exclude_unset=True, by_alias=True)
+        worker.writer.write(payload.encode() + b"\n")
+        await worker.writer.drain()
+        return None
+
+    async def _spawn(self, worker: _Worker) -> None:
+        front, child = socket.socketpair()
+        env = {
+            **os.environ,
+            "SHARD_WORKERS": str(self.workers),
+            "SHARD_INDEX": str(worker.index),
+            "SHARD_FD": str(child.fileno()),
+        }
+        try:
+            # Workers get their own session, so Ctrl+C reaches only the front, which stops them
+            worker.process = await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-m",
+                "master_bot",
+                env=env,
+                pass_fds=(child.fileno(),),
+                start_new_session=True,
+            )
+        finally:
+            child.close()
+
+        reader, worker.writer = await asyncio.open_unix_connection(sock=front)
+        worker.ready = asyncio.get_running_loop().create_future()
+        worker.reader_task = asyncio.create_task(self._listen(worker, reader))
+        async with asyncio.timeout(self.ready_timeout):
+            await worker.ready
+
+    async def _listen(self, worker: _Worker, reader: asyncio.StreamReader) -> None:
+        while line := await reader.readline():
+            message = json.loads(line)
+            if "poll_id" in message:
+                self._polls[message["poll_id"]] = worker.index
+                while len(self._polls) > self.poll_cache:
+                    self._polls.popitem(last=False)
+            elif "ready" in message:
+                self.update_types = sorted({*self.update_types, *message["ready"]})
+                worker.ready.set_result(None)
+
+        worker.writer.close()
+        if self._stopping:
+            return
+
+        code = await worker.process.wait()
+        if not worker.ready.done():
+            worker.ready.set_exception(
+                RuntimeError(f"Shard worker {worker.index} exited with code {code} on startup")
+            )
+            return
+
+        logger.error("Shard worker %d exited with code %s, restarting it", worker.index, code)
+        worker.reader_task = None
+        try:
+            await self._spawn(worker)
+        except Exception as e:
+            logger.error(f"Failed to restart shard worker {worker.index}: {e}")
+
+
+class PollReporter(BaseRequestMiddleware):
+    """Tells the front which worker sent a poll, so that answers to it are routed back here."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Any:
+        result = await make_request(bot, method)
+        if isinstance(method, SendPoll) and isinstance(result, Message) and result.poll:
+            await _write(self.writer, {"poll_id": result.poll.id})
+        return result
+
+
+async def _feed(dp: Dispatcher, bot: Bot, update: Update) -> None:
+    try:
+        await dp.feed_update(bot, update)
+    except Exception as e:
+        logger.error(f"Error handling update {update.update_id}: {e}")
+
+
+async def run_worker(dp: Dispatcher, bot: Bot, fd: int = config.SHARD_FD) -> None:
+    """Handle the updates the front sends over the socket until it closes the stream."""
+    reader, writer = await asyncio.open_unix_connection(sock=socket.socket(fileno=fd))
+    bot.session.middleware(PollReporter(writer))
+
+    # The global Bot API limit is shared by the workers, per-chat limits hold as they are
+    OUTBOX.rate = OUTBOX.rate / config.SHARD_WORKERS
+    OUTBOX.burst = max(1.0, OUTBOX.burst / config.SHARD_WORKERS)
+    if METRICS.port:
+        METRICS.port += config.SHARD_INDEX + 1
+    if SNAPSHOT.path:
+        path = Path(SNAPSHOT.path)
+        SNAPSHOT.path = str(path.with_stem(f"{path.stem}-{config.SHARD_INDEX}"))
+
+    await dp.emit_startup(bot=bot, dispatcher=dp, bots=[bot])
+    if config.SHARD_INDEX == 0:
+        # The other workers are spawned once this one is ready, so the schemas are created once
+        await WARMUP.wait_all()
+    await _write(writer, {"ready": dp.resolve_used_update_types()})
+    logger.info("Shard worker %d of %d is ready", config.SHARD_INDEX, config.SHARD_WORKERS)
+
+    tasks: set[asyncio.Task] = set()
+    try:
+        while line := await reader.readline():
+            update = Update.model_validate_json(line, context={"bot": bot})
+            # Updates of a chat are queued by the chat executor in the order the tasks start
+            task = asyncio.create_task(_feed(dp, bot, update))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        await dp.emit_shutdown(bot=bot, dispatcher=dp, bots=[bot])
+        writer.close()
+        await bot.session.close()
@@ -0,0 +1,156 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+
+from collections.abc import Awaitable, Callable
+from functools import partial
+from pathlib import Path
+from typing import Any, Final
+
+from aiogram import Bot
+
+import config
+
+from utils.warmup import WARMUP
+
+
+logger = logging.getLogger(__name__)
+
+Dump = Callable[[], Any]
+Restore = Callable[[Any, Bot], Awaitable[int]]
+
+
+class Snapshots:
+    """Saves the live game sessions on shutdown and brings them back on the next start.
+
+    Every game mode registers a dump function returning its in-memory sessions as JSON-friendly
+    data, with timers stored as absolute UNIX deadlines, and a restore coroutine function that
+    puts them back, re-arms their timers and returns how many sessions it restored. Snapshots are
+    also taken every ``interval`` seconds, so a crash loses little, and snapshots older than
+    ``max_age`` seconds are ignored. Nothing is saved while ``path`` is empty.
+
+    On startup the sessions of a mode are restored as the last step of its warmup, so the mode
+    takes updates only once its sessions are back.
+    """
+
+    def __init__(
+        self,
+        *,
+        path: str = config.SNAPSHOT_PATH,
+        interval: float = config.SNAPSHOT_INTERVAL,
+        max_age: float = config.SNAPSHOT_MAX_AGE,
+    ) -> None:
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self._modes: dict[str, tuple[Dump, Restore]] = {}
+        self._pending: dict[str, Any] = {}
+        self._task: asyncio.Task | None = None
+
+    def register(self, name: str, dump: Dump, restore: Restore) -> None:
+        """Register the sessions of a game mode."""
+        self._modes[name] = (dump, restore)
+
+    def dump(self) -> dict[str, Any]:
+        """Current sessions of every mode."""
+        # Sessions not restored yet are carried over, and a cold mode has no sessions
+        modes = dict(self._pending)
+        for name, (dump, _) in self._modes.items():
+            if name in modes or not WARMUP.ready(name):
+                continue
+            try:
+                modes[name] = dump()
+            except Exception as e:
+                logger.error(f"Failed to snapshot {name} sessions: {e}")
+        return {"saved_at": time.time(), "modes": modes}
+
+    async def save(self) -> None:
+        """Write the sessions to the file, replacing the previous snapshot atomically."""
+        if not self.path:
+            return
+
+        # Sessions are dumped in the loop so that no handler changes them halfway
+        data = json.dumps(self.dump(), ensure_ascii=False, separators=(",", ":"))
+        try:
+            await asyncio.to_thread(self._write, data)
+        except OSError as e:
+            logger.error(f"Failed to save the snapshot to {self.path}: {e}")
+
+    def load(self) -> dict[str, Any]:
+        """Saved sessions of the registered modes, none when the snapshot is missing or stale."""
+        path = Path(self.path)
+        if not self.path or not path.exists():
+            return {}
+
+        try:
+            snapshot = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read the snapshot {self.path}: {e}")
+            return {}
+
+        age = time.time() - snapshot["saved_at"]
+        if age > self.max_age:
+            logger.warning("Snapshot %s is %.0f s old, sessions are not restored", path, age)
+            return {}
+
+        logger.info("Restoring sessions from a %.1f s old snapshot", age)
+        return {name: state for name, state in snapshot["modes"].items() if name in self._modes}
+
+    async def restore(self, bot: Bot) -> dict[str, int]:
+        """Restore the sessions from the file right away and report how many each mode got back."""
+        self._pending.update(self.load())
+        return {name: await self._restore(name, bot) for name in list(self._pending)}
+
+    async def start(self, bot: Bot) -> None:
+        """Schedule the restore of the sessions and start taking snapshots in the background."""
+        self._pending.update(self.load())
+        for name in self._pending:
+            WARMUP.register(name, partial(self._restore, name, bot))
+        if self.path and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the background snapshots and take the final one."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        await self.save()
+
+    async def _restore(self, name: str, bot: Bot) -> int:
+        _, restore = self._modes[name]
+        try:
+            count = await restore(self._pending[name], bot)
+        except Exception as e:
+            logger.error(f"Failed to restore {name} sessions: {e}")
+            count = 0
+        finally:
+            del self._pending[name]
+
+        logger.info("Restored %d %s sessions", count, name)
+        return count
+
+    def _write(self, data: str) -> None:
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(data)
+        os.replace(temporary, self.path)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save()
+
+
+SNAPSHOT: Final[Snapshots] = Snapshots()
+
+
+def remaining(deadline: float | None) -> float:
+    """Seconds left until a deadline from a snapshot, zero when it has passed."""
+    return max(0.0, deadline - time.time()) if deadline is not None else 0.0
@@ -0,0 +1,229 @@
+import contextvars
+import itertools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Final
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """Timed stage of a trace, ``start`` is a UNIX time and ``duration`` is in seconds."""
+
+    trace_id: str
+    span_id: int
+    parent_id: int | None
+    name: str
+    start: float
+    duration: float = 0.0
+    error: str | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Trace:
+    """Spans of a single update, exported together once the root span ends."""
+
+    trace_id: str
+    sampled: bool
+    spans: list[Span] = field(default_factory=list)
+    ids: Iterator[int] = field(default_factory=lambda: itertools.count(1))
+    finished_at: float | None = None
+
+
+CURRENT_TRACE: Final[contextvars.ContextVar[Trace | None]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+CURRENT_SPAN: Final[contextvars.ContextVar[Span | None]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class Tracer:
+    """Records span trees of updates and appends them to a JSONL file.
+
+    A root span is opened per update. Handlers, SQL statements and Bot API calls made in its
+    context become child spans, including ones from tasks the update spawned, as long as they
+    start within ``linger`` seconds after the root ends. A trace is written if it was picked with
+    probability ``sample_rate`` or its root took longer than ``slow_threshold`` seconds, so slow
+    updates are always kept. Tracing is off while ``path`` is empty.
+
+    Exported spans are queued and written in batches by a background thread, so updates don't
+    wait for the disk. :meth:`flush` writes out what is queued.
+    """
+
+    def __init__(
+        self,
+        *,
+        path: str = config.TRACE_PATH,
+        sample_rate: float = config.TRACE_SAMPLE_RATE,
+        slow_threshold: float = config.TRACE_SLOW_THRESHOLD,
+        linger: float = config.TRACE_LINGER,
+    ) -> None:
+        self.path = path
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.linger = linger
+        self._queue: queue.SimpleQueue[list[Span] | None] = queue.SimpleQueue()
+        self._writer: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether traces are recorded."""
+        return bool(self.path)
+
+    @property
+    def recording(self) -> bool:
+        """Whether spans opened now would be recorded."""
+        return self._active_trace() is not None
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Span | None]:
+        """Open the root span of a new trace."""
+        if not self.enabled:
+            yield None
+            return
+
+        trace = Trace(os.urandom(8).hex(), random.random() < self.sample_rate)
+        trace_token = CURRENT_TRACE.set(trace)
+        try:
+            with self.span(name, **attributes) as root:
+                yield root
+        finally:
+            CURRENT_TRACE.reset(trace_token)
+            trace.finished_at = time.time()
+            if trace.sampled or root.duration >= self.slow_threshold:
+                trace.sampled = True
+                self.export(trace.spans)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span | None]:
+        """Open a child span of the current one, nothing is recorded outside of a trace."""
+        trace = self._active_trace()
+        if trace is None:
+            yield None
+            return
+
+        span = self._new_span(trace, name, time.time(), attributes)
+        token = CURRENT_SPAN.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            CURRENT_SPAN.reset(token)
+            self._add(trace, span)
+
+    def record(self, name: str, start: float, duration: float, **attributes: Any) -> None:
+        """Add a child span for a stage that was timed elsewhere, possibly in another thread."""
+        trace = self._active_trace()
+        if trace is not None:
+            span = self._new_span(trace, name, start, attributes)
+            span.duration = duration
+            self._add(trace, span)
+
+    def export(self, spans: list[Span]) -> None:
+        """Queue spans to be appended to the file by the writer thread."""
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_loop, args=(self.path,), name="trace-writer", daemon=True
+                )
+                self._writer.start()
+            self._queue.put(spans)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Write out the queued spans and stop the writer, the next export starts it again."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+            if writer is None:
+                return
+            self._queue.put(None)
+        # A writer stuck on the disk is a daemon thread and is left behind
+        writer.join(timeout)
+
+    def _write_loop(self, path: str) -> None:
+        while True:
+            batches = [self._queue.get()]
+            # Everything queued meanwhile goes out with a single write
+            while batches[-1] is not None:
+                try:
+                    batches.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            spans = [span for batch in batches if batch is not None for span in batch]
+            try:
+                with Path(path).open("a", encoding="utf-8") as file:
+                    file.writelines(json.dumps(asdict(span), default=str) + "\n" for span in spans)
+            except OSError as e:
+                logger.error(f"Failed to export spans to {path}: {e}")
+
+            if batches[-1] is None:
+                return
+
+    def _active_trace(self) -> Trace | None:
+        trace = CURRENT_TRACE.get()
+        if trace is None or (
+            trace.finished_at is not None and time.time() - trace.finished_at > self.linger
+        ):
+            return None
+        return trace
+
+    @staticmethod
+    def _new_span(trace: Trace, name: str, start: float, attributes: dict[str, Any]) -> Span:
+        parent = CURRENT_SPAN.get()
+        parent_id = parent.span_id if parent and parent.trace_id == trace.trace_id else None
+        return Span(trace.trace_id, next(trace.ids), parent_id, name, start, attributes=attributes)
+
+    def _add(self, trace: Trace, span: Span) -> None:
+        # Spans of tasks that outlive the update are exported on their own once the trace is out
+        if trace.finished_at is None:
+            trace.spans.append(span)
+        elif trace.sampled:
+            self.export([span])
+
+
+class TracingRequestMiddleware(BaseRequestMiddleware):
+    """Records a span for every Bot API call made in a trace."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Any:
+        attributes = {}
+        if chat_id := getattr(method, "chat_id", None):
+            attributes["chat_id"] = chat_id
+        with TRACER.span(f"api {method.__api_method__}", **attributes):
+            return await make_request(bot, method)
+
+
+TRACER: Final[Tracer] = Tracer()
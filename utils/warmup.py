@@ -0,0 +1,97 @@
+import asyncio
+import inspect
+import logging
+import time
+
+from collections.abc import Awaitable, Callable
+from typing import Any, Final
+
+import config
+
+from utils.metrics import METRICS, Gauge
+
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Any] | Any]
+
+MODE_READY: Final[Gauge] = METRICS.gauge(
+    "bot_mode_ready", "Whether a mode has loaded its resources and takes updates.", ("mode",)
+)
+
+
+class Warmup:
+    """Loads the heavy resources of game modes off the startup path.
+
+    Every game mode registers loaders for its dictionaries, lexicons and database schemas. On
+    startup the modes are warmed concurrently in the background while polling already runs, or
+    only on their first update when ``prewarm`` is off. Loaders of a mode run one after another,
+    plain functions in a worker thread so that the loop stays responsive. Updates of a mode wait
+    for :meth:`wait` before they are handled.
+    """
+
+    def __init__(self, *, prewarm: bool = config.WARMUP_PREWARM) -> None:
+        self.prewarm = prewarm
+        self.durations: dict[str, float] = {}
+        self._loaders: dict[str, list[Loader]] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        # Kept apart from the tasks, so that modes stay ready once their warmups are gone
+        self._ready: set[str] = set()
+
+    def register(self, mode: str, loader: Loader) -> None:
+        """Register a loader of the game mode."""
+        if mode not in self._loaders:
+            self._loaders[mode] = []
+            MODE_READY.track(mode, function=lambda: int(self.ready(mode)))
+        self._loaders[mode].append(loader)
+
+    def ready(self, mode: str) -> bool:
+        """Whether the mode has finished warming up, modes without loaders always have."""
+        return mode not in self._loaders or mode in self._ready
+
+    async def wait(self, mode: str) -> None:
+        """Warm the mode up unless it has been already and wait until it is done."""
+        if not self.ready(mode):
+            await asyncio.shield(self._warm(mode))
+
+    async def wait_all(self) -> None:
+        """Wait until every mode is warm."""
+        await asyncio.gather(*(self.wait(mode) for mode in self._loaders))
+
+    async def start(self) -> None:
+        """Start warming every mode in the background."""
+        if self.prewarm:
+            for mode in self._loaders:
+                self._warm(mode)
+
+    async def stop(self) -> None:
+        """Cancel warmups that are still running."""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    def _warm(self, mode: str) -> asyncio.Task:
+        if mode not in self._tasks:
+            self._tasks[mode] = asyncio.create_task(self._load(mode))
+        return self._tasks[mode]
+
+    async def _load(self, mode: str) -> None:
+        started = time.perf_counter()
+        for loader in self._loaders[mode]:
+            try:
+                if inspect.iscoroutinefunction(loader):
+                    await loader()
+                else:
+                    await asyncio.to_thread(loader)
+            except Exception as e:
+                # The mode is released anyway, its handlers report what is missing
+                name = getattr(loader, "__name__", loader)
+                logger.error(f"Warmup of {mode} failed in {name}: {e}")
+
+        self._ready.add(mode)
+        self.durations[mode] = time.perf_counter() - started
+        logger.info("Mode %s is ready in %.2f s", mode, self.durations[mode])
+
+
+WARMUP: Final[Warmup] = Warmup()
@@ -0,0 +1,133 @@
+import asyncio
+import hmac
+import logging
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiogram.webhook.aiohttp_server import setup_application
+from aiohttp import web
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """Receives updates pushed by the Bot API and feeds them to the dispatcher.
+
+    Requests are acknowledged as soon as the update is queued. Every queued update is handled in
+    a task of its own, like polling does, with at most ``concurrency`` of them in flight, so an
+    update waiting behind others of its chat holds no worker that other chats need. A full queue
+    answers 503 so that Telegram redelivers the update later.
+    """
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        *,
+        path: str = config.WEBHOOK_PATH,
+        secret_token: str = config.WEBHOOK_SECRET,
+        queue_size: int = config.WEBHOOK_QUEUE_SIZE,
+        concurrency: int = config.WEBHOOK_CONCURRENCY,
+    ) -> None:
+        self.dp = dp
+        self.bot = bot
+        self.path = path
+        self.secret_token = secret_token
+        self.concurrency = concurrency
+        self._queue: asyncio.Queue[Update] = asyncio.Queue(maxsize=queue_size)
+        self._slots = asyncio.Semaphore(concurrency)
+        self._dispatcher: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def build_app(self) -> web.Application:
+        """Build the aiohttp application serving the webhook."""
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        app.on_startup.append(self._start)
+        app.on_shutdown.append(self._stop)
+        setup_application(app, self.dp, bot=self.bot)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Queue the update from the request body."""
+        if self.secret_token and not hmac.compare_digest(
+            request.headers.get(SECRET_HEADER, ""), self.secret_token
+        ):
+            return web.Response(status=403)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except Exception as e:
+            logger.warning(f"Rejected malformed update: {e}")
+            return web.Response(status=400)
+
+        try:
+            self._queue.put_nowait(update)
+        except asyncio.QueueFull:
+            logger.warning("Update queue is full, update %d is rejected", update.update_id)
+            return web.Response(status=503)
+
+        return web.Response()
+
+    async def _start(self, app: web.Application) -> None:
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def _stop(self, app: web.Application) -> None:
+        await self._queue.join()
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+
+    async def _dispatch(self) -> None:
+        while True:
+            update = await self._queue.get()
+            await self._slots.acquire()
+            task = asyncio.create_task(self._feed(update))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _feed(self, update: Update) -> None:
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception as e:
+            logger.error(f"Error handling update {update.update_id}: {e}")
+        finally:
+            self._slots.release()
+            self._queue.task_done()
+
+
+async def run_webhook(
+    dp: Dispatcher,
+    bot: Bot,
+    *,
+    host: str = config.WEBHOOK_HOST,
+    port: int = config.WEBHOOK_PORT,
+    url: str = config.WEBHOOK_URL,
+    allowed_updates: list[str] | None = None,
+) -> None:
+    """Serve the webhook until cancelled, registering it with Telegram when url is set."""
+    server = WebhookServer(dp, bot)
+    runner = web.AppRunner(server.build_app())
+    await runner.setup()
+
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logger.info("Serving webhook on http://%s:%d%s", host, port, server.path)
+
+    if url:
+        await bot.set_webhook(
+            url.rstrip("/") + server.path,
+            secret_token=server.secret_token or None,
+            allowed_updates=allowed_updates or dp.resolve_used_update_types(),
+        )
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,106 @@
+import itertools
+import logging
+import sqlite3
+import time
+
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from os import PathLike
+
+import config
+
+from utils.lexicon import Pair, read_pairs
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ImportReport:
+    """Outcome of an import into the words table."""
+
+    rows: int
+    inserted: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        """Rows read per second."""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.rows} rows, {self.inserted} new words in {self.seconds:.2f} s "
+            f"({self.rows_per_second:,.0f} rows/s)"
+        )
+
+
+def read_files(paths: Iterable[str | PathLike]) -> Iterator[Pair]:
+    """Pairs of English words and translations of the word lists, one file after another."""
+    for path in paths:
+        yield from read_pairs(path)
+
+
+def import_words(
+    db_name: str,
+    pairs: Iterable[Pair],
+    batch_size: int = config.WORDS_GAME_IMPORT_BATCH,
+) -> ImportReport:
+    """Stream the pairs into the words table in a single transaction.
+
+    Words are lowercased and the first translation of a word wins, words already in the table
+    are kept. Only ``batch_size`` rows are held in memory at a time.
+    """
+    started = time.perf_counter()
+    rows = 0
+    normalized = (
+        (english.strip().lower(), russian.strip())
+        for english, russian in pairs
+        if english.strip() and russian.strip()
+    )
+
+    conn = sqlite3.connect(db_name, isolation_level=None)
+    try:
+        # A crash mid-import loses nothing that the next import wouldn't add again
+        conn.execute("PRAGMA synchronous = OFF")
+        before = conn.total_changes
+        conn.execute("BEGIN")
+        try:
+            while batch := list(itertools.islice(normalized, batch_size)):
+                conn.executemany("INSERT OR IGNORE INTO words (en, ru) VALUES (?, ?)", batch)
+                rows += len(batch)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        inserted = conn.total_changes - before
+    finally:
+        conn.close()
+
+    return ImportReport(rows, inserted, time.perf_counter() - started)
+
+
+def has_words(db_name: str) -> bool:
+    """Whether the words table has any words."""
+    conn = sqlite3.connect(db_name)
+    try:
+        return conn.execute("SELECT 1 FROM words LIMIT 1").fetchone() is not None
+    finally:
+        conn.close()
+
+
+def import_dictionaries(
+    db_name: str, paths: Sequence[str | PathLike] = config.WORDS_GAME_DICTIONARY_PATHS
+) -> ImportReport | None:
+    """Fill an empty words table from the word lists, runs on startup."""
+    if not paths or has_words(db_name):
+        return None
+
+    try:
+        report = import_words(db_name, read_files(paths))
+    except OSError as e:
+        logger.error(f"Failed to import the words_game dictionary: {e}")
+        return None
+
+    logger.info("Imported the words_game dictionary: %s", report)
+    return report
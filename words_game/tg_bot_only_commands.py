@@ -1,5 +1,4 @@
 import asyncio
-import logging
 
 from datetime import datetime
 
@@ -8,7 +7,16 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
+import config
+
 from filter import ModeFilter
+from utils.janitor import JANITOR
+from utils.lexicon import LEXICON
+from utils.metrics import ACTIVE_SESSIONS, SCHEDULED_TIMERS
+from utils.outbox import OUTBOX, Priority
+from utils.snapshot import SNAPSHOT
+from utils.warmup import WARMUP
+from words_game.importer import import_dictionaries
 from words_game.work_with_dp import *
 
 
@@ -22,8 +30,23 @@ class GameStates(StatesGroup):
     game_started = State()
 
 
-DB_NAME = "words_game/words_game.db"
+DB_NAME = config.WORDS_GAME_DATABASE_PATH
 active_games = {}
+background_tasks = set()
+
+
+def delete_later(message, delay):
+    # Deleting in the background keeps the chat queue free while the message lingers
+    async def delete():
+        await asyncio.sleep(delay)
+        try:
+            await message.delete()
+        except:
+            pass
+
+    task = asyncio.create_task(delete())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
 
 
 async def update_lobby_message(chat_id, game):
@@ -51,6 +74,45 @@ async def update_lobby_message(chat_id, game):
         game["lobby_message_id"] = message.message_id
 
 
+def dump_sessions():
+    return [
+        {
+            **game,
+            "chat_id": chat_id,
+            "players": list(game["players"].items()),
+            "created_at": game["created_at"].isoformat(),
+        }
+        for chat_id, game in active_games.items()
+    ]
+
+
+def init_database():
+    create_database(DB_NAME)
+    create_tables(DB_NAME)
+    import_dictionaries(DB_NAME)
+
+
+def load_words():
+    # The lexicon may load before the mode has warmed up and created the tables
+    init_database()
+    return get_all_words(DB_NAME)
+
+
+async def restore_sessions(sessions, bot):
+    restored = 0
+    for game in sessions:
+        chat_id = game.pop("chat_id")
+        # Games finished while the bot was down, by the janitor for one, stay finished
+        status = get_session_status(DB_NAME, game["session_id"])
+        if chat_id in active_games or status not in ("waiting", "started"):
+            continue
+        game["players"] = dict(game["players"])
+        game["created_at"] = datetime.fromisoformat(game["created_at"])
+        active_games[chat_id] = game
+        restored += 1
+    return restored
+
+
 async def announce_winner(db_name, session_id, current_chat_id, bot):
     conn = sqlite3.connect(db_name)
     cursor = conn.cursor()
@@ -111,15 +173,17 @@ def get_router(bot):
     global bott
     bott = bot
     # active_games = {}
-    logging.basicConfig(level=logging.INFO)
 
-    asyncio.ensure_future(check_expired_games_periodically())
-    router = Router()
+    JANITOR.register(MODE_NAME, reclaim_stale_sessions)
+    ACTIVE_SESSIONS.track(MODE_NAME, function=lambda: len(active_games))
+    SCHEDULED_TIMERS.track(MODE_NAME, function=lambda: len(background_tasks))
+    SNAPSHOT.register(MODE_NAME, dump_sessions, restore_sessions)
+    LEXICON.register(MODE_NAME, load_words)
+    WARMUP.register(MODE_NAME, init_database)
+    WARMUP.register(MODE_NAME, LEXICON.load)
+    router = Router(name=MODE_NAME)
     router.message.filter(ModeFilter("words"))
 
-    create_database("words_game/words_game.db")
-    create_tables("words_game/words_game.db")
-
     @router.message(Command("start"))
     async def cmd_start(message: types.Message):
 
@@ -163,7 +227,7 @@ def get_router(bot):
 
         await state.clear()
 
-        session_id = add_game_session("words_game/words_game.db", chat_id, user_id)
+        session_id = add_game_session(DB_NAME, chat_id, user_id)
 
         active_games[chat_id] = {
             "creator_id": user_id,
@@ -197,11 +261,7 @@ def get_router(bot):
             response = await message.answer(
                 "❌ No active game in this chat. Create one with /newgame."
             )
-            await asyncio.sleep(3)
-            try:
-                await response.delete()
-            except:
-                pass
+            delete_later(response, 3)
             return
 
         game = active_games[chat_id]
@@ -214,15 +274,11 @@ def get_router(bot):
         game["players"][user_id] = message.from_user.full_name
 
         order_join = len(game["players"])
-        add_game_player("words_game/words_game.db", session_id, user_id, order_join)
+        add_game_player(DB_NAME, session_id, user_id, order_join)
 
         confirmation = await message.answer(f"✅ {message.from_user.full_name} joined the game!")
 
-        await asyncio.sleep(1.5)
-        try:
-            await confirmation.delete()
-        except:
-            pass
+        delete_later(confirmation, 1.5)
 
         await update_lobby_message(chat_id, game)
 
@@ -265,7 +321,9 @@ def get_router(bot):
 
         update_game_start(DB_NAME, session_id)
 
-        start_word, translation = get_random_word(DB_NAME)
+        start_word, translation = next(
+            iter(LEXICON.sample(1, MODE_NAME)), ("hello", "привет")
+        )
 
         active_games[chat_id]["last_word"] = start_word
 
@@ -311,9 +369,9 @@ def get_router(bot):
             await message.answer("❌ The game has already finished.")
             return
 
-        update_game_finish("words_game/words_game.db", session_id)
+        update_game_finish(DB_NAME, session_id)
 
-        await announce_winner("words_game/words_game.db", session_id, chat_id, bot)
+        await announce_winner(DB_NAME, session_id, chat_id, bot)
 
         del active_games[chat_id]
 
@@ -332,7 +390,7 @@ def get_router(bot):
                 """
                 SELECT u.username, l.score, l.game_played 
                 FROM leaders l
-                JOIN users u ON l.user_id = u.tg_id
+                JOIN users u ON u.tg_id = CAST(l.user_id AS TEXT)
                 WHERE l.chat_id = ?
                 ORDER BY l.score DESC, l.game_played DESC
                 LIMIT 10
@@ -377,20 +435,12 @@ def get_router(bot):
 
         if chat_id not in active_games:
             response = await message.answer("❌ There is no active game in this chat.")
-            await asyncio.sleep(3)
-            try:
-                await response.delete()
-            except:
-                pass
+            delete_later(response, 3)
             return
 
         if user_id not in active_games[chat_id]["players"]:
             response = await message.answer("❌ You are not part of this game.")
-            await asyncio.sleep(3)
-            try:
-                await response.delete()
-            except:
-                pass
+            delete_later(response, 3)
             return
 
         game = active_games[chat_id]
@@ -399,7 +449,7 @@ def get_router(bot):
 
         await message.answer(f"🚪 {message.from_user.full_name} left the game.")
 
-        deactivate_game_player("words_game/words_game.db", session_id, user_id)
+        deactivate_game_player(DB_NAME, session_id, user_id)
 
         del game["players"][user_id]
 
@@ -413,7 +463,7 @@ def get_router(bot):
 
         if len(game["players"]) == 0:
             if session_status == "started":
-                update_game_finish("words_game/words_game.db", session_id)
+                update_game_finish(DB_NAME, session_id)
 
             del active_games[chat_id]
 
@@ -452,7 +502,7 @@ def get_router(bot):
                 )
                 return
 
-        translation = check_word_exists(DB_NAME, word)
+        translation = ", ".join(LEXICON.translate(word))
         if not translation:
             await message.answer("❌ This word is not in the dictionary. Try another one.")
             return
@@ -467,8 +517,12 @@ def get_router(bot):
 
         game["current_player"] = next_player_id
 
-        await message.answer(
-            f"✅ Word accepted: {word} - {translation}\n\n" f"🎯 Next turn: {next_player_name}"
+        await OUTBOX.send(
+            bot,
+            chat_id,
+            f"✅ Word accepted: {word} - {translation}\n\n" f"🎯 Next turn: {next_player_name}",
+            priority=Priority.HIGH,
+            message_thread_id=message.message_thread_id,
         )
 
     @router.message()
@@ -498,35 +552,34 @@ def get_router(bot):
     return router
 
 
-async def check_expired_games_periodically():
-    while True:
-        try:
-            finished_games = check_and_finish_expired_games(DB_NAME)
-
-            for game_id, chat_id, last_word_user_id in finished_games:
-                if chat_id in active_games:
-                    del active_games[chat_id]
-
-                winner_name = get_winner_and_update_leaders(DB_NAME, game_id)
-                if winner_name:
-                    await bott.send_message(
-                        chat_id,
-                        f"⏰ Time is up! The game ended automatically.\n\n"
-                        f"Winner: {winner_name} 🎉\n"
-                        f"The game lasted more than 10 minutes.",
-                    )
-                else:
-                    await bott.send_message(
-                        chat_id,
-                        "⏰ Time is up! The game ended automatically.\n\n"
-                        "The game lasted more than 10 minutes.",
-                    )
+async def reclaim_stale_sessions():
+    expired_sessions = expire_stale_sessions(
+        DB_NAME, config.WORDS_GAME_WAITING_TTL, config.WORDS_GAME_STARTED_TTL
+    )
 
+    for session_id, chat_id, session_status in expired_sessions:
+        game = active_games.get(chat_id)
+        if game and game["session_id"] == session_id:
+            del active_games[chat_id]
+
+        if session_status == "waiting":
+            if not config.JANITOR_NOTIFY_CHATS:
+                continue
+            text = "⌛ The game lobby was closed due to inactivity.\nCreate a new one with /newgame."
+        else:
+            winner_name = get_winner_and_update_leaders(DB_NAME, session_id)
+            text = "⏰ Time is up! The game ended automatically.\n\n"
+            if winner_name:
+                text += f"Winner: {winner_name} 🎉\n"
+            text += f"The game lasted more than {config.WORDS_GAME_STARTED_TTL // 60} minutes."
+
+        try:
+            await bott.send_message(chat_id, text)
         except Exception as e:
-            # print(f"Error while checking expired games: {e}")
+            # print(f"Error while notifying about expired game: {e}")
             pass
 
-        await asyncio.sleep(60)
+    return len(expired_sessions)
 
 
 async def main():
@@ -1,5 +1,9 @@
 import sqlite3
 
+from datetime import datetime, timedelta, timezone
+
+from utils.sharding import chat_condition
+
 
 def create_database(name):
     if ".db" in name:
@@ -70,6 +74,33 @@ def create_tables(db_name):
     """
     )
 
+    # Lookups done on every message and the sweep of stale sessions
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_tg_id ON users (tg_id)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_game_session_chat_id ON game_session (chat_id)"
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_game_session_status_created_at
+        ON game_session (session_status, created_at)
+    """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_game_session_status_started_at
+        ON game_session (session_status, started_at)
+    """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_game_players_session_id_user_id
+        ON game_players (session_id, user_id)
+    """
+    )
+
+    conn.commit()
+    conn.close()
+
 
 def delete_table(db_name, table_name):
     conn = sqlite3.connect(f"{db_name}")
@@ -239,22 +270,13 @@ def get_active_session(db_name, chat_id):
     return row[0] if row else None
 
 
-def get_random_word(db_name):
+def get_all_words(db_name):
     conn = sqlite3.connect(db_name)
     cursor = conn.cursor()
-    cursor.execute("SELECT en, ru FROM words ORDER BY RANDOM() LIMIT 1")
-    result = cursor.fetchone()
-    conn.close()
-    return result if result else ("hello", "привет")
-
-
-def check_word_exists(db_name, word):
-    conn = sqlite3.connect(db_name)
-    cursor = conn.cursor()
-    cursor.execute("SELECT ru FROM words WHERE en = ?", (word.lower(),))
-    result = cursor.fetchone()
+    cursor.execute("SELECT en, ru FROM words")
+    result = cursor.fetchall()
     conn.close()
-    return result[0] if result else None
+    return result
 
 
 def get_next_player(db_name, session_id, current_player_id):
@@ -426,50 +448,41 @@ def update_games_played_for_all_players(db_name, session_id, chat_id):
         conn.close()
 
 
-def check_and_finish_expired_games(db_name):
+def expire_stale_sessions(db_name, waiting_ttl, started_ttl):
     conn = sqlite3.connect(db_name)
     cursor = conn.cursor()
 
+    now = datetime.now(timezone.utc)
+    waiting_cutoff = (now - timedelta(seconds=waiting_ttl)).strftime("%Y-%m-%d %H:%M:%S")
+    started_cutoff = (now - timedelta(seconds=started_ttl)).strftime("%Y-%m-%d %H:%M:%S")
+    owned, owned_params = chat_condition()
+    condition = f"""
+        ((session_status = 'waiting' AND created_at < ?)
+        OR (session_status = 'started' AND started_at < ?))
+        AND {owned}
+    """
+    params = (waiting_cutoff, started_cutoff, *owned_params)
+
     try:
+        cursor.execute("BEGIN IMMEDIATE")
         cursor.execute(
-            """
-            SELECT id, chat_id, started_at, last_word_user_id 
-            FROM game_session 
-            WHERE session_status = 'started' 
-            AND datetime(started_at) < datetime('now', '-10 minutes')
-        """
+            f"SELECT id, chat_id, session_status FROM game_session WHERE {condition}",
+            params,
         )
-        expired_games = cursor.fetchall()
-
-        finished_games = []
+        expired_sessions = cursor.fetchall()
 
-        for game_id, chat_id, started_at, last_word_user_id in expired_games:
+        if expired_sessions:
             cursor.execute(
-                """
-                UPDATE game_session 
+                f"""
+                UPDATE game_session
                 SET session_status = 'finished', finished_at = datetime('now')
-                WHERE id = ?
+                WHERE {condition}
             """,
-                (game_id,),
+                params,
             )
 
-            if last_word_user_id:
-                cursor.execute(
-                    """
-                    INSERT INTO leaders (chat_id, user_id, score, game_played)
-                    VALUES (?, ?, 1, 1)
-                    ON CONFLICT(chat_id, user_id) 
-                    DO UPDATE SET 
-                        score = score + 1,
-                        game_played = game_played + 1
-                """,
-                    (chat_id, last_word_user_id),
-                )
-
-            finished_games.append((game_id, chat_id, last_word_user_id))
-
         conn.commit()
-        return finished_games
+        return expired_sessions
 
     except Exception as e:
         # print(f"Ошибка при завершении игр: {e}")
@@ -1,41 +1,30 @@
-from dataclasses import dataclass
-from os import PathLike
+from dataclasses import dataclass, field
 from random import randint, sample
 from typing import ClassVar
 
-from utils.basedir import BASEDIR
+from utils.lexicon import LEXICON, Lexicon
 
 
 @dataclass
 class EnglishAdapter:
     """Английский язык."""
 
-    path: PathLike = BASEDIR / "data" / "english.txt"
+    lexicon: Lexicon = field(default=LEXICON)
 
     _min_letters: ClassVar[int] = 2
     _max_letters: ClassVar[int] = 4
 
     def __post_init__(self) -> None:
         """Инициализация объекта."""
-        self._words: set[str] = set()
-        with self.path.open() as file:
-            for line in file:
-                if word := line.strip():
-                    self._words.add(word.lower())
+        self.lexicon.load()
 
     def __contains__(self, word: str) -> bool:
         """Проверить наличие слова."""
-        return word.lower() in self._words
+        return word in self.lexicon
 
     def random_word(self) -> str:
         """Случайное слово."""
-        target = randint(0, len(self._words) - 1)
-        for index, word in enumerate(self._words):
-            if index == target:
-                return word
-
-        detail = "This code must be unreachable"
-        raise RuntimeError(detail)
+        return self.lexicon.random_english()
 
     def random_letters(self) -> list[str]:
         """Случайные буквы."""
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from wordweaver.executors.session import SessionExecutor
 
@@ -18,6 +18,10 @@ class SessionAdapter:
         """Инициализация объекта."""
         self._executors: dict[int, SessionExecutor] = {}
 
+    def __len__(self) -> int:
+        """Количество сессий."""
+        return len(self._executors)
+
     def has(self, chat_id: int) -> bool:
         """Проверить наличие сессий."""
         return chat_id in self._executors
@@ -32,6 +36,23 @@ class SessionAdapter:
 
         return executor
 
+    def items(self) -> list[tuple[int, SessionExecutor]]:
+        """Получить сессии всех чатов."""
+        return list(self._executors.items())
+
+    def dump(self) -> list[tuple[int, dict[str, Any]]]:
+        """Сохранить непустые сессии."""
+        return [
+            (chat_id, executor.dump())
+            for chat_id, executor in self._executors.items()
+            if not executor.empty()
+        ]
+
+    def load(self, sessions: list[tuple[int, dict[str, Any]]]) -> None:
+        """Восстановить сессии."""
+        for chat_id, state in sessions:
+            self.get_or_create(chat_id).load(state)
+
     def clear(self, chat_id: int) -> None:
         """Очистить сессии для чата."""
         self._executors.pop(chat_id, None)
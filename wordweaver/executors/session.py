@@ -1,11 +1,15 @@
+import time
+
 from collections import Counter
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from wordweaver.entities.player import PlayerEntity
 
 
 if TYPE_CHECKING:
     from wordweaver.adapters.english import EnglishAdapter
-    from wordweaver.entities.player import PlayerEntity
 
 
 @dataclass
@@ -21,6 +25,7 @@ class SessionExecutor:
         self._iteration: int = 0
         self._letters = self._english.random_letters()
         self._used_words: set[str] = set()
+        self._deadline: float | None = None
 
     def is_started(self) -> bool:
         """Проверить, начата игра."""
@@ -104,6 +109,36 @@ class SessionExecutor:
 
         return True
 
+    def arm(self, timeout: timedelta) -> None:
+        """Запомнить, когда сработает таймер лобби или раунда."""
+        self._deadline = time.time() + timeout.total_seconds()
+
+    @property
+    def deadline(self) -> float | None:
+        """Получить UNIX-время срабатывания таймера."""
+        return self._deadline
+
+    def dump(self) -> dict[str, Any]:
+        """Сохранить состояние сессии."""
+        return {
+            "players": [player.model_dump() for player in self._players.values()],
+            "started": self._started_flg,
+            "iteration": self._iteration,
+            "letters": self._letters,
+            "used_words": sorted(self._used_words),
+            "deadline": self._deadline,
+        }
+
+    def load(self, state: dict[str, Any]) -> None:
+        """Восстановить состояние сессии."""
+        players = [PlayerEntity.model_validate(player) for player in state["players"]]
+        self._players = {player.id: player for player in players}
+        self._started_flg = state["started"]
+        self._iteration = state["iteration"]
+        self._letters = state["letters"]
+        self._used_words = set(state["used_words"])
+        self._deadline = state["deadline"]
+
     @property
     def iteration(self) -> int:
         """Получить номер итерации."""
@@ -5,12 +5,16 @@ from collections.abc import Coroutine
 from datetime import timedelta
 from typing import TYPE_CHECKING, Any, ClassVar, Final
 
-from aiogram import F, Router
+from aiogram import Bot, F, Router
 from aiogram.enums import ChatType, ParseMode
 from aiogram.filters import Command
 from aiogram.types import Message
 
 from filter import ModeFilter
+from utils.metrics import ACTIVE_SESSIONS, SCHEDULED_TIMERS
+from utils.outbox import OUTBOX, Priority
+from utils.snapshot import SNAPSHOT, remaining
+from utils.warmup import WARMUP
 from wordweaver.container import CONTAINER
 from wordweaver.entities.player import PlayerEntity
 
@@ -25,7 +29,7 @@ LOBBY_TIMEOUT: Final[timedelta] = timedelta(seconds=30.0)
 ROUND_TIMEOUT: Final[timedelta] = timedelta(seconds=15.0)
 
 
-router = Router()
+router = Router(name=MODE)
 
 
 class Background:
@@ -44,19 +48,22 @@ class Background:
     async def start(
         cls,
         executor: "SessionExecutor",
-        message: "Message",
+        bot: Bot,
+        chat_id: int,
         *,
         delay: timedelta = timedelta(),
     ) -> None:
         """Начать игру."""
+        executor.arm(delay)
         await asyncio.sleep(delay.total_seconds())
         executor.start()
-        await cls.notify(executor, message)
+        await cls.notify(executor, bot, chat_id)
 
     @classmethod
-    async def notify(cls, executor: "SessionExecutor", message: "Message") -> None:
+    async def notify(cls, executor: "SessionExecutor", bot: Bot, chat_id: int) -> None:
         """Оповестить про новый раунд."""
-        coroutine = cls.timer(executor, executor.iteration, message)
+        executor.arm(ROUND_TIMEOUT)
+        coroutine = cls.timer(executor, executor.iteration, bot, chat_id)
         cls.create_task(coroutine)
 
         player = executor.who()
@@ -68,15 +75,23 @@ class Background:
         ]
 
         text = "\n".join(lines)
-        await message.answer(text, parse_mode=ParseMode.HTML)
+        await OUTBOX.send(bot, chat_id, text, priority=Priority.HIGH, parse_mode=ParseMode.HTML)
 
     @classmethod
-    async def timer(cls, executor: "SessionExecutor", iteration: int, message: "Message") -> None:
+    async def timer(
+        cls,
+        executor: "SessionExecutor",
+        iteration: int,
+        bot: Bot,
+        chat_id: int,
+        *,
+        delay: timedelta = ROUND_TIMEOUT,
+    ) -> None:
         """Установить таймер на раунд."""
         session_adapter = CONTAINER.session_adapter()
         user_adapter = CONTAINER.user_adapter()
 
-        await asyncio.sleep(ROUND_TIMEOUT.total_seconds())
+        await asyncio.sleep(delay.total_seconds())
 
         if executor.iteration != iteration:
             return
@@ -87,20 +102,36 @@ class Background:
         await user_adapter.progress(player.id, player.streak)
 
         text = f"☠ You time is up, @{player.username}!"
-        await message.answer(text)
+        await bot.send_message(chat_id, text)
 
         if executor.is_alive():
-            await cls.notify(executor, message)
+            await cls.notify(executor, bot, chat_id)
             return
 
         if len(executor.usernames) > 1:
             text = "✔ <b>The Game is Over</b>"
-            await message.answer(text, parse_mode=ParseMode.HTML)
+            await bot.send_message(chat_id, text, parse_mode=ParseMode.HTML)
+
+        session_adapter.clear(chat_id)
 
-        session_adapter.clear(message.chat.id)
+    @classmethod
+    async def restore(cls, sessions: list[tuple[int, dict[str, Any]]], bot: Bot) -> int:
+        """Восстановить сессии из снимка и перезапустить их таймеры."""
+        session_adapter = CONTAINER.session_adapter()
+        session_adapter.load(sessions)
+
+        for chat_id, _ in sessions:
+            executor = session_adapter.get_or_create(chat_id)
+            delay = timedelta(seconds=remaining(executor.deadline))
+            if executor.is_started():
+                coroutine = cls.timer(executor, executor.iteration, bot, chat_id, delay=delay)
+            else:
+                coroutine = cls.start(executor, bot, chat_id, delay=delay)
+            cls.create_task(coroutine)
+
+        return len(sessions)
 
 
-@router.startup.register
 async def startup() -> None:
     """Начало жизненного цикла."""
     user_adapter = CONTAINER.user_adapter()
@@ -108,6 +139,16 @@ async def startup() -> None:
     await user_adapter.migrate()
 
 
+# Словарь на 370 тысяч слов читается в потоке, пока бот уже принимает обновления
+WARMUP.register(MODE, CONTAINER.english_adapter)
+WARMUP.register(MODE, startup)
+ACTIVE_SESSIONS.track(
+    MODE, function=lambda: len(CONTAINER.session_adapter()) if WARMUP.ready(MODE) else 0
+)
+SCHEDULED_TIMERS.track(MODE, function=lambda: len(Background._tasks))
+SNAPSHOT.register(MODE, lambda: CONTAINER.session_adapter().dump(), Background.restore)
+
+
 @router.message(ModeFilter(MODE), Command("me", ignore_case=True))
 async def me(message: "Message") -> None:
     """Отобразить статистику пользователя."""
@@ -192,7 +233,7 @@ async def start(message: "Message") -> None:
     executor.join(player)
 
     if message.chat.type == ChatType.PRIVATE:
-        await Background.start(executor, message)
+        await Background.start(executor, message.bot, message.chat.id)
         return
 
     lines = [
@@ -206,7 +247,7 @@ async def start(message: "Message") -> None:
     text = "\n".join(lines)
     await message.reply(text, parse_mode=ParseMode.HTML)
 
-    coroutine = Background.start(executor, message, delay=LOBBY_TIMEOUT)
+    coroutine = Background.start(executor, message.bot, message.chat.id, delay=LOBBY_TIMEOUT)
     Background.create_task(coroutine)
 
 
@@ -311,4 +352,4 @@ async def handle(message: "Message") -> None:
         await message.reply(text)
         return
 
-    await Background.notify(executor, message)
+    await Background.notify(executor, message.bot, message.chat.id)